@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Cuboid primitive micro-benchmarks
+
+Times Cuboid.intersects/contains and full packings on the workload used by
+tests/test_collisions.py (1000 random cuboids with 8 to 30 sides packed into
+100x100x1 and 150x150x20 bins).
+
+    PYTHONPATH=. python benchmarks/bench_cuboid.py
+"""
+import itertools
+import random
+import timeit
+
+from cubspack.geometry import Cuboid
+import cubspack.guillotine as guillotine
+import cubspack.maxcubs as maxcubs
+import cubspack.packer as packer
+
+
+def collision_workload(num=1000, max_side=30, min_side=8):
+    return [(random.randint(min_side, max_side),
+             random.randint(min_side, max_side), 1) for _ in range(num)]
+
+
+def placed_cuboids(num):
+    return [Cuboid(random.randint(0, 150), random.randint(0, 150),
+                   random.randint(0, 20), w, h, random.randint(1, 20))
+            for w, h, _ in collision_workload(num)]
+
+
+def bench_predicates(cuboids, repeat=3):
+    pairs = list(itertools.combinations(cuboids, 2))
+
+    def intersects():
+        for c1, c2 in pairs:
+            c1.intersects(c2)
+
+    def intersects_edges():
+        for c1, c2 in pairs:
+            c1.intersects(c2, edges=True)
+
+    def contains():
+        for c1, c2 in pairs:
+            c1.contains(c2)
+
+    for func in (intersects, intersects_edges, contains):
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        print("{:<20} {:>8} pairs {:8.3f} s".format(
+            func.__name__, len(pairs), best))
+
+
+def bench_packing(cubs, algos):
+    for algo in algos:
+        p = packer.PackerBBF(pack_algo=algo, sort_algo=packer.SORT_LSIDE)
+        p.add_bin(100, 100, 1)
+        p.add_bin(150, 150, 20)
+        for c in cubs:
+            p.add_cub(*c)
+
+        best = min(timeit.repeat(p.pack, number=1, repeat=1))
+        print("{:<20} {:>8} items {:8.3f} s".format(
+            algo.__name__, len(cubs), best))
+
+
+if __name__ == '__main__':
+    random.seed(0)
+    bench_predicates(placed_cuboids(500))
+    bench_packing(collision_workload(), (guillotine.GuillotineBssfSas,
+                                         maxcubs.MaxCubsBssf))
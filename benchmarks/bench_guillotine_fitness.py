@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Guillotine section fitness calls benchmark
+
+Packs n random cuboids with 1 to 12 sides into a single cubic bin sized to
+hold about 80% of them, and counts the _section_fitness calls made by the
+fused selection against the ones a full scan would make: one per feasible
+section and orientation, plus the fitness of the winner computed again by
+placement().
+
+    PYTHONPATH=. python benchmarks/bench_guillotine_fitness.py [n ...]
+"""
+import argparse
+import random
+import time
+
+import cubspack.guillotine as guillotine
+import cubspack.packer as packer
+
+from workload import bin_side
+from workload import workload
+
+
+def full_scan_calls(b, width, height, depth):
+    """Fitness calls of a full scan with a fitness recomputed at the end"""
+    dims = b._orientations(width, height, depth)
+    min_w, min_h, min_d = map(min, zip(*dims))
+    calls = sum(1 for _, s in b._fit_index.feasible(min_w, min_h, min_d)
+                for w, h, d in dims
+                if w <= s.width and h <= s.height and d <= s.depth)
+    return calls + 1 if calls else 0
+
+
+def bench(cubs, algo):
+    side = bin_side(len(cubs))
+    p = packer.newPacker(mode=packer.PackingMode.Online,
+                         bin_algo=packer.PackingBin.BBF, pack_algo=algo)
+    p.add_bin(side, side, side)
+
+    calls = [0]
+    fitness = algo._section_fitness
+
+    def counted(self, *args):
+        calls[0] += 1
+        return fitness(self, *args)
+
+    full = 0
+    elapsed = 0
+    algo._section_fitness = counted
+    try:
+        for c in cubs:
+            for b in p:
+                full += full_scan_calls(b, *c)
+            start = time.time()
+            p.add_cub(*c)
+            elapsed += time.time() - start
+    finally:
+        algo._section_fitness = fitness
+
+    print("{:<20} {:>8} items {:>10} calls {:>10} full scan {:6.1%} "
+          "{:8.3f} s".format(algo.__name__, len(cubs), calls[0], full,
+                             1 - float(calls[0]) / full, elapsed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sizes', type=int, nargs='*', default=[1000, 5000])
+    args = parser.parse_args()
+
+    for num in args.sizes:
+        random.seed(0)
+        cubs = workload(num)
+        for name in ('BssfSas', 'BlsfSas', 'BvfSas'):
+            bench(cubs, getattr(guillotine, 'Guillotine' + name))
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Guillotine vs GuillotineVec packing benchmark
+
+Packs n random cuboids with 1 to 12 sides into a single cubic bin sized
+to hold about 80% of them, with both Guillotine engines and section merge
+disabled, so the free sections pile up.
+
+    PYTHONPATH=. python benchmarks/bench_guillotine_vec.py [n ...]
+"""
+import argparse
+import random
+import time
+
+import cubspack.guillotine as guillotine
+import cubspack.guillotine_vec as guillotine_vec
+
+from workload import bin_side
+from workload import workload
+
+
+def bench(cubs, algo):
+    side = bin_side(len(cubs))
+    b = algo(side, side, side, merge=False)
+
+    start = time.time()
+    placed = sum(1 for c in cubs if b.add_cub(*c) is not None)
+    elapsed = time.time() - start
+
+    print("{:<24} {:>8} items {:>8} placed {:>8} sections {:8.3f} s".format(
+        algo.__name__, len(cubs), placed, len(b._sections), elapsed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sizes', type=int, nargs='*',
+                        default=[1000, 10000, 30000])
+    args = parser.parse_args()
+
+    for num in args.sizes:
+        random.seed(0)
+        cubs = workload(num)
+        for name in ('BssfSas', 'BlsfMaxas', 'BvfMinas'):
+            bench(cubs, getattr(guillotine, 'Guillotine' + name))
+            bench(cubs, getattr(guillotine_vec, 'GuillotineVec' + name))
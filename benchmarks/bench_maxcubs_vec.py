@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""MaxCubs vs MaxCubsVec packing benchmark
+
+Packs n random cuboids with 1 to 12 sides into a single cubic bin sized
+to hold about 80% of them, with both MaxCubs engines. The pure Python one
+is skipped above --max-python items.
+
+    PYTHONPATH=. python benchmarks/bench_maxcubs_vec.py [--max-python N] \
+        [n ...]
+"""
+import argparse
+import random
+import time
+
+import cubspack.maxcubs as maxcubs
+import cubspack.maxcubs_vec as maxcubs_vec
+import cubspack.packer as packer
+
+from workload import bin_side
+from workload import workload
+
+
+def bench(cubs, algo):
+    side = bin_side(len(cubs))
+    p = packer.newPacker(mode=packer.PackingMode.Online,
+                         bin_algo=packer.PackingBin.BFF, pack_algo=algo)
+    p.add_bin(side, side, side)
+
+    start = time.time()
+    for c in cubs:
+        p.add_cub(*c)
+    elapsed = time.time() - start
+
+    print("{:<20} {:>8} items {:>8} placed {:8.3f} s".format(
+        algo.__name__, len(cubs), len(p.cub_list()), elapsed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sizes', type=int, nargs='*',
+                        default=[1000, 10000, 50000])
+    parser.add_argument('--max-python', type=int, default=10000)
+    args = parser.parse_args()
+
+    for num in args.sizes:
+        random.seed(0)
+        cubs = workload(num)
+        for name in ('Bl', 'Bssf', 'Baf', 'Blsf'):
+            if num <= args.max_python:
+                bench(cubs, getattr(maxcubs, 'MaxCubs' + name))
+            bench(cubs, getattr(maxcubs_vec, 'MaxCubsVec' + name))
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Skyline packing benchmark
+
+Packs n random cuboids with 10 to 60 sides into a single cubic bin sized
+to hold about --fill of them, with the Skyline engines and MaxCubsBl as
+the reference. MaxCubsBl is skipped above --max-maxcubs items. A low fill
+spreads the cuboids over a wide floor, with many distinct edges under the
+skyline.
+
+    PYTHONPATH=. python benchmarks/bench_skyline.py [--fill F] \
+        [--max-maxcubs N] [n ...]
+"""
+import argparse
+import random
+import time
+
+import cubspack.maxcubs as maxcubs
+import cubspack.packer as packer
+import cubspack.skyline as skyline
+
+from workload import bin_side
+from workload import workload
+
+
+def bench(cubs, fill, algo):
+    side = bin_side(len(cubs), fill, volume=35 ** 3)
+    p = packer.newPacker(mode=packer.PackingMode.Online,
+                         bin_algo=packer.PackingBin.BFF, pack_algo=algo)
+    p.add_bin(side, side, side)
+
+    start = time.time()
+    for c in cubs:
+        p.add_cub(*c)
+    elapsed = time.time() - start
+
+    print("{:<20} {:>8} items {:>8} placed {:8.3f} s".format(
+        algo.__name__, len(cubs), len(p.cub_list()), elapsed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sizes', type=int, nargs='*',
+                        default=[500, 2000, 10000])
+    parser.add_argument('--fill', type=float, default=0.8)
+    parser.add_argument('--max-maxcubs', type=int, default=2000)
+    args = parser.parse_args()
+
+    for num in args.sizes:
+        random.seed(0)
+        cubs = workload(num, 60, 10)
+        for name in ('Bl', 'Mwf', 'Mwfl'):
+            bench(cubs, args.fill, getattr(skyline, 'Skyline' + name))
+        if num <= args.max_maxcubs:
+            bench(cubs, args.fill, maxcubs.MaxCubsBl)
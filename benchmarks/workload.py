@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""Random workload shared by the packing benchmarks"""
+import random
+
+
+def workload(num, max_side=12, min_side=1):
+    """num random cuboids with min_side to max_side sides"""
+    return [(random.randint(min_side, max_side),
+             random.randint(min_side, max_side),
+             random.randint(min_side, max_side)) for _ in range(num)]
+
+
+def bin_side(num, fill=0.8, volume=275):
+    """Side of a cubic bin holding about fill of num cuboids of the given
+    mean volume, ~275 for the workload() defaults
+    """
+    return int(round((num * volume / fill) ** (1.0 / 3)))
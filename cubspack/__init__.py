@@ -1,5 +1,15 @@
 # -*- coding: utf-8 -*-
 
+from cubspack.blocks import BlocksBaf
+from cubspack.blocks import BlocksBl
+from cubspack.blocks import BlocksBlsf
+from cubspack.blocks import BlocksBssf
+
+from cubspack.extreme_points import ExtremePoints
+from cubspack.extreme_points import ExtremePointsBl
+from cubspack.extreme_points import ExtremePointsBssf
+from cubspack.extreme_points import ExtremePointsRs
+
 from cubspack.guillotine import GuillotineBlsfLas
 from cubspack.guillotine import GuillotineBlsfLlas
 from cubspack.guillotine import GuillotineBlsfMaxas
@@ -19,17 +29,54 @@ from cubspack.guillotine import GuillotineBvfMinas
 from cubspack.guillotine import GuillotineBvfSas
 from cubspack.guillotine import GuillotineBvfSlas
 
+from cubspack.guillotine_vec import GuillotineVecBlsfLas
+from cubspack.guillotine_vec import GuillotineVecBlsfLlas
+from cubspack.guillotine_vec import GuillotineVecBlsfMaxas
+from cubspack.guillotine_vec import GuillotineVecBlsfMinas
+from cubspack.guillotine_vec import GuillotineVecBlsfSas
+from cubspack.guillotine_vec import GuillotineVecBlsfSlas
+from cubspack.guillotine_vec import GuillotineVecBssfLas
+from cubspack.guillotine_vec import GuillotineVecBssfLlas
+from cubspack.guillotine_vec import GuillotineVecBssfMaxas
+from cubspack.guillotine_vec import GuillotineVecBssfMinas
+from cubspack.guillotine_vec import GuillotineVecBssfSas
+from cubspack.guillotine_vec import GuillotineVecBssfSlas
+from cubspack.guillotine_vec import GuillotineVecBvfLas
+from cubspack.guillotine_vec import GuillotineVecBvfLlas
+from cubspack.guillotine_vec import GuillotineVecBvfMaxas
+from cubspack.guillotine_vec import GuillotineVecBvfMinas
+from cubspack.guillotine_vec import GuillotineVecBvfSas
+from cubspack.guillotine_vec import GuillotineVecBvfSlas
+
+from cubspack.layers import LayersBaf
+from cubspack.layers import LayersBl
+from cubspack.layers import LayersBlsf
+from cubspack.layers import LayersBssf
+
 from cubspack.maxcubs import MaxCubsBaf
 from cubspack.maxcubs import MaxCubsBl
 from cubspack.maxcubs import MaxCubsBlsf
 from cubspack.maxcubs import MaxCubsBssf
 
-# from cubspack.skyline import SkylineBl
-# from cubspack.skyline import SkylineBlWm
-# from cubspack.skyline import SkylineMwf
-# from cubspack.skyline import SkylineMwfl
-# from cubspack.skyline import SkylineMwflWm
-# from cubspack.skyline import SkylineMwfWm
+from cubspack.maxcubs_vec import MaxCubsVecBaf
+from cubspack.maxcubs_vec import MaxCubsVecBl
+from cubspack.maxcubs_vec import MaxCubsVecBlsf
+from cubspack.maxcubs_vec import MaxCubsVecBssf
+
+from cubspack.pack_algo import EVICT_LRU
+from cubspack.pack_algo import EVICT_SMALLEST
+from cubspack.pack_algo import EVICT_THINNEST
+from cubspack.pack_algo import ROT_ALL
+from cubspack.pack_algo import ROT_NONE
+from cubspack.pack_algo import ROT_UPRIGHT
+from cubspack.pack_algo import ROT_WH
+
+from cubspack.skyline import SkylineBl
+from cubspack.skyline import SkylineBlWm
+from cubspack.skyline import SkylineMwf
+from cubspack.skyline import SkylineMwfl
+from cubspack.skyline import SkylineMwflWm
+from cubspack.skyline import SkylineMwfWm
 
 from cubspack.packer import SORT_AREA
 from cubspack.packer import SORT_DIFF
@@ -40,6 +87,7 @@ from cubspack.packer import SORT_SSIDE
 from cubspack.packer import SORT_VOLUME
 
 from cubspack.packer import float2dec
+from cubspack.packer import from_fixed
 from cubspack.packer import newPacker
 from cubspack.packer import PackerBFF
 from cubspack.packer import PackerBNF
@@ -49,3 +97,4 @@ from cubspack.packer import PackerOnlineBFF
 from cubspack.packer import PackerOnlineBNF
 from cubspack.packer import PackingBin
 from cubspack.packer import PackingMode
+from cubspack.packer import to_fixed
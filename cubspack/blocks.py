@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+
+from cubspack.geometry import Cuboid
+from cubspack.maxcubs import MaxCubs
+from cubspack.maxcubs import MaxCubsBaf
+from cubspack.maxcubs import MaxCubsBl
+from cubspack.maxcubs import MaxCubsBlsf
+from cubspack.maxcubs import MaxCubsBssf
+
+
+class Block(object):
+    """Composite block of identical cuboids, columns x rows x layers
+
+    The cells are filled along x first, then z, and the layers along y
+    from the bottom, so the block is always a staircase of full layers,
+    full rows and a partial row.
+    """
+
+    def __init__(self, x, y, z, width, height, depth, columns, layers, rows):
+        """Arguments:
+
+            x, y, z (int, float): Block origin
+            width, height, depth (int, float): Cell dimensions
+            columns (int): Cells along x
+            layers (int): Cells along y
+            rows (int): Cells along z
+        """
+        self.x, self.y, self.z = x, y, z
+        self.width, self.height, self.depth = width, height, depth
+        self.columns = columns
+        self.layers = layers
+        self.rows = rows
+        # Cells filled
+        self.used = 0
+
+    def __len__(self):
+        return self.columns * self.layers * self.rows
+
+    def full(self):
+        return self.used == len(self)
+
+    def bounds(self):
+        """Cuboid covering the whole block"""
+        return Cuboid(self.x, self.y, self.z, self.columns*self.width,
+                      self.layers*self.height, self.rows*self.depth)
+
+    def cell(self):
+        """Next cell to fill"""
+        column = self.used % self.columns
+        row = self.used // self.columns % self.rows
+        layer = self.used // (self.columns*self.rows)
+        return Cuboid(self.x + column*self.width, self.y + layer*self.height,
+                      self.z + row*self.depth, self.width, self.height,
+                      self.depth)
+
+    def free(self):
+        """Cuboids covering the cells still empty
+
+        The end of the partial row, the rows left in its layer and the
+        layers left above, without the empty ones.
+        """
+        per_layer = self.columns * self.rows
+        layer, in_layer = divmod(self.used, per_layer)
+        row, column = divmod(in_layer, self.columns)
+        y = self.y + layer*self.height
+        z = self.z + row*self.depth
+
+        spaces = []
+        if column:
+            spaces.append(Cuboid(
+                self.x + column*self.width, y, z,
+                (self.columns - column)*self.width, self.height, self.depth))
+            row += 1
+            z += self.depth
+        if in_layer and row < self.rows:
+            spaces.append(Cuboid(
+                self.x, y, z, self.columns*self.width, self.height,
+                (self.rows - row)*self.depth))
+        if in_layer:
+            layer += 1
+            y += self.height
+        if layer < self.layers:
+            spaces.append(Cuboid(
+                self.x, y, self.z, self.columns*self.width,
+                (self.layers - layer)*self.height, self.rows*self.depth))
+        return spaces
+
+
+class Blocks(MaxCubs):
+    """Block building, for loads of many identical cuboids
+
+    When the maximal cuboid search places a cuboid, the maximal cuboid
+    selected is filled with as many copies of it as fit in the same
+    orientation, and that block is taken from the free space with a single
+    split. The identical cuboids following go to the next cell of the
+    block without any search or split, one block open for each placed
+    dimensions.
+
+    When a cuboid doesn't fit anywhere else, it can go in the cells never
+    filled, and the block is then given back as free cuboids.
+    """
+
+    def _block_position(self, dims):
+        """Next cell of an open block for any of the orientations"""
+        for w, h, d in dims:
+            block = self._blocks.get((w, h, d))
+            if block is not None:
+                cell = block.cell()
+                return cell, cell
+        return None, None
+
+    def _add_max_cub(self, max_cub):
+        key = super(Blocks, self)._add_max_cub(max_cub)
+        self._forget_released(max_cub)
+        return key
+
+    def _remove_max_cub(self, key):
+        self._forget_released(self._max_cubs[key])
+        super(Blocks, self)._remove_max_cub(key)
+
+    def _joined_space(self, space):
+        """Free space joined to the maximal cuboids sharing a whole face
+
+        The maximal cuboids aren't modified.
+
+        Returns:
+            (joined, keys)
+            joined (Cuboid): Copy of space joined to its neighbours
+            keys (list): Keys of the maximal cuboids joined
+        """
+        joined = Cuboid(space.x, space.y, space.z, space.width,
+                        space.height, space.depth)
+        keys = []
+        extended = True
+        while extended:
+            extended = False
+            for key in self._max_index.touching(joined):
+                if key not in keys and joined.join(self._max_cubs[key]):
+                    keys.append(key)
+                    extended = True
+                    break
+        return joined, keys
+
+    def _release_block(self, block):
+        """Give back the empty cells of a block as free space
+
+        The block was taken from the free space, so the cuboids released
+        don't overlap any maximal cuboid. They are joined to the ones
+        sharing a whole face with them, but not merged any further.
+        """
+        for space in block.free():
+            space, keys = self._joined_space(space)
+            for key in keys:
+                self._remove_max_cub(key)
+            if self._useful_space(space):
+                self._add_max_cub(space)
+
+    def _released_spaces(self, dims, block):
+        """Free space an open block would give back when released
+
+        Kept for each block until it's filled or a maximal cuboid touching
+        that free space changes.
+        """
+        entry = self._released.get(dims)
+        if entry is None or entry[0] is not block or entry[1] != block.used:
+            spaces = [self._joined_space(space)[0] for space in block.free()]
+            entry = (block, block.used, spaces)
+            self._released[dims] = entry
+        return entry[2]
+
+    def _forget_released(self, max_cub):
+        """Drop the released free space a changed maximal cuboid touches"""
+        for dims, (_, _, spaces) in list(self._released.items()):
+            if any(s.intersects(max_cub, edges=True) for s in spaces):
+                del self._released[dims]
+
+    def _released_position(self, dims):
+        """Best position in the empty cells of the open blocks
+
+        The free space they would give back when released is scored, but
+        the blocks are only released once the cuboid is placed there.
+        """
+        spaces = [space for key, block in self._blocks.items()
+                  for space in self._released_spaces(key, block)]
+
+        fit = ((self._cub_fitness(space, w, h, d), i, n, w, h, d)
+               for n, space in enumerate(spaces)
+               for i, (w, h, d) in enumerate(dims)
+               if w <= space.width and h <= space.height and
+               d <= space.depth)
+
+        try:
+            _, _, n, w, h, d = min(fit)
+        except ValueError:
+            return None, None
+
+        space = spaces[n]
+        return Cuboid(space.x, space.y, space.z, w, h, d), space
+
+    def _select_position(self, w, h, d, orientations=None):
+        """Find the position for placing a cuboid(w*h*d)
+
+        The open blocks come first, then the maximal cuboids, and at last
+        the empty cells of the open blocks, as the free space they give
+        back when released. The bin isn't modified.
+
+        Arguments:
+            w (int, float): Cuboid width
+            h (int, float): Cuboid height
+            d (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
+
+        Returns:
+            (cub, space)
+            cub (Cuboid): Placed Cuboid or None if was unable.
+            space (Cuboid): Free space were cub was placed
+        """
+        dims = self._orientations(w, h, d, orientations)
+        if not dims:
+            return None, None
+
+        cub, space = self._block_position(dims)
+        if cub is None:
+            cub, space = super(Blocks, self)._select_position(
+                w, h, d, orientations)
+        if cub is None:
+            cub, space = self._released_position(dims)
+        return cub, space
+
+    def _take(self, space):
+        """Remove space from the maximal cuboids"""
+        new_keys = self._split(space)
+        self._remove_duplicates(new_keys, space)
+
+    def _open_block(self, cub):
+        """Start a block with cub, placed by the maximal cuboid search"""
+        # The maximal cuboid selected has its origin at cub
+        keys = [k for k in self._max_index.containing(cub)
+                if self._max_cubs[k].corner_bot_l == cub.corner_bot_l]
+        if keys:
+            m = self._max_cubs[min(keys)]
+            block = Block(cub.x, cub.y, cub.z, cub.width, cub.height,
+                          cub.depth, int(m.width // cub.width),
+                          int(m.height // cub.height),
+                          int(m.depth // cub.depth))
+        else:
+            block = Block(cub.x, cub.y, cub.z, cub.width, cub.height,
+                          cub.depth, 1, 1, 1)
+
+        self._take(block.bounds())
+        return block
+
+    def _place(self, cub):
+        """Update the blocks and free space for a cuboid placed"""
+        # Placed in the empty cells of open blocks, they are released
+        for dims, block in list(self._blocks.items()):
+            if block.bounds().intersects(cub) and block.cell() != cub:
+                self._release_block(block)
+                del self._blocks[dims]
+                self._released.pop(dims, None)
+
+        key = (cub.width, cub.height, cub.depth)
+        block = self._blocks.get(key)
+        if block is None or block.cell() != cub:
+            if block is not None:
+                # Replaced by a new block
+                self._release_block(block)
+            block = self._open_block(cub)
+
+        block.used += 1
+        if block.full():
+            self._blocks.pop(key, None)
+            self._released.pop(key, None)
+        else:
+            self._blocks[key] = block
+
+    def add_cub(self, width, height, depth, rid=None, orientations=None,
+                placement=None):
+        """Add cuboid of widthxheightxdepth dimensions.
+
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            rid: Optional cuboid user id
+            orientations (int): Cuboid orientation mask, None for any
+            placement (Placement): Optional placement() result, the cuboid
+                is placed there without searching if still valid.
+
+        Returns:
+            Cuboid: Cuboid with placement coordinates
+            None: If the cuboid couldn't be placed.
+        """
+        assert(width > 0 and height > 0 and depth > 0)
+
+        # Search best position and orientation
+        position = self._placed_position(
+            placement, width, height, depth, orientations)
+        if position is not None:
+            cub = Cuboid(*position)
+        else:
+            cub, _ = self._select_position(
+                width, height, depth, orientations)
+            if not cub:
+                return None
+
+        self._place(cub)
+
+        # Store and return cuboid position.
+        cub.rid = rid
+        self._store_cub(cub)
+        return cub
+
+    def reset(self):
+        # Open block for each placed dimensions, and the free space each
+        # would give back when released.
+        self._blocks = {}
+        self._released = {}
+        super(Blocks, self).reset()
+
+
+class BlocksBl(Blocks, MaxCubsBl):
+    pass
+
+
+class BlocksBssf(Blocks, MaxCubsBssf):
+    pass
+
+
+class BlocksBaf(Blocks, MaxCubsBaf):
+    pass
+
+
+class BlocksBlsf(Blocks, MaxCubsBlsf):
+    pass
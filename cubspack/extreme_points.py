@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+
+from cubspack.geometry import _column_dtype
+from cubspack.geometry import Cuboid
+from cubspack.maxcubs_vec import _select_rows
+from cubspack.maxcubs_vec import _stack_rows
+from cubspack.pack_algo import PackingAlgorithm
+from cubspack.spatial import ColumnIndex
+import numpy as np
+
+
+class ExtremePoints(PackingAlgorithm):
+    """Extreme Points packing algorithm
+
+    Cuboids are placed with their left-bottom-outeye corner on an extreme
+    point. After each placement the three corners of the new cuboid next to
+    its origin are projected backwards along the other two axes, onto the
+    nearest face of a cuboid or the bin walls, giving up to six new points.
+
+    Each point keeps its residual space, the free distance from it to the
+    first obstacle along each positive axis. A cuboid only fits on a point
+    if it fits in that residual space, the points passing that test are
+    then checked against the cuboids placed in the order of their fitness,
+    until one doesn't overlap any. The candidate set grows with the number
+    of cuboids placed, not with the free space fragmentation as maximal
+    cuboids do.
+
+    When the check fails the low corner of the cuboid hit, relative to the
+    point, is kept with it: any cuboid reaching past that corner along the
+    three axes overlaps the same one, so it is discarded without checking
+    again.
+
+    The points are the rows of an (n, 9) array (x, y, z, the residual space
+    along x, y and z, and the obstacle corner) kept in creation order, so
+    scoring, and cutting the residual spaces after each placement, are
+    array operations. The rays projecting the new points are cast through a
+    ColumnIndex of the cuboids placed.
+
+    For a more detailed explanation of the algorithm used, see:
+    Teodor Gabriel Crainic, Guido Perboli, Roberto Tadei - Extreme
+    Point-Based Heuristics for Three-Dimensional Bin Packing (2008)
+    """
+
+    def _point_fitness(self, points, width, height, depth):
+        """Get fitness values
+
+        Arguments:
+            points (numpy.ndarray): (n, 9) extreme points and their residual
+                space, all of them big enough for the cuboid.
+            width (int, float, numpy.ndarray): Cuboid width, or (n,) widths
+                one per point
+            height (int, float, numpy.ndarray): Cuboid height(s)
+            depth (int, float, numpy.ndarray): Cuboid depth(s)
+
+        Returns:
+            numpy.ndarray: (n,) fitness values
+        """
+        return np.zeros(len(points), dtype=points.dtype)
+
+    def _position_fitness(self, points, width, height, depth):
+        """Values minimized to select the position, the fitness by default"""
+        return self._point_fitness(points, width, height, depth)
+
+    def _select_position(self, w, h, d, orientations=None):
+        """Find the point with best fitness for placing a cuboid(w*h*d)
+
+        Every orientation allowed is tested against the residual space of
+        every point in one pass, the feasible pairs are scored together, and
+        tried from the best one until the cuboid doesn't overlap the ones
+        placed. Ties are resolved preferring the orientation first in
+        ORIENTATIONS, and then the oldest point.
+
+        Arguments:
+            w (int, float): Cuboid width
+            h (int, float): Cuboid height
+            d (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
+
+        Returns:
+            (row, cub)
+            row (int): Row of the selected point or None if was unable.
+            cub (Cuboid): Placed Cuboid
+        """
+        dims = self._orientations(w, h, d, orientations)
+        if not dims:
+            return None, None
+
+        points = self._points
+        placed = np.array(dims, dtype=points.dtype)
+
+        # feasible[i, j] is True when orientation i fits in point j residual
+        # space, and isn't blocked by the obstacle known for it.
+        feasible = np.asarray(
+            (points[:, 3] >= placed[:, 0:1]) &
+            (points[:, 4] >= placed[:, 1:2]) &
+            (points[:, 5] >= placed[:, 2:3]) &
+            ~((points[:, 6] < placed[:, 0:1]) &
+              (points[:, 7] < placed[:, 1:2]) &
+              (points[:, 8] < placed[:, 2:3])), dtype=bool)
+        pairs = np.flatnonzero(feasible)
+        orientation, rows = np.divmod(pairs, len(points))
+        fitness = self._position_fitness(
+            points[rows], placed[orientation, 0], placed[orientation, 1],
+            placed[orientation, 2])
+
+        while len(fitness):
+            i = np.argmin(fitness)
+            row = rows[i]
+            x, y, z = points[row, :3].tolist()
+            cub = Cuboid(x, y, z, *dims[orientation[i]])
+            blocking = self._placed.overlapping(cub)
+            if not blocking:
+                return row, cub
+
+            # Remember the obstacle, it blocks any cuboid at this point
+            # reaching past its low corner.
+            obstacle = self._placed.get(blocking[0])
+            points[row, 6:] = (max(obstacle.x - x, 0),
+                               max(obstacle.y - y, 0),
+                               max(obstacle.z - z, 0))
+            fitness = np.delete(fitness, i)
+            rows = np.delete(rows, i)
+            orientation = np.delete(orientation, i)
+
+        return None, None
+
+    def _new_point(self, x, y, z):
+        """Extreme point at x, y, z with its residual space
+
+        Returns:
+            tuple: (x, y, z, residual width, residual height, residual
+                depth, and the obstacle corner, the bin size when unknown)
+            None: The point is already there, outside the volume, inside a
+                cuboid or its residual space too small for the remaining
+                cuboids.
+        """
+        point = (x, y, z)
+        if x >= self.width or y >= self.height or z >= self.depth or \
+                point in self._point_set or self._placed.at(point):
+            return None
+
+        limits = (self.width, self.height, self.depth)
+        residual = []
+        for axis in range(3):
+            hit = self._placed.ray(point, axis)
+            residual.append((limits[axis] if hit is None else hit) -
+                            point[axis])
+
+        if not self._useful_space(Cuboid(x, y, z, *residual)):
+            return None
+        return point + tuple(residual) + limits
+
+    def _update_points(self, cub):
+        """Update the points whose residual space is taken by cub
+
+        Points covered by cub are removed, the residual space of the others
+        is cut at the cub face their axes cross.
+
+        Arguments:
+            cub (Cuboid): Placed cuboid
+        """
+        points = self._points
+        low = (cub.x, cub.y, cub.z)
+        high = (cub.right, cub.top, cub.ineye)
+
+        # inside[a] is True for the points within cub range along axis a
+        inside = [np.asarray((points[:, a] >= low[a]) &
+                             (points[:, a] < high[a]), dtype=bool)
+                  for a in range(3)]
+        for axis in range(3):
+            a, b = [o for o in range(3) if o != axis]
+            crossed = inside[a] & inside[b] & \
+                np.asarray(points[:, axis] <= low[axis], dtype=bool)
+            if crossed.any():
+                column = points[:, 3 + axis]
+                column[crossed] = np.minimum(
+                    column[crossed], low[axis] - points[crossed, axis])
+
+        keep = ~(inside[0] & inside[1] & inside[2]) & \
+            self._useful_rows(points)
+        if not keep.all():
+            self._remove_points(keep)
+
+    def _remove_points(self, keep):
+        """Keep only the points selected by the keep mask"""
+        for point in self._points[~keep, :3].tolist():
+            self._point_set.remove(tuple(point))
+        self._points = _select_rows(self._points, keep)
+
+    def _project_corners(self, cub):
+        """Add the extreme points generated by a new cuboid
+
+        The corners of cub at the end of each axis from its origin are
+        projected backwards along the other two axes.
+
+        Arguments:
+            cub (Cuboid): Placed cuboid
+        """
+        corners = (((cub.right, cub.y, cub.z), (1, 2)),
+                   ((cub.x, cub.top, cub.z), (0, 2)),
+                   ((cub.x, cub.y, cub.ineye), (0, 1)))
+
+        new_points = []
+        for corner, axes in corners:
+            for axis in axes:
+                hit = self._placed.ray(corner, axis, forward=False)
+                point = list(corner)
+                point[axis] = 0 if hit is None else hit
+                point = self._new_point(*point)
+                if point is not None:
+                    self._point_set.add(point[:3])
+                    new_points.append(point)
+
+        if new_points:
+            self._promote([v for point in new_points for v in point])
+            self._points = _stack_rows(
+                self._points,
+                np.array(new_points, dtype=self._points.dtype, order='F'))
+
+    def _useful_rows(self, points):
+        """Mask of the points with room for some remaining cuboid"""
+        width, height, depth = self._min_dims
+        return np.asarray(
+            (points[:, 3] >= width) & (points[:, 4] >= height) &
+            (points[:, 5] >= depth), dtype=bool)
+
+    def _prune_free_space(self):
+        """Remove the points too small for the remaining cuboids"""
+        keep = self._useful_rows(self._points)
+        if not keep.all():
+            self._remove_points(keep)
+
+    def _promote(self, values):
+        """Promote the points array dtype when needed to store values"""
+        dtype = _column_dtype(values, self._points.dtype)
+        if dtype != self._points.dtype:
+            self._points = self._points.astype(dtype, order='F')
+
+    def placement(self, width, height, depth, orientations=None):
+        """Is the cuboid well fit ? The anwser here.
+
+        Metric used to rate how much space is wasted if a cuboid is placed.
+        The fitness is a value greater or equal to zero, the smaller the
+        value the more 'fit' is the cuboid.
+
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
+
+        Returns:
+            Placement: Cuboid fitness and position, see add_cub
+            None: Cuboid can't be placed
+        """
+        assert(width > 0 and height > 0 and depth > 0)
+
+        self._promote((width, height, depth))
+        row, cub = self._select_position(width, height, depth, orientations)
+        if cub is None:
+            return None
+
+        fitness = self._point_fitness(
+            self._points[row:row+1], cub.width, cub.height, cub.depth)
+        return self._placement(
+            width, height, depth, orientations, fitness.tolist()[0],
+            (cub.x, cub.y, cub.z, cub.width, cub.height, cub.depth))
+
+    def add_cub(self, width, height, depth, rid=None, orientations=None,
+                placement=None):
+        """Add cuboid of widthxheightxdepth dimensions.
+
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            rid: Optional cuboid user id
+            orientations (int): Cuboid orientation mask, None for any
+            placement (Placement): Optional placement() result, the cuboid
+                is placed there without searching if still valid.
+
+        Returns:
+            Cuboid: Cuboid with placement coordinates
+            None: If the cuboid couldn't be placed.
+        """
+        assert(width > 0 and height > 0 and depth > 0)
+
+        # Search best position and orientation
+        self._promote((width, height, depth))
+        position = self._placed_position(
+            placement, width, height, depth, orientations)
+        if position is not None:
+            cub = Cuboid(*position)
+        else:
+            _, cub = self._select_position(
+                width, height, depth, orientations)
+            if not cub:
+                return None
+
+        # Index the cuboid first, so the new points see it
+        cub.rid = rid
+        self._placed.insert(len(self.cuboids), cub)
+        self._store_cub(cub)
+        self._update_points(cub)
+        self._project_corners(cub)
+        return cub
+
+    def reset(self):
+        super(ExtremePoints, self).reset()
+        # Index of the cuboids placed for the ray and overlap queries
+        self._placed = ColumnIndex(self.width, self.height, self.depth)
+        # Extreme points in creation order, and the set of their coordinates
+        values = (0, 0, 0) + (self.width, self.height, self.depth) * 2
+        self._points = np.array(
+            [values], dtype=_column_dtype(values, np.dtype(np.int64)),
+            order='F')
+        self._point_set = set([(0, 0, 0)])
+
+
+class ExtremePointsBl(ExtremePoints):
+    """Bottom Left, select the point where the top of the cuboid is lower
+
+    Only the selection changes, the reported fitness is the one of
+    ExtremePoints.
+    """
+    def _position_fitness(self, points, width, height, depth):
+        return points[:, 1] + height
+
+
+class ExtremePointsBssf(ExtremePoints):
+    """Best Short Side Fit minimize short leftover residual space side"""
+    def _point_fitness(self, points, width, height, depth):
+        return np.minimum(np.minimum(points[:, 3] - width,
+                                     points[:, 4] - height),
+                          points[:, 5] - depth)
+
+
+class ExtremePointsRs(ExtremePoints):
+    """Residual Space, minimize the residual space left along the three axes
+    """
+    def _point_fitness(self, points, width, height, depth):
+        return (points[:, 3] - width) + (points[:, 4] - height) + \
+            (points[:, 5] - depth)
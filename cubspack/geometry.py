@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from math import sqrt
+import numpy as np
 
 
 class Point(object):
@@ -148,8 +149,14 @@ class Cuboid(object):
     width -
     height -
     depth -
+
+    The opposite corner (right, top, ineye) is stored along the dimensions
+    so bound checks read plain slots instead of recomputing sums. Use move()
+    and join() (or create a new Cuboid) to modify a cuboid, so both corners
+    stay consistent.
     """
-    __slots__ = ('width', 'height', 'depth', 'x', 'y', 'z', 'rid')
+    __slots__ = ('width', 'height', 'depth', 'x', 'y', 'z', 'rid',
+                 'right', 'top', 'ineye')
 
     def __init__(self, x, y, z, width, height, depth, rid=None):
         """Initiating the Cuboid
@@ -171,38 +178,33 @@ class Cuboid(object):
         self.x = x
         self.y = y
         self.z = z
+        self.right = x + width
+        self.top = y + height
+        self.ineye = z + depth
         self.rid = rid
 
+    def __getstate__(self):
+        return (self.x, self.y, self.z, self.width, self.height, self.depth,
+                self.rid)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
     @property
     def bottom(self):
         """Cuboid bottom edge y coordinate"""
         return self.y
 
-    @property
-    def top(self):
-        """Cuboid top edge y coordiante"""
-        return self.y + self.height
-
     @property
     def left(self):
         """Cuboid left edge x coordinate"""
         return self.x
 
-    @property
-    def right(self):
-        """Cuboid right edge x coordinate"""
-        return self.x + self.width
-
     @property
     def outeye(self):
         """Cuboid farther from eye edge z coordinate"""
         return self.z
 
-    @property
-    def ineye(self):
-        """Cuboid nearer from eye edge z coordinate"""
-        return self.z + self.depth
-
     @property
     def corner_top_l(self):
         return Point(self.left, self.top, self.outeye)
@@ -285,6 +287,21 @@ class Cuboid(object):
         self.x = x
         self.y = y
         self.z = z
+        self.right = x + self.width
+        self.top = y + self.height
+        self.ineye = z + self.depth
+
+    def _set_bounds(self, x, y, z, right, top, ineye):
+        """Set both corners of the cuboid"""
+        self.x = x
+        self.y = y
+        self.z = z
+        self.right = right
+        self.top = top
+        self.ineye = ineye
+        self.width = right - x
+        self.height = top - y
+        self.depth = ineye - z
 
     def contains(self, cub):
         """Tests if another cuboid is contained by this one
@@ -298,9 +315,9 @@ class Cuboid(object):
         return (cub.y >= self.y and
                 cub.x >= self.x and
                 cub.z >= self.z and
-                cub.y + cub.height <= self.y + self.height and
-                cub.x + cub.width <= self.x + self.width and
-                cub.z + cub.depth <= self.z + self.depth)
+                cub.top <= self.top and
+                cub.right <= self.right and
+                cub.ineye <= self.ineye)
 
     def intersects(self, cub, edges=False):
         """Detect intersections between this cuboid and cub.
@@ -312,42 +329,25 @@ class Cuboid(object):
         Returns:
             bool: True if the cuboids intersect, False otherwise
         """
+        if not edges:
+            # Overlap along every axis, touching faces don't count
+            return (self.x < cub.right and cub.x < self.right and
+                    self.y < cub.top and cub.y < self.top and
+                    self.z < cub.ineye and cub.z < self.ineye)
+
         # Not even touching
-        if (self.bottom > cub.top or
-            self.top < cub.bottom or
-            self.left > cub.right or
-            self.right < cub.left or
-            self.outeye > cub.ineye or
-                self.ineye < cub.outeye):
+        if (self.y > cub.top or
+            self.top < cub.y or
+            self.x > cub.right or
+            self.right < cub.x or
+            self.z > cub.ineye or
+                self.ineye < cub.z):
             return False
 
-        # Discard edge intersects
-        if not edges:
-            if (self.bottom == cub.top or
-                self.top == cub.bottom or
-                self.left == cub.right or
-                self.right == cub.left or
-                self.outeye == cub.ineye or
-                    self.ineye == cub.outeye):
-                return False
-
         # Discard corner intersects
-        if (self.left == cub.right and self.bottom == cub.top and
-                self.outeye == cub.ineye or
-            self.left == cub.right and cub.bottom == self.top and
-                self.outeye == cub.ineye or
-            self.left == cub.right and self.bottom == cub.top and
-                cub.outeye == self.ineye or
-            self.left == cub.right and cub.bottom == self.top and
-                cub.outeye == self.ineye or
-            cub.left == self.right and self.bottom == cub.top and
-                self.outeye == cub.ineye or
-            cub.left == self.right and cub.bottom == self.top and
-                self.outeye == cub.ineye or
-            cub.left == self.right and self.bottom == cub.top and
-                cub.outeye == self.ineye or
-            cub.left == self.right and cub.bottom == self.top and
-                cub.outeye == self.ineye):
+        if ((self.x == cub.right or cub.x == self.right) and
+                (self.y == cub.top or cub.y == self.top) and
+                (self.z == cub.ineye or cub.z == self.ineye)):
             return False
 
         return True
@@ -372,11 +372,11 @@ class Cuboid(object):
         if not self.intersects(cub, edges=edges):
             return None
 
-        bottom = max(self.bottom, cub.bottom)
-        left = max(self.left, cub.left)
+        bottom = max(self.y, cub.y)
+        left = max(self.x, cub.x)
         top = min(self.top, cub.top)
         right = min(self.right, cub.right)
-        outeye = max(self.outeye, cub.outeye)
+        outeye = max(self.z, cub.z)
         ineye = min(self.ineye, cub.ineye)
 
         return Cuboid(
@@ -399,12 +399,8 @@ class Cuboid(object):
             return True
 
         if other.contains(self):
-            self.x = other.x
-            self.y = other.y
-            self.z = other.z
-            self.width = other.width
-            self.height = other.height
-            self.depth = other.depth
+            self._set_bounds(other.x, other.y, other.z,
+                             other.right, other.top, other.ineye)
             return True
 
         if not self.intersects(other, edges=True):
@@ -412,29 +408,374 @@ class Cuboid(object):
 
         # Other cuboid is Up/Down from this
         if self.left == other.left and self.width == other.width and \
-                self.outeye == other.outeye and self.depth == self.depth:
-            y_min = min(self.bottom, other.bottom)
-            y_max = max(self.top, other.top)
-            self.y = y_min
-            self.height = y_max - y_min
+                self.outeye == other.outeye and self.depth == other.depth:
+            self._set_bounds(self.x, min(self.y, other.y), self.z,
+                             self.right, max(self.top, other.top), self.ineye)
             return True
 
         # Other cuboid is Right/Left from this
         if self.bottom == other.bottom and self.height == other.height and \
-                self.outeye == other.outeye and self.depth == self.depth:
-            x_min = min(self.left, other.left)
-            x_max = max(self.right, other.right)
-            self.x = x_min
-            self.width = x_max - x_min
+                self.outeye == other.outeye and self.depth == other.depth:
+            self._set_bounds(min(self.x, other.x), self.y, self.z,
+                             max(self.right, other.right), self.top,
+                             self.ineye)
             return True
 
         # Other cuboid is Right/Left from this
         if self.bottom == other.bottom and self.height == other.height and \
                 self.left == other.left and self.width == other.width:
-            z_min = min(self.outeye, other.outeye)
-            z_max = max(self.ineye, other.ineye)
-            self.z = z_min
-            self.depth = z_max - z_min
+            self._set_bounds(self.x, self.y, min(self.z, other.z),
+                             self.right, self.top,
+                             max(self.ineye, other.ineye))
             return True
 
         return False
+
+
+def _column_dtype(values, dtype):
+    """Narrowest dtype able to store values along with the current dtype
+
+    int64 is kept while every value is an integer in range, float64 when
+    floats show up, and object for anything else (Decimal, big integers...)
+    so exact arithmetic is never lost.
+
+    Arguments:
+        values (iterable): New coordinates and dimensions
+        dtype (numpy.dtype): Current column dtype
+
+    Returns:
+        numpy.dtype: dtype to use
+    """
+    if dtype == np.object_:
+        return dtype
+
+    for v in values:
+        if isinstance(v, (int, np.integer)) and not isinstance(v, bool):
+            if not -2**63 <= v < 2**63:
+                return np.dtype(np.object_)
+        elif isinstance(v, (float, np.floating)):
+            dtype = np.dtype(np.float64)
+        else:
+            return np.dtype(np.object_)
+
+    return dtype
+
+
+def _exact_dtype(columns, bound):
+    """dtype for the arithmetic on columns without overflow
+
+    int64 arithmetic wraps around silently, so int64 columns are promoted
+    to object, Python integers, when the largest absolute result can be out
+    of range. Other dtypes are kept.
+
+    Arguments:
+        columns (list): Arrays with the same dtype
+        bound (callable): Largest absolute result, called with the largest
+            absolute value of each column.
+
+    Returns:
+        numpy.dtype: dtype to use
+    """
+    dtype = columns[0].dtype
+    if dtype != np.int64 or not len(columns[0]):
+        return dtype
+
+    maxima = [int(np.abs(c).max()) for c in columns]
+    if bound(*maxima) < 2**63:
+        return dtype
+    return np.dtype(np.object_)
+
+
+class CuboidArray(object):
+    """Struct-of-arrays store for placed cuboids.
+
+    Coordinates and dimensions are kept in a (6, capacity) buffer, one
+    contiguous row per field (x, y, z, width, height, depth), and the user
+    ids in a parallel list. Cuboid objects are only materialized when an
+    item is accessed, aggregate queries run as array reductions.
+
+    The buffer dtype is int64 while all the values are integers, and is
+    promoted to float64 or object (Decimal) when needed.
+    """
+    X, Y, Z, WIDTH, HEIGHT, DEPTH = range(6)
+
+    def __init__(self, cuboids=(), capacity=16):
+        """Arguments:
+
+            cuboids (iterable): Initial Cuboids
+            capacity (int): Initial buffer capacity
+        """
+        self._data = np.empty((6, max(capacity, 1)), dtype=np.int64)
+        self._rids = []
+        self._len = 0
+        for c in cuboids:
+            self.append(c)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        data = self.data.tolist()
+        for values in zip(*(data + [self._rids])):
+            yield Cuboid(*values)
+
+    def __getitem__(self, key):
+        """Return a Cuboid (or list of Cuboids for slices) at key"""
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(self._len))]
+
+        if key < 0:
+            key += self._len
+        if not 0 <= key < self._len:
+            raise IndexError("Index out of range")
+
+        return Cuboid(*(self._data[:, key].tolist() + [self._rids[key]]))
+
+    def __repr__(self):
+        return "CuboidArray({})".format(list(self))
+
+    @property
+    def data(self):
+        """(6, n) array view with x, y, z, width, height and depth rows"""
+        return self._data[:, :self._len]
+
+    @property
+    def rids(self):
+        """List with the user id of each cuboid"""
+        return self._rids
+
+    def _grow(self, dtype, capacity):
+        data = np.empty((6, capacity), dtype=dtype)
+        data[:, :self._len] = self._data[:, :self._len]
+        self._data = data
+
+    def append(self, cub):
+        """Append a cuboid to the store
+
+        Arguments:
+            cub (Cuboid): Placed cuboid
+        """
+        values = (cub.x, cub.y, cub.z, cub.width, cub.height, cub.depth)
+
+        dtype = _column_dtype(values, self._data.dtype)
+        capacity = self._data.shape[1]
+        if self._len == capacity:
+            capacity *= 2
+        if dtype != self._data.dtype or capacity != self._data.shape[1]:
+            self._grow(dtype, capacity)
+
+        self._data[:, self._len] = values
+        self._rids.append(cub.rid)
+        self._len += 1
+
+    def clear(self):
+        """Remove all cuboids"""
+        self._data = np.empty((6, 16), dtype=np.int64)
+        self._rids = []
+        self._len = 0
+
+    def bounds(self):
+        """Bounds of all the cuboids, see cuboid_bounds
+
+        Returns:
+            numpy.ndarray: (n, 6) array
+        """
+        data = self.data
+        dtype = _exact_dtype(
+            data, lambda x, y, z, w, h, d: max(x + w, y + h, z + d))
+        x, y, z, w, h, d = data.astype(dtype, copy=False)
+        return np.stack((x, y, z, x + w, y + h, z + d), axis=1)
+
+    def volume(self):
+        """Sum of the volume of all the cuboids"""
+        if not self._len:
+            return 0
+
+        dims = self.data[self.WIDTH:]
+        dtype = _exact_dtype(dims, lambda w, h, d: self._len * w * h * d)
+        w, h, d = dims.astype(dtype, copy=False)
+        total = (w * h * d).sum()
+        return total.item() if isinstance(total, np.generic) else total
+
+    def tolist(self):
+        """Returns the cuboids as tuples
+
+        Returns:
+            List: Format [(x, y, z, width, height, depth, rid), ...]
+        """
+        return list(zip(*(self.data.tolist() + [self._rids])))
+
+
+# Batch kernels
+#
+# The functions below work with bounds arrays, each row holds the
+# coordinates (left, bottom, outeye, right, top, ineye) of a cuboid. They
+# accept a single cuboid (Cuboid or 6 element array) against N bounds, which
+# returns an (N,) result, or N bounds against M bounds, which returns an
+# (N, M) result. Edge and corner semantics are the same as the ones of the
+# Cuboid methods.
+def cuboid_bounds(cuboids):
+    """Build the bounds array for one or several cuboids
+
+    Arguments:
+        cuboids (Cuboid, CuboidArray, iterable, numpy.ndarray): Cuboids
+
+    Returns:
+        numpy.ndarray: (6,) array for a single Cuboid, (n, 6) otherwise
+    """
+    if isinstance(cuboids, Cuboid):
+        return np.array((cuboids.left, cuboids.bottom, cuboids.outeye,
+                         cuboids.right, cuboids.top, cuboids.ineye))
+
+    if isinstance(cuboids, CuboidArray):
+        return cuboids.bounds()
+
+    if isinstance(cuboids, np.ndarray):
+        return cuboids
+
+    rows = [(c.left, c.bottom, c.outeye, c.right, c.top, c.ineye)
+            for c in cuboids]
+    if not rows:
+        return np.empty((0, 6), dtype=np.int64)
+    return np.array(rows)
+
+
+def _broadcast_bounds(a, b):
+    """Convert both arguments to bounds, ready for column broadcasting"""
+    a = cuboid_bounds(a)
+    b = cuboid_bounds(b)
+    if a.ndim == 2 and b.ndim == 2:
+        a = a[:, np.newaxis, :]
+    return a, b
+
+
+def batch_contains(a, b):
+    """Test if cuboids in a contain cuboids in b (see Cuboid.contains)
+
+    Arguments:
+        a (Cuboid, numpy.ndarray): Containing cuboid or bounds
+        b (Cuboid, numpy.ndarray): Contained cuboid or bounds
+
+    Returns:
+        numpy.ndarray: Boolean mask
+    """
+    a, b = _broadcast_bounds(a, b)
+    return np.asarray(
+        (b[..., 0] >= a[..., 0]) & (b[..., 1] >= a[..., 1]) &
+        (b[..., 2] >= a[..., 2]) & (b[..., 3] <= a[..., 3]) &
+        (b[..., 4] <= a[..., 4]) & (b[..., 5] <= a[..., 5]), dtype=bool)
+
+
+def batch_intersects(a, b, edges=False):
+    """Detect intersections between cuboids (see Cuboid.intersects)
+
+    Arguments:
+        a (Cuboid, numpy.ndarray): Cuboid or bounds
+        b (Cuboid, numpy.ndarray): Cuboid or bounds
+        edges (bool): Accept edge touching cuboids as intersects or not
+
+    Returns:
+        numpy.ndarray: Boolean mask
+    """
+    a, b = _broadcast_bounds(a, b)
+
+    if not edges:
+        # Only a strictly positive overlap along all the axes counts
+        return np.asarray(
+            (a[..., 0] < b[..., 3]) & (b[..., 0] < a[..., 3]) &
+            (a[..., 1] < b[..., 4]) & (b[..., 1] < a[..., 4]) &
+            (a[..., 2] < b[..., 5]) & (b[..., 2] < a[..., 5]), dtype=bool)
+
+    overlap = (
+        (a[..., 0] <= b[..., 3]) & (b[..., 0] <= a[..., 3]) &
+        (a[..., 1] <= b[..., 4]) & (b[..., 1] <= a[..., 4]) &
+        (a[..., 2] <= b[..., 5]) & (b[..., 2] <= a[..., 5]))
+
+    # Discard corner intersects
+    corner = (
+        ((a[..., 0] == b[..., 3]) | (b[..., 0] == a[..., 3])) &
+        ((a[..., 1] == b[..., 4]) | (b[..., 1] == a[..., 4])) &
+        ((a[..., 2] == b[..., 5]) | (b[..., 2] == a[..., 5])))
+
+    return np.asarray(overlap & ~np.asarray(corner, dtype=bool), dtype=bool)
+
+
+def batch_intersection(a, b, edges=False):
+    """Intersection boxes between cuboids (see Cuboid.intersection)
+
+    Arguments:
+        a (Cuboid, numpy.ndarray): Cuboid or bounds
+        b (Cuboid, numpy.ndarray): Cuboid or bounds
+        edges (bool): If true, touching edges are considered an
+            intersection, and boxes with a 0 side are returned for them.
+
+    Returns:
+        (mask, boxes):
+            mask (numpy.ndarray): Boolean mask of intersecting pairs
+            boxes (numpy.ndarray): Intersection bounds, meaningless where
+                mask is False
+    """
+    mask = batch_intersects(a, b, edges=edges)
+    a, b = _broadcast_bounds(a, b)
+    boxes = np.concatenate(
+        (np.maximum(a[..., :3], b[..., :3]),
+         np.minimum(a[..., 3:], b[..., 3:])), axis=-1)
+    return mask, boxes
+
+
+def sweep_collisions(bounds, first=False, chunk=1 << 18):
+    """Find every pair of intersecting cuboids (see Cuboid.intersects)
+
+    Sweep and prune: cuboids are sorted along x, so the candidates of a
+    cuboid are the ones starting before it ends along x, which are then
+    tested along y and z in vectorized chunks.
+
+    Arguments:
+        bounds (numpy.ndarray, iterable): Cuboid bounds or Cuboids
+        first (bool): Stop as soon as one collision is found
+        chunk (int): Max number of candidate pairs tested at once
+
+    Returns:
+        list: Sorted [(i, j), ...] index pairs (i < j) of colliding cuboids
+    """
+    bounds = cuboid_bounds(bounds)
+    n = len(bounds)
+    if n < 2:
+        return []
+
+    order = np.argsort(bounds[:, 0], kind='stable')
+    b = bounds[order]
+
+    # Candidates of i in x order are i+1 ... end[i]-1
+    end = np.searchsorted(b[:, 0], b[:, 3], side='left')
+    counts = np.maximum(end - np.arange(1, n + 1), 0)
+    cumulative = np.cumsum(counts)
+
+    collisions = []
+    start = 0
+    while start < n:
+        done = cumulative[start - 1] if start else 0
+        stop = max(int(np.searchsorted(
+            cumulative, done + chunk, side='right')), start + 1)
+
+        c = counts[start:stop]
+        total = int(c.sum())
+        if total:
+            i = np.repeat(np.arange(start, stop), c)
+            j = i + 1 + np.arange(total) - np.repeat(np.cumsum(c) - c, c)
+            bi, bj = b[i], b[j]
+            hit = np.asarray(
+                (bi[:, 0] < bj[:, 3]) & (bj[:, 0] < bi[:, 3]) &
+                (bi[:, 1] < bj[:, 4]) & (bj[:, 1] < bi[:, 4]) &
+                (bi[:, 2] < bj[:, 5]) & (bj[:, 2] < bi[:, 5]), dtype=bool)
+
+            if hit.any():
+                i, j = order[i[hit]], order[j[hit]]
+                collisions.extend(zip(np.minimum(i, j).tolist(),
+                                      np.maximum(i, j).tolist()))
+                if first:
+                    break
+
+        start = stop
+
+    return sorted(collisions)
@@ -1,8 +1,9 @@
 
 from cubspack.geometry import Cuboid
 from cubspack.pack_algo import PackingAlgorithm
+from cubspack.spatial import DominanceIndex
+from cubspack.spatial import VolumeIndex
 import itertools
-import operator
 
 
 class Guillotine(PackingAlgorithm):
@@ -19,12 +20,43 @@ class Guillotine(PackingAlgorithm):
             width (int, float):
             height (int, float):
             depth (int, float):
+            rot (bool, int): Cuboid rotation enabled or disabled, or the
+                mask of the orientations allowed (see ROT_ALL)
             merge (bool): Optional keyword argument
         """
         self._merge = merge
         super(Guillotine, self).__init__(
             width, height, depth, rot, *args, **kwargs)
 
+    @staticmethod
+    def _section_faces(section):
+        """Face index keys of a section
+
+        One key per face, (face, extents along the other two axes, face
+        plane), the key of a face and the one of the opposite face of a
+        neighbour differ only in the lowest bit of the first item.
+        """
+        s = section
+        return ((0, s.x, s.width, s.z, s.depth, s.y),
+                (1, s.x, s.width, s.z, s.depth, s.top),
+                (2, s.y, s.height, s.z, s.depth, s.x),
+                (3, s.y, s.height, s.z, s.depth, s.right),
+                (4, s.x, s.width, s.y, s.height, s.z),
+                (5, s.x, s.width, s.y, s.height, s.ineye))
+
+    def _mergeable_section(self, section):
+        """Find a free section sharing a whole face with section
+
+        Returns:
+            Cuboid: Free section that can be joined to section
+            None: There is none
+        """
+        for face in self._section_faces(section):
+            neighbours = self._faces.get((face[0] ^ 1,) + face[1:])
+            if neighbours:
+                return next(iter(neighbours.values()))
+        return None
+
     def _add_section(self, section):
         """Adds a new section to the free section list.
 
@@ -33,16 +65,64 @@ class Guillotine(PackingAlgorithm):
         section is again merged with the remaining sections until the operation
         fails. The result is then appended to the list.
 
+        Free sections never overlap, so the only ones that can be joined are
+        those sharing a whole face with the new section, they are found
+        through the face index instead of trying to join every section.
+
         Arguments:
             section (Cuboid): New free section.
         """
         section.rid = 0
-        plen = 0
 
-        while self._merge and self._sections and plen != len(self._sections):
-            plen = len(self._sections)
-            self._sections = [s for s in self._sections if not section.join(s)]
-        self._sections.append(section)
+        while self._merge:
+            neighbour = self._mergeable_section(section)
+            if neighbour is None:
+                break
+            self._remove_section(neighbour)
+            section.join(neighbour)
+
+        key = next(self._section_seq)
+        self._sections[key] = section
+        self._section_keys[id(section)] = key
+        self._touch_free_space(key)
+        if self._useful_space(section):
+            self._fit_index.insert(key, section)
+        for face in self._section_faces(section):
+            self._faces.setdefault(face, {})[key] = section
+
+    def _remove_section(self, section):
+        """Remove a section from the free section list
+
+        Arguments:
+            section (Cuboid): Free section
+        """
+        key = self._section_keys.pop(id(section))
+        del self._sections[key]
+        if key in self._fit_index:
+            self._fit_index.remove(key)
+        self._last_used.pop(key, None)
+        for face in self._section_faces(section):
+            neighbours = self._faces[face]
+            del neighbours[key]
+            if not neighbours:
+                del self._faces[face]
+
+    def _free_spaces(self):
+        return self._sections.items()
+
+    def _evict_free_space(self, key, space):
+        self._remove_section(space)
+
+    def _prune_free_space(self):
+        """Park the sections too small for the remaining cuboids
+
+        They are kept in the section list so they can still be merged with
+        their neighbours, but are removed from the dominance index, so
+        they are no longer candidates for a placement.
+        """
+        for key, section in self._sections.items():
+            if key in self._fit_index and not self._useful_space(section):
+                self._fit_index.remove(key)
 
     def _split_horizontal(self, section, width, height, depth):
         """We split the section horizontally.
@@ -169,45 +249,61 @@ class Guillotine(PackingAlgorithm):
         """
         raise NotImplementedError
 
-    def _select_fittest_section(self, w, h, d):
+    def _select_fittest_section(self, w, h, d, orientations=None):
         """Select the fittest section
 
-        Calls _section_fitness for each of the sections in free section
-        list. Returns the section with the minimal fitness value, all the rest
-        is boilerplate to make the fitness comparison, to rotate the cuboids,
-        and to take into account when _section_fitness returns None because
-        the cuboid couldn't be placed.
+        Calls _section_fitness once for each of the free sections big
+        enough for the cuboid, as returned by the dominance index, and each
+        orientation fitting inside. The index is searched once with the
+        smallest dimensions over all the orientations allowed. Returns the
+        section with the minimal fitness value, ties are resolved preferring
+        the orientation first in ORIENTATIONS and then the oldest section.
+
+        Fitness values are never negative, so the search stops at the first
+        fitness of 0 found, without the tie resolution.
 
         Arguments:
             w (int, float): Cuboid width
             h (int, float): Cuboid height
             d (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
 
         Returns:
-            (section, was_rotated): Returns the tuple
+            (section, dims, fitness): Returns the tuple
                 section (Cuboid): Section with best fitness
-                was_rotated (bool): The cuboid was rotated
+                dims (tuple): Placed cuboid width, height and depth
+                fitness (int, float): Fitness of the section
         """
-        fitn = ((self._section_fitness(s, w, h, d), s, False) for s in
-                self._sections if self._section_fitness(
-                    s, w, h, d) is not None)
-        fitr = ((self._section_fitness(s, h, w, d), s, True) for s in
-                self._sections if self._section_fitness(
-                    s, h, w, d) is not None)
-
-        if not self.rot:
-            fitr = []
-
-        fit = itertools.chain(fitn, fitr)
-
-        try:
-            _, sec, rot = min(fit, key=operator.itemgetter(0))
-        except ValueError:
-            return None, None
-
-        return sec, rot
-
-    def add_cub(self, width, height, depth, rid=None):
+        dims = self._orientations(w, h, d, orientations)
+        if not dims:
+            return None, None, None
+
+        min_w, min_h, min_d = map(min, zip(*dims))
+        feasible = self._fit_index.feasible(min_w, min_h, min_d)
+        if self._max_free is not None:
+            feasible = list(feasible)
+            for key, _ in feasible:
+                self._touch_free_space(key)
+
+        best = None
+        for key, s in feasible:
+            for i, (cw, ch, cd) in enumerate(dims):
+                if cw > s.width or ch > s.height or cd > s.depth:
+                    continue
+                fitness = self._section_fitness(s, cw, ch, cd)
+                if fitness == 0:
+                    return s, dims[i], fitness
+                if best is None or (fitness, i, key) < best[:3]:
+                    best = (fitness, i, key, s)
+
+        if best is None:
+            return None, None, None
+
+        fitness, i, _, section = best
+        return section, dims[i], fitness
+
+    def add_cub(self, width, height, depth, rid=None, orientations=None,
+                placement=None):
         """Add cuboid of widthxheightxdepth dimensions.
 
         Arguments:
@@ -215,6 +311,9 @@ class Guillotine(PackingAlgorithm):
             height (int, float): Cuboid height
             depth (int, float): Cuboid depth
             rid: Optional cuboid user id
+            orientations (int): Cuboid orientation mask, None for any
+            placement (Placement): Optional placement() result, the cuboid
+                is placed there without searching if still valid.
 
         Returns:
             Cuboid: Cuboid with placement coordinates
@@ -222,62 +321,118 @@ class Guillotine(PackingAlgorithm):
         """
         assert(width > 0 and height > 0 and depth > 0)
 
-        # Obtain the best section to place the cuboid.
-        section, rotated = self._select_fittest_section(width, height, depth)
-        if not section:
-            return None
+        # Obtain the best section to place the cuboid, and the orientation
+        position = self._placed_position(
+            placement, width, height, depth, orientations)
+        if position is not None:
+            section, dims = position
+        else:
+            section, dims, _ = self._select_fittest_section(
+                width, height, depth, orientations)
+            if not section:
+                return None
 
-        if rotated:
-            # This should be changed, I'm just supposing that item should be
-            # oriented upward all the time.
-            # See : pack_algo.py:49
-            width, height = height, width
+        width, height, depth = dims
 
         # Remove section, split and store results
-        self._sections.remove(section)
+        self._remove_section(section)
         self._split(section, width, height, depth)
 
         # Store Cuboid in the selected position
         cub = Cuboid(
             section.x, section.y, section.z, width, height, depth, rid)
-        self.cuboids.append(cub)
+        self._store_cub(cub)
         return cub
 
-    def fitness(self, width, height, depth):
+    def placement(self, width, height, depth, orientations=None):
         """Gets best fitness
 
-        In guillotine algorithm case, returns the min of the fitness of all
-        free sections, for the given dimension, both normal and rotated
-        (if rotation enabled.)
+        In guillotine algorithm case, the fitness is the min of the fitness
+        of all free sections, for the given dimension, in every orientation
+        allowed.
+
+        Returns:
+            Placement: Fitness with the section and orientation selected
+            None: Cuboid can't be placed
         """
-        assert(width > 0 and height > 0, depth > 0)
+        assert(width > 0 and height > 0 and depth > 0)
 
-        # Get best fitness section.
-        section, rotated = self._select_fittest_section(width, height, depth)
+        # Get best fitness section, with the fitness of the placed dimensions
+        section, dims, fitness = self._select_fittest_section(
+            width, height, depth, orientations)
         if not section:
             return None
 
-        # Return fitness of returned section, with correct dimmensions if the
-        # the cuboid was rotated.
-        if rotated:
-            return self._section_fitness(section, height, width, depth)
-        else:
-            return self._section_fitness(section, width, height, depth)
+        return self._placement(
+            width, height, depth, orientations, fitness, (section, dims))
+
+    def _reset_sections(self):
+        """Empty the free section list and its indexes"""
+        # Key -> section, keys follow the order sections were added in, so
+        # removing a section is a dict deletion. Sections are found by
+        # identity in the id -> key side table, equal cuboids may be
+        # different sections. Each face key maps to the sections with that
+        # face, by key.
+        self._sections = {}
+        self._section_keys = {}
+        self._faces = {}
+        self._section_seq = itertools.count()
+        self._fit_index = DominanceIndex()
 
     def reset(self):
         super(Guillotine, self).reset()
-        self._sections = []
+        self._reset_sections()
         self._add_section(Cuboid(0, 0, 0, self.width, self.height, self.depth))
 
 
 class GuillotineBvf(Guillotine):
-    """Implements Best Volume Fit (BVF) section selection criteria"""
+    """Implements Best Volume Fit (BVF) section selection criteria
+
+    The fittest section is the smallest one holding the cuboid, the free
+    sections are indexed by volume and walked up from the cuboid volume
+    until the first one fitting.
+    """
     def _section_fitness(self, section, width, height, depth):
         if width > section.width or height > section.height or \
                 depth > section.depth:
             return None
         return section.volume() - width * height * depth
 
+    def _select_fittest_section(self, w, h, d, orientations=None):
+        """Select the smallest section holding the cuboid
+
+        Same result as Guillotine._select_fittest_section, the sections with
+        the volume of the first one fitting are all checked to prefer the
+        orientation first in ORIENTATIONS and then the oldest section.
+        """
+        dims = self._orientations(w, h, d, orientations)
+        if not dims:
+            return None, None, None
+
+        min_w, min_h, min_d = map(min, zip(*dims))
+        candidates = self._fit_index.ascending(w * h * d, min_w, min_h, min_d)
+
+        best = None
+        for volume, key, s in candidates:
+            if best is not None and volume > best[0]:
+                break
+            self._touch_free_space(key)
+            for i, (cw, ch, cd) in enumerate(dims):
+                if cw <= s.width and ch <= s.height and cd <= s.depth:
+                    if best is None or (i, key) < best[1:3]:
+                        best = (volume, i, key, s)
+                    break
+
+        if best is None:
+            return None, None, None
+
+        _, i, _, section = best
+        return section, dims[i], self._section_fitness(section, *dims[i])
+
+    def _reset_sections(self):
+        super(GuillotineBvf, self)._reset_sections()
+        self._fit_index = VolumeIndex()
+
 
 class GuillotineBlsf(Guillotine):
     """Implements Best Long Side Fit (BLSF) section selection criteria"""
@@ -344,9 +499,9 @@ class GuillotineMaxas(Guillotine):
     def _split(self, section, width, height, depth):
         if width * ((section.height - height) + (section.depth - depth)) <= \
                 height * ((section.width - width) + (section.depth - depth)):
-            return self._split_horizontal(section, width, height)
+            return self._split_horizontal(section, width, height, depth)
         else:
-            return self._split_vertical(section, width, height)
+            return self._split_vertical(section, width, height, depth)
 
 
 class GuillotineMinas(Guillotine):
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+
+from cubspack.geometry import _column_dtype
+from cubspack.geometry import _exact_dtype
+from cubspack.guillotine import Guillotine
+from cubspack.guillotine import GuillotineBlsf
+from cubspack.guillotine import GuillotineBssf
+from cubspack.guillotine import GuillotineBvf
+from cubspack.guillotine import GuillotineLas
+from cubspack.guillotine import GuillotineLlas
+from cubspack.guillotine import GuillotineMaxas
+from cubspack.guillotine import GuillotineMinas
+from cubspack.guillotine import GuillotineSas
+from cubspack.guillotine import GuillotineSlas
+import numpy as np
+
+
+class SectionArray(object):
+    """Free sections stored as the rows of a NumPy bounds array
+
+    Rows are (left, bottom, outeye, right, top, ineye) in a Fortran ordered
+    array grown by doubling, the rows of removed sections are reused. It
+    has the DominanceIndex interface, the array views are read by
+    GuillotineVec to score every section at once.
+
+    Items are stored under an integer key chosen by the caller.
+    """
+
+    def __init__(self, capacity=64):
+        self._bounds = np.zeros((capacity, 6), dtype=np.int64, order='F')
+        self._keys = np.zeros(capacity, dtype=np.int64)
+        self._live = np.zeros(capacity, dtype=bool)
+        # Rows used so far, free rows below it and key -> (row, cuboid)
+        self._size = 0
+        self._free_rows = []
+        self._items = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def _grow(self):
+        """Double the array capacity"""
+        capacity = 2 * len(self._keys)
+        bounds = np.zeros((capacity, 6), dtype=self._bounds.dtype, order='F')
+        bounds[:self._size] = self._bounds[:self._size]
+        self._bounds = bounds
+        self._keys = np.resize(self._keys, capacity)
+        live = np.zeros(capacity, dtype=bool)
+        live[:self._size] = self._live[:self._size]
+        self._live = live
+
+    def insert(self, key, cub):
+        """Add a cuboid to the index
+
+        Arguments:
+            key (int): Item key
+            cub (Cuboid): Item cuboid
+        """
+        if key in self._items:
+            self.remove(key)
+
+        values = (cub.left, cub.bottom, cub.outeye, cub.right, cub.top,
+                  cub.ineye)
+        dtype = _column_dtype(values, self._bounds.dtype)
+        if dtype != self._bounds.dtype:
+            self._bounds = self._bounds.astype(dtype, order='F')
+
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            if self._size == len(self._keys):
+                self._grow()
+            row = self._size
+            self._size += 1
+
+        self._bounds[row] = values
+        self._keys[row] = key
+        self._live[row] = True
+        self._items[key] = (row, cub)
+
+    def remove(self, key):
+        """Remove a cuboid from the index
+
+        Arguments:
+            key (int): Item key
+        """
+        row, _ = self._items.pop(key)
+        self._live[row] = False
+        self._free_rows.append(row)
+
+    def get(self, key):
+        """Cuboid stored under key"""
+        return self._items[key][1]
+
+    def arrays(self):
+        """Views of the rows used
+
+        Returns:
+            (bounds, keys, live)
+            bounds (numpy.ndarray): (n, 6) section bounds
+            keys (numpy.ndarray): (n,) section keys
+            live (numpy.ndarray): (n,) mask of the rows holding a section
+        """
+        n = self._size
+        return self._bounds[:n], self._keys[:n], self._live[:n]
+
+    def feasible(self, width, height, depth):
+        """Cuboids big enough to hold a width x height x depth cuboid
+
+        Returns:
+            generator: (key, cuboid) tuples
+        """
+        bounds, keys, live = self.arrays()
+        fits = np.asarray(
+            live & (bounds[:, 3] - bounds[:, 0] >= width) &
+            (bounds[:, 4] - bounds[:, 1] >= height) &
+            (bounds[:, 5] - bounds[:, 2] >= depth), dtype=bool)
+        for key in keys[fits].tolist():
+            yield key, self._items[key][1]
+
+
+class GuillotineVec(Guillotine):
+    """Guillotine with the free sections indexed in a NumPy array
+
+    The sections usable for a placement are the rows of a SectionArray,
+    and a placement scores every section for every orientation allowed in
+    a single array pass. The section list, face index, merge and the split
+    rules are the ones of cubspack.guillotine, a placement only splits a
+    single section.
+
+    The whole array is scored, so a fitness of 0 doesn't stop the search
+    and ties are always resolved preferring the orientation first in
+    ORIENTATIONS and then the oldest section.
+    """
+
+    def _sections_fitness(self, sizes, width, height, depth):
+        """Get fitness values
+
+        Arguments:
+            sizes (numpy.ndarray): (n, 3) width, height and depth of the
+                sections, all of them big enough for the cuboid.
+            width (numpy.ndarray): (n,) cuboid widths, one per section
+            height (numpy.ndarray): Cuboid heights
+            depth (numpy.ndarray): Cuboid depths
+
+        Returns:
+            numpy.ndarray: (n,) fitness values
+        """
+        raise NotImplementedError
+
+    def _select_fittest_section(self, w, h, d, orientations=None):
+        """Select the fittest section
+
+        See Guillotine._select_fittest_section
+
+        Returns:
+            (section, dims, fitness): Returns the tuple
+                section (Cuboid): Section with best fitness
+                dims (tuple): Placed cuboid width, height and depth
+                fitness (int, float): Fitness of the section
+        """
+        dims = self._orientations(w, h, d, orientations)
+        if not dims:
+            return None, None, None
+
+        bounds, keys, live = self._fit_index.arrays()
+        # Promoted when needed to store the cuboid dimensions
+        dtype = _column_dtype((w, h, d), bounds.dtype)
+        sizes = (bounds[:, 3:] - bounds[:, :3]).astype(dtype, copy=False)
+        placed = np.array(dims, dtype=dtype)
+
+        # feasible[i, j] is True when orientation i fits in row j
+        feasible = np.asarray(
+            live & (sizes[:, 0] >= placed[:, 0:1]) &
+            (sizes[:, 1] >= placed[:, 1:2]) &
+            (sizes[:, 2] >= placed[:, 2:3]), dtype=bool)
+        pairs = np.flatnonzero(feasible)
+        if not len(pairs):
+            return None, None, None
+
+        if self._max_free is not None:
+            for key in keys[feasible.any(axis=0)].tolist():
+                self._touch_free_space(key)
+
+        orientation, rows = np.divmod(pairs, len(bounds))
+        placed = placed[orientation]
+        fitness = self._sections_fitness(
+            sizes[rows], placed[:, 0], placed[:, 1], placed[:, 2])
+
+        # Pairs are in orientation order, the ties of the first orientation
+        # come first and the oldest section among them has the lowest key.
+        ties = np.flatnonzero(fitness == fitness.min())
+        ties = ties[orientation[ties] == orientation[ties[0]]]
+        best = ties[np.argmin(keys[rows[ties]])]
+
+        key = keys[rows[best]].tolist()
+        return (self._fit_index.get(key), dims[orientation[best]],
+                fitness[best:best+1].tolist()[0])
+
+    def _reset_sections(self):
+        super(GuillotineVec, self)._reset_sections()
+        self._fit_index = SectionArray()
+
+
+class GuillotineVecBvf(GuillotineVec, GuillotineBvf):
+    """Best Volume Fit, the smallest section holding the cuboid"""
+    def _sections_fitness(self, sizes, width, height, depth):
+        # Python integers when the volumes can be out of the int64 range
+        dtype = _exact_dtype(sizes.T, lambda w, h, d: w * h * d)
+        placed = (width.astype(dtype, copy=False) *
+                  height.astype(dtype, copy=False) *
+                  depth.astype(dtype, copy=False))
+        return sizes.astype(dtype, copy=False).prod(axis=1) - placed
+
+
+class GuillotineVecBlsf(GuillotineVec, GuillotineBlsf):
+    """Best Long Side Fit, minimize the long leftover side"""
+    def _sections_fitness(self, sizes, width, height, depth):
+        return np.maximum(np.maximum(sizes[:, 0] - width,
+                                     sizes[:, 1] - height),
+                          sizes[:, 2] - depth)
+
+
+class GuillotineVecBssf(GuillotineVec, GuillotineBssf):
+    """Best Short Side Fit, minimize the short leftover side"""
+    def _sections_fitness(self, sizes, width, height, depth):
+        return np.minimum(np.minimum(sizes[:, 0] - width,
+                                     sizes[:, 1] - height),
+                          sizes[:, 2] - depth)
+
+
+class GuillotineVecBssfSas(GuillotineVecBssf, GuillotineSas):
+    pass
+
+
+class GuillotineVecBssfLas(GuillotineVecBssf, GuillotineLas):
+    pass
+
+
+class GuillotineVecBssfSlas(GuillotineVecBssf, GuillotineSlas):
+    pass
+
+
+class GuillotineVecBssfLlas(GuillotineVecBssf, GuillotineLlas):
+    pass
+
+
+class GuillotineVecBssfMaxas(GuillotineVecBssf, GuillotineMaxas):
+    pass
+
+
+class GuillotineVecBssfMinas(GuillotineVecBssf, GuillotineMinas):
+    pass
+
+
+class GuillotineVecBlsfSas(GuillotineVecBlsf, GuillotineSas):
+    pass
+
+
+class GuillotineVecBlsfLas(GuillotineVecBlsf, GuillotineLas):
+    pass
+
+
+class GuillotineVecBlsfSlas(GuillotineVecBlsf, GuillotineSlas):
+    pass
+
+
+class GuillotineVecBlsfLlas(GuillotineVecBlsf, GuillotineLlas):
+    pass
+
+
+class GuillotineVecBlsfMaxas(GuillotineVecBlsf, GuillotineMaxas):
+    pass
+
+
+class GuillotineVecBlsfMinas(GuillotineVecBlsf, GuillotineMinas):
+    pass
+
+
+class GuillotineVecBvfSas(GuillotineVecBvf, GuillotineSas):
+    pass
+
+
+class GuillotineVecBvfLas(GuillotineVecBvf, GuillotineLas):
+    pass
+
+
+class GuillotineVecBvfSlas(GuillotineVecBvf, GuillotineSlas):
+    pass
+
+
+class GuillotineVecBvfLlas(GuillotineVecBvf, GuillotineLlas):
+    pass
+
+
+class GuillotineVecBvfMaxas(GuillotineVecBvf, GuillotineMaxas):
+    pass
+
+
+class GuillotineVecBvfMinas(GuillotineVecBvf, GuillotineMinas):
+    pass
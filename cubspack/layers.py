@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+from cubspack.geometry import Cuboid
+from cubspack.maxcubs import MaxCubs
+from cubspack.maxcubs import MaxCubsBaf
+from cubspack.maxcubs import MaxCubsBl
+from cubspack.maxcubs import MaxCubsBlsf
+from cubspack.maxcubs import MaxCubsBssf
+
+
+class Layer(object):
+    """Layer of cuboids sharing their height, filled in rows along x
+
+    Only the current row is taken from the free space, the next one is
+    placed against it along z while the layer area, up to limit, is still
+    free.
+    """
+
+    def __init__(self, row, limit):
+        """Arguments:
+
+            row (Cuboid): Current row, its height is the layer thickness
+            limit (int, float): End of the layer area along z
+        """
+        self.row = row
+        self.limit = limit
+        # Start of the row space still free
+        self.cursor = row.x
+
+    def tail(self):
+        """Free space left at the end of the current row"""
+        row = self.row
+        return Cuboid(self.cursor, row.y, row.z, row.right - self.cursor,
+                      row.height, row.depth)
+
+    def fits(self, width, height, depth):
+        """Does a cuboid fit at the row cursor"""
+        row = self.row
+        return self.cursor + width <= row.right and height <= row.height \
+            and depth <= row.depth
+
+    def next_row(self, depth):
+        """Row placed after the current one, None when past the limit"""
+        row = self.row
+        if row.ineye + depth > self.limit:
+            return None
+        return Cuboid(row.x, row.y, row.ineye, row.width, row.height, depth)
+
+
+class Layers(MaxCubs):
+    """Layer building, for loads of many identical or similar cuboids
+
+    Cuboids are grouped in layers by their height, one layer open for each
+    height. A layer is started where the maximal cuboid search places its
+    first cuboid, and spans the maximal cuboid selected. It is filled in
+    rows: a whole row is taken from the free space with a single split,
+    and the cuboids following go at the row cursor without any search. The
+    maximal cuboid search is only used to start a layer, and for the
+    cuboids no layer of their height can take.
+
+    When a row, or the layer, is closed the space left at its end is given
+    back as a free cuboid, not merged with its neighbours. The rows still
+    open take cuboids of any height as a last resort, when there is no
+    free space left for them.
+    """
+
+    def _layer_position(self, dims):
+        """Position in the layers as thick as the cuboid
+
+        Arguments:
+            dims (list): Cuboid orientations allowed, see _orientations
+
+        Returns:
+            (cub, space)
+            cub (Cuboid): Placed Cuboid or None if was unable.
+            space (Cuboid): Layer free space were cub was placed
+        """
+        # In the current row
+        for w, h, d in dims:
+            layer = self._layers.get(h)
+            if layer is not None and layer.fits(w, h, d) and \
+                    d == layer.row.depth:
+                row = layer.row
+                return (Cuboid(layer.cursor, row.y, row.z, w, h, d),
+                        layer.tail())
+
+        # In a new row, if nothing was placed in the layer area since
+        for w, h, d in dims:
+            layer = self._layers.get(h)
+            if layer is None or w > layer.row.width:
+                continue
+            row = layer.next_row(d)
+            if row is not None and self._max_index.containing(row):
+                space = Cuboid(row.x, row.y, row.z, row.width, row.height,
+                               layer.limit - row.z)
+                return Cuboid(row.x, row.y, row.z, w, h, d), space
+
+        return None, None
+
+    def _row_position(self, dims):
+        """Best position at the cursor of any open row"""
+        fit = ((self._cub_fitness(layer.tail(), w, h, d), i, thickness,
+                w, h, d)
+               for thickness, layer in self._layers.items()
+               for i, (w, h, d) in enumerate(dims)
+               if layer.fits(w, h, d))
+
+        try:
+            _, _, thickness, w, h, d = min(fit)
+        except ValueError:
+            return None, None
+
+        layer = self._layers[thickness]
+        row = layer.row
+        return (Cuboid(layer.cursor, row.y, row.z, w, h, d), layer.tail())
+
+    def _select_position(self, w, h, d, orientations=None):
+        """Find the position for placing a cuboid(w*h*d)
+
+        The rows open come first, then a new row in a layer, the maximal
+        cuboids, and at last the end of the rows of other layers.
+
+        Arguments:
+            w (int, float): Cuboid width
+            h (int, float): Cuboid height
+            d (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
+
+        Returns:
+            (cub, space)
+            cub (Cuboid): Placed Cuboid or None if was unable.
+            space (Cuboid): Free space were cub was placed
+        """
+        dims = self._orientations(w, h, d, orientations)
+        if not dims:
+            return None, None
+
+        cub, space = self._layer_position(dims)
+        if cub is None:
+            cub, space = super(Layers, self)._select_position(
+                w, h, d, orientations)
+        if cub is None:
+            cub, space = self._row_position(dims)
+        return cub, space
+
+    def _take(self, space):
+        """Remove space from the maximal cuboids"""
+        new_keys = self._split(space)
+        self._remove_duplicates(new_keys, space)
+
+    def _close_row(self, layer):
+        """Give back the free space at the end of the layer row"""
+        tail = layer.tail()
+        if tail.width > 0 and self._useful_space(tail):
+            self._add_max_cub(tail)
+
+    def _open_layer(self, cub):
+        """Start a layer with cub, placed by the maximal cuboid search"""
+        # The maximal cuboid selected has its origin at cub
+        keys = [k for k in self._max_index.containing(cub)
+                if self._max_cubs[k].corner_bot_l == cub.corner_bot_l]
+        if keys:
+            m = self._max_cubs[min(keys)]
+            row = Cuboid(cub.x, cub.y, cub.z, m.right - cub.x, cub.height,
+                         cub.depth)
+            limit = m.ineye
+        else:
+            row = Cuboid(cub.x, cub.y, cub.z, cub.width, cub.height,
+                         cub.depth)
+            limit = cub.ineye
+
+        if cub.height in self._layers:
+            self._close_row(self._layers[cub.height])
+        self._take(row)
+        self._layers[cub.height] = Layer(row, limit)
+
+    def _place(self, cub):
+        """Update the layers and free space for a cuboid placed"""
+        for layer in self._layers.values():
+            row = layer.row
+            if cub.y != row.y:
+                continue
+            if cub.x == layer.cursor and cub.z == row.z and \
+                    layer.fits(cub.width, cub.height, cub.depth):
+                layer.cursor = cub.right
+                return
+            if cub.x == row.x and cub.z == row.ineye and \
+                    cub.height == row.height and cub.width <= row.width:
+                next_row = layer.next_row(cub.depth)
+                if next_row is None or \
+                        not self._max_index.containing(next_row):
+                    continue
+                self._close_row(layer)
+                layer.row = next_row
+                layer.cursor = cub.right
+                self._take(next_row)
+                return
+
+        self._open_layer(cub)
+        self._layers[cub.height].cursor = cub.right
+
+    def add_cub(self, width, height, depth, rid=None, orientations=None,
+                placement=None):
+        """Add cuboid of widthxheightxdepth dimensions.
+
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            rid: Optional cuboid user id
+            orientations (int): Cuboid orientation mask, None for any
+            placement (Placement): Optional placement() result, the cuboid
+                is placed there without searching if still valid.
+
+        Returns:
+            Cuboid: Cuboid with placement coordinates
+            None: If the cuboid couldn't be placed.
+        """
+        assert(width > 0 and height > 0 and depth > 0)
+
+        # Search best position and orientation
+        position = self._placed_position(
+            placement, width, height, depth, orientations)
+        if position is not None:
+            cub = Cuboid(*position)
+        else:
+            cub, _ = self._select_position(
+                width, height, depth, orientations)
+            if not cub:
+                return None
+
+        self._place(cub)
+
+        # Store and return cuboid position.
+        cub.rid = rid
+        self._store_cub(cub)
+        return cub
+
+    def reset(self):
+        super(Layers, self).reset()
+        # Open layer for each thickness
+        self._layers = {}
+
+
+class LayersBl(Layers, MaxCubsBl):
+    pass
+
+
+class LayersBssf(Layers, MaxCubsBssf):
+    pass
+
+
+class LayersBaf(Layers, MaxCubsBaf):
+    pass
+
+
+class LayersBlsf(Layers, MaxCubsBlsf):
+    pass
@@ -1,18 +1,30 @@
 # -*- coding: utf-8 -*-
 
-import collections
+from cubspack.geometry import batch_contains
 from cubspack.geometry import Cuboid
+from cubspack.geometry import cuboid_bounds
 from cubspack.pack_algo import PackingAlgorithm
+from cubspack.spatial import DominanceIndex
+from cubspack.spatial import LooseOctree
 import itertools
-import operator
-
-
-first_item = operator.itemgetter(0)
+import numpy as np
 
 
 class MaxCubs(PackingAlgorithm):
 
-    def __init__(self, width, height, depth, rot=True, *args, **kwargs):
+    def __init__(self, width, height, depth, rot=True, debug=False,
+                 *args, **kwargs):
+        """Arguments:
+
+            width (int, float): Packing volume width
+            height (int, float): Packing volume height
+            depth (int, float): Packing volume depth
+            rot (bool, int): Cuboid rotation enabled or disabled, or the
+                mask of the orientations allowed (see ROT_ALL)
+            debug (bool): Check the incremental pruning of maximal cuboids
+                against a full containment pass after each placement
+        """
+        self._debug = debug
         super(MaxCubs, self).__init__(
             width, height, depth, rot, *args, **kwargs)
 
@@ -35,48 +47,60 @@ class MaxCubs(PackingAlgorithm):
         else:
             return None
 
-    def _select_position(self, w, h, d):
+    def _position_fitness(self, max_cub, width, height, depth):
+        """Value minimized to select the position, the fitness by default"""
+        return self._cub_fitness(max_cub, width, height, depth)
+
+    def _select_position(self, w, h, d, orientations=None):
         """Find max_cub with best fitness for placing a cuboid(w*h*d)
 
+        The dominance index is searched once, for the maximal cuboids big
+        enough for the smallest dimensions over all the orientations allowed,
+        and each of them is scored for every orientation fitting inside.
+        Ties are resolved preferring the orientation first in ORIENTATIONS,
+        and then the oldest max_cub.
+
         Arguments:
             w (int, float): Cuboid width
             h (int, float): Cuboid height
             d (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
 
         Returns:
             (cub, max_cub)
             cub (Cuboid): Placed Cuboid or None if was unable.
             max_cub (Cuboid): Maximal cuboid were cub was placed
         """
-        if not self._max_cubs:
+        dims = self._orientations(w, h, d, orientations)
+        if not dims:
             return None, None
 
-        # Normal cuboid
-        fitn = ((self._cub_fitness(m, w, h, d), w, h, d, m) for m in
-                self._max_cubs if self._cub_fitness(m, w, h, d) is not None)
-
-        # Rotated cuboid
-        fitr = ((self._cub_fitness(m, h, w, d), h, w, d, m) for m in
-                self._max_cubs if self._cub_fitness(m, h, w, d) is not None)
+        min_w, min_h, min_d = map(min, zip(*dims))
+        feasible = self._fit_index.feasible(min_w, min_h, min_d)
+        if self._max_free is not None:
+            feasible = list(feasible)
+            for key, _ in feasible:
+                self._touch_free_space(key)
 
-        if not self.rot:
-            fitr = []
-
-        fit = itertools.chain(fitn, fitr)
+        fit = ((self._position_fitness(m, cw, ch, cd), i, key, cw, ch, cd)
+               for key, m in feasible
+               for i, (cw, ch, cd) in enumerate(dims)
+               if cw <= m.width and ch <= m.height and cd <= m.depth)
 
         try:
-            _, w, h, d, m = min(fit, key=first_item)
+            _, _, key, w, h, d = min(fit)
         except ValueError:
             return None, None
 
+        m = self._max_cubs[key]
         return Cuboid(m.x, m.y, m.z, w, h, d), m
 
     def _generate_splits(self, m, c):
         """Get new cuboids splits after cuboid is placed
 
         When a cuboid is placed inside a maximal cuboid, it stops being one
-        and up to 5 new maximal cuboids may appear depending on the
-        placement.
+        and up to 6 new maximal cuboids may appear depending on the
+        placement, one for each side of the cuboid.
         _generate_splits calculates them.
 
         Arguments:
@@ -104,71 +128,166 @@ class MaxCubs(PackingAlgorithm):
             new_cubs.append(Cuboid(
                 m.left, m.bottom, m.outeye,
                 m.width, c.bottom - m.bottom, m.depth))
+        if c.outeye > m.outeye:
+            new_cubs.append(Cuboid(
+                m.left, m.bottom, m.outeye,
+                m.width, m.height, c.outeye - m.outeye))
         if c.ineye < m.ineye:
             new_cubs.append(Cuboid(
-                c.left, c.bottom, c.ineye,
-                c.width, c.height, m.ineye - c.ineye))
+                m.left, m.bottom, c.ineye,
+                m.width, m.height, m.ineye - c.ineye))
 
         return new_cubs
 
+    def _add_max_cub(self, max_cub):
+        """Add a new maximal cuboid
+
+        Arguments:
+            max_cub (Cuboid): Maximal cuboid
+
+        Returns:
+            int: Maximal cuboid key
+        """
+        key = next(self._max_cub_keys)
+        self._max_cubs[key] = max_cub
+        self._max_index.insert(key, max_cub)
+        self._fit_index.insert(key, max_cub)
+        self._touch_free_space(key)
+        return key
+
+    def _remove_max_cub(self, key):
+        """Remove a maximal cuboid
+
+        Arguments:
+            key (int): Maximal cuboid key
+        """
+        del self._max_cubs[key]
+        self._max_index.remove(key)
+        self._fit_index.remove(key)
+        self._last_used.pop(key, None)
+
+    def _free_spaces(self):
+        return self._max_cubs.items()
+
+    def _evict_free_space(self, key, space):
+        self._remove_max_cub(key)
+
     def _split(self, cub):
         """Split all max_cubs intersecting the cuboid cub.
 
+        Only the maximal cuboids returned by the spatial index are visited,
+        they are replaced by their splits. Splits too small for any of the
+        remaining cuboids (see set_min_dims) are discarded.
+
         Arguments:
             cub (Cuboid): Cuboid
 
         Returns:
-            split (Cuboid list): List of cuboids resulting from the split
+            list: Keys of the new maximal cuboids, in creation order
+        """
+        new_keys = []
+        for key in sorted(self._max_index.overlapping(cub)):
+            max_cub = self._max_cubs[key]
+            self._remove_max_cub(key)
+            for split in self._generate_splits(max_cub, cub):
+                if self._useful_space(split):
+                    new_keys.append(self._add_max_cub(split))
+        return new_keys
+
+    def _prune_free_space(self):
+        """Remove the maximal cuboids too small for the remaining cuboids"""
+        for key, max_cub in list(self._max_cubs.items()):
+            if not self._useful_space(max_cub):
+                self._remove_max_cub(key)
+
+    def _contained_max_cubs(self):
+        """Keys of the maximal cuboids contained by another one
+
+        Full pass comparing every pair of maximal cuboids, from a group of
+        equal cuboids only the first one isn't returned.
+        """
+        if len(self._max_cubs) < 2:
+            return []
+
+        # contains[i, j] is True when max_cub i contains max_cub j, the
+        # diagonal is ignored.
+        keys = list(self._max_cubs)
+        bounds = cuboid_bounds(self._max_cubs.values())
+        contains = batch_contains(bounds, bounds)
+        np.fill_diagonal(contains, False)
+        duplicate = np.triu(contains & contains.T)
+        contained = (contains & ~contains.T).any(axis=0) | \
+            duplicate.any(axis=0)
+        return list(itertools.compress(keys, contained.tolist()))
+
+    def _remove_duplicates(self, new_keys, cub):
+        """Remove every maximal cuboid contained by another one.
+
+        Before the split no maximal cuboid contained another, and a split
+        is contained by the maximal cuboid it comes from, so it can't
+        contain any of the survivors. Only the new splits need to be
+        checked, against the cuboids containing them. A split lies against
+        a face of the placed cuboid, so those touch the placed cuboid too,
+        and are searched among the ones returned by the spatial index.
+        Equal cuboids keep the oldest one, as the full pass.
+
+        Arguments:
+            new_keys (list): Keys of the maximal cuboids created by the split
+            cub (Cuboid): Placed cuboid
         """
-        max_cubs = collections.deque()
-
-        for c in self._max_cubs:
-            if c.intersects(cub):
-                max_cubs.extend(self._generate_splits(c, cub))
-            else:
-                max_cubs.append(c)
-
-        # Add newly generated max_cubs
-        self._max_cubs = list(max_cubs)
-
-    def _remove_duplicates(self):
-        """Remove every maximal cuboid contained by another one."""
-        contained = set()
-        for m1, m2 in itertools.combinations(self._max_cubs, 2):
-            if m1.contains(m2):
-                contained.add(m2)
-            elif m2.contains(m1):
-                contained.add(m1)
-
-        # Remove from max_cubs
-        self._max_cubs = [m for m in self._max_cubs if m not in contained]
-
-    def fitness(self, width, height, depth):
+        if self._debug:
+            expected = self._contained_max_cubs()
+
+        near = [(k, self._max_cubs[k])
+                for k in sorted(self._max_index.touching(cub))]
+
+        removed = []
+        for key in new_keys:
+            m = self._max_cubs[key]
+            for other, o in near:
+                if other == key or not o.contains(m):
+                    continue
+                if other > key and m == o:
+                    # Equal to a newer split, that one is removed instead
+                    continue
+                self._remove_max_cub(key)
+                removed.append(key)
+                break
+
+        if self._debug and sorted(removed) != sorted(expected):
+            raise Exception("Incremental pruning differs from the full pass")
+
+    def placement(self, width, height, depth, orientations=None):
         """Is the cuboid well fit ? The anwser here.
 
         Metric used to rate how much space is wasted if a cuboid is placed.
-        Returns a value greater or equal to zero, the smaller the value the
-        more 'fit' is the cuboid. If the cuboid can't be placed, returns None.
+        The fitness is a value greater or equal to zero, the smaller the
+        value the more 'fit' is the cuboid.
 
         Arguments:
             width (int, float): Cuboid width
             height (int, float): Cuboid height
             depth (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
 
         Returns:
-            int, float: Cuboid fitness
+            Placement: Cuboid fitness and position, see add_cub
             None: Cuboid can't be placed
         """
         assert(width > 0 and height > 0 and depth > 0)
 
-        cub, max_cub = self._select_position(width, height, depth)
+        cub, max_cub = self._select_position(
+            width, height, depth, orientations)
         if cub is None:
             return None
 
-        # Return fitness
-        return self._cub_fitness(max_cub, cub.width, cub.height, cub.depth)
+        fitness = self._cub_fitness(max_cub, cub.width, cub.height, cub.depth)
+        return self._placement(
+            width, height, depth, orientations, fitness,
+            (cub.x, cub.y, cub.z, cub.width, cub.height, cub.depth))
 
-    def add_cub(self, width, height, depth, rid=None):
+    def add_cub(self, width, height, depth, rid=None, orientations=None,
+                placement=None):
         """Add cuboid of widthxheightxdepth dimensions.
 
         Arguments:
@@ -176,6 +295,9 @@ class MaxCubs(PackingAlgorithm):
             height (int, float): Cuboid height
             depth (int, float): Cuboid depth
             rid: Optional cuboid user id
+            orientations (int): Cuboid orientation mask, None for any
+            placement (Placement): Optional placement() result, the cuboid
+                is placed there without searching if still valid.
 
         Returns:
             Cuboid: Cuboid with placement coordinates
@@ -184,57 +306,54 @@ class MaxCubs(PackingAlgorithm):
         assert(width > 0 and height > 0 and depth > 0)
 
         # Search best position and orientation
-        cub, _ = self._select_position(width, height, depth)
-        if not cub:
-            return None
+        position = self._placed_position(
+            placement, width, height, depth, orientations)
+        if position is not None:
+            cub = Cuboid(*position)
+        else:
+            cub, _ = self._select_position(
+                width, height, depth, orientations)
+            if not cub:
+                return None
 
         # Subdivide all the max cuboids intersecting with the selected
         # cuboid.
-        self._split(cub)
+        new_keys = self._split(cub)
 
         # Remove any max_cub contained by another
-        self._remove_duplicates()
+        self._remove_duplicates(new_keys, cub)
 
         # Store and return cuboid position.
         cub.rid = rid
-        self.cuboids.append(cub)
+        self._store_cub(cub)
         return cub
 
     def reset(self):
         super(MaxCubs, self).reset()
-        self._max_cubs = [Cuboid(0, 0, 0, self.width, self.height, self.depth)]
+        # Maximal cuboids by key, in creation order, their spatial index
+        # and the index by dimensions used to find where a cuboid fits.
+        self._max_cubs = {}
+        self._max_index = LooseOctree(self.width, self.height, self.depth)
+        self._fit_index = DominanceIndex()
+        self._max_cub_keys = itertools.count()
+        self._add_max_cub(
+            Cuboid(0, 0, 0, self.width, self.height, self.depth))
 
 
 class MaxCubsBl(MaxCubs):
+    """Bottom Left, select the position where the top of the cuboid is lower
 
-    def _select_position(self, w, h, d):
-        """Find lowest position
-
-        Select the position where the y coordinate of the top of the cuboid
-        is lower, if there are severtal pick the one with the smallest x
-        coordinate
-        """
-        fitn = ((m.y + h, m.x, m.z, w, h, d, m) for m in self._max_cubs
-                if self._cub_fitness(m, w, h, d) is not None)
-        fitr = ((m.y + w, m.x, m.z, h, w, d, m) for m in self._max_cubs
-                if self._cub_fitness(m, h, w, d) is not None)
-
-        if not self.rot:
-            fitr = []
-
-        fit = itertools.chain(fitn, fitr)
-
-        try:
-            _, _, _, w, h, d, m = min(fit, key=first_item)
-        except ValueError:
-            return None, None
-
-        return Cuboid(m.x, m.y, m.z, w, h, d), m
+    If there are several pick the orientation first in ORIENTATIONS and then
+    the oldest max_cub. Only the selection changes, the reported fitness is
+    the one of MaxCubs.
+    """
+    def _position_fitness(self, max_cub, width, height, depth):
+        return max_cub.y + height
 
 
 class MaxCubsBssf(MaxCubs):
     """Best Sort Side Fit minimize short leftover side"""
-    def _rect_fitness(self, max_cub, width, height, depth):
+    def _cub_fitness(self, max_cub, width, height, depth):
         if width > max_cub.width or height > max_cub.height or \
                 depth > max_cub.depth:
             return None
@@ -249,7 +368,7 @@ class MaxCubsBaf(MaxCubs):
     Best Area Fit pick maximal cuboid with smallest area
     where the cuboid can be placed
     """
-    def _rect_fitness(self, max_cub, width, height, depth):
+    def _cub_fitness(self, max_cub, width, height, depth):
         if width > max_cub.width or height > max_cub.height or \
                 depth > max_cub.depth:
             return None
@@ -260,7 +379,7 @@ class MaxCubsBaf(MaxCubs):
 
 class MaxCubsBlsf(MaxCubs):
     """Best Long Side Fit minimize long leftover side"""
-    def _rect_fitness(self, max_cub, width, height, depth):
+    def _cub_fitness(self, max_cub, width, height, depth):
         if width > max_cub.width or height > max_cub.height or \
                 depth > max_cub.depth:
             return None
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+
+from cubspack.geometry import _column_dtype
+from cubspack.geometry import _exact_dtype
+from cubspack.geometry import batch_contains
+from cubspack.geometry import batch_intersects
+from cubspack.geometry import Cuboid
+from cubspack.pack_algo import PackingAlgorithm
+import numpy as np
+
+
+def _select_rows(bounds, mask):
+    """Rows of a Fortran ordered bounds array selected by mask, keeping the
+    column major layout
+    """
+    return bounds.T.compress(mask, axis=1).T
+
+
+def _stack_rows(*bounds):
+    """Concatenate bounds arrays into a Fortran ordered one"""
+    return np.concatenate([b.T for b in bounds], axis=1).T
+
+
+class MaxCubsVec(PackingAlgorithm):
+    """MaxCubs with the maximal cuboids stored in a NumPy array
+
+    The maximal cuboids are the rows of an (n, 6) bounds array (left, bottom,
+    outeye, right, top, ineye) kept in creation order, and every step of a
+    placement is an array operation: feasibility filtering and fitness
+    scoring for all the orientations at once, splitting the maximal
+    cuboids hit by the cuboid into up to six children each, and pruning
+    the children contained by another maximal cuboid. The array is Fortran
+    ordered, so the columns the batch kernels work on are contiguous.
+
+    Ties are resolved as in cubspack.maxcubs (orientation first in
+    ORIENTATIONS, then the oldest maximal cuboid), so the placements are the
+    same.
+    """
+
+    def __init__(self, width, height, depth, rot=True, *args, **kwargs):
+        super(MaxCubsVec, self).__init__(
+            width, height, depth, rot, *args, **kwargs)
+
+    def _cub_fitness(self, bounds, sizes, width, height, depth):
+        """Get fitness values
+
+        Arguments:
+            bounds (numpy.ndarray): (n, 6) bounds of the destination max_cubs,
+                all of them big enough for the cuboid.
+            sizes (numpy.ndarray): (n, 3) width, height and depth of those
+                max_cubs
+            width (int, float, numpy.ndarray): Cuboid width, or (n,) widths
+                one per max_cub
+            height (int, float, numpy.ndarray): Cuboid height(s)
+            depth (int, float, numpy.ndarray): Cuboid depth(s)
+
+        Returns:
+            numpy.ndarray: (n,) fitness values
+        """
+        return np.zeros(len(bounds), dtype=sizes.dtype)
+
+    def _position_fitness(self, bounds, sizes, width, height, depth):
+        """Values minimized to select the position, the fitness by default"""
+        return self._cub_fitness(bounds, sizes, width, height, depth)
+
+    def _select_position(self, w, h, d, orientations=None):
+        """Find max_cub with best fitness for placing a cuboid(w*h*d)
+
+        Every orientation allowed is tested against every max_cub in a
+        single (orientations, max_cubs) feasibility pass, and the feasible
+        pairs are scored together. The first minimum in that order is
+        selected, the same tie resolution as MaxCubs.
+
+        Arguments:
+            w (int, float): Cuboid width
+            h (int, float): Cuboid height
+            d (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
+
+        Returns:
+            (row, dims)
+            row (int): Row of the selected max_cub or None if was unable.
+            dims (tuple): Placed cuboid width, height and depth
+        """
+        dims = self._orientations(w, h, d, orientations)
+        if not dims:
+            return None, None
+
+        bounds = self._max_cubs
+        sizes = bounds[:, 3:] - bounds[:, :3]
+        widths, heights, depths = sizes.T
+        placed = np.array(dims, dtype=bounds.dtype)
+
+        # feasible[i, j] is True when orientation i fits in max_cub j
+        feasible = np.asarray(
+            (widths >= placed[:, 0:1]) & (heights >= placed[:, 1:2]) &
+            (depths >= placed[:, 2:3]), dtype=bool)
+        pairs = np.flatnonzero(feasible)
+        if not len(pairs):
+            return None, None
+
+        orientation, rows = np.divmod(pairs, len(bounds))
+        placed = placed[orientation]
+        fitness = self._position_fitness(
+            bounds[rows], sizes[rows], placed[:, 0], placed[:, 1],
+            placed[:, 2])
+        i = np.argmin(fitness)
+        return rows[i], dims[orientation[i]]
+
+    def _split(self, cub):
+        """Split all max_cubs intersecting the cuboid cub
+
+        Every maximal cuboid hit is replaced by the parts of it left at each
+        side of cub, children are appended after the survivors in the same
+        order cubspack.maxcubs creates them. Children too small for the
+        remaining cuboids or contained by another maximal cuboid are
+        removed.
+
+        Arguments:
+            cub (Cuboid): Cuboid
+        """
+        bounds = self._max_cubs
+        c = np.array(
+            (cub.left, cub.bottom, cub.outeye, cub.right, cub.top, cub.ineye),
+            dtype=bounds.dtype)
+
+        hit = batch_intersects(c, bounds)
+        parents = bounds[hit]
+        survivors = _select_rows(bounds, ~hit)
+
+        # Left, right, top, bottom, outeye and ineye children, each one
+        # is its parent with a single face moved to the facing side of cub.
+        children = np.repeat(parents[:, np.newaxis, :], 6, axis=1)
+        children[:, 0, 3] = c[0]
+        children[:, 1, 0] = c[3]
+        children[:, 2, 1] = c[4]
+        children[:, 3, 4] = c[1]
+        children[:, 4, 5] = c[2]
+        children[:, 5, 2] = c[5]
+        valid = np.stack(
+            (parents[:, 0] < c[0], parents[:, 3] > c[3],
+             parents[:, 4] > c[4], parents[:, 1] < c[1],
+             parents[:, 2] < c[2], parents[:, 5] > c[5]), axis=1)
+        children = children[np.asarray(valid, dtype=bool)]
+        children = children[self._useful_rows(children)]
+
+        self._max_cubs = _stack_rows(survivors, children)
+        self._remove_duplicates(len(survivors), c)
+
+    def _remove_duplicates(self, first_new, c):
+        """Remove every new maximal cuboid contained by another one
+
+        Survivors never contain each other and can't be contained by a
+        child, so only the rows from first_new on are tested, against the
+        other children and the survivors touching the placed cuboid (see
+        MaxCubs._remove_duplicates). From a group of equal cuboids the
+        first one is kept.
+
+        Arguments:
+            first_new (int): Row of the first new maximal cuboid
+            c (numpy.ndarray): Placed cuboid bounds
+        """
+        bounds = self._max_cubs
+        new = bounds[first_new:]
+        if not len(new):
+            return
+
+        survivors = bounds[:first_new]
+        near = _select_rows(
+            survivors, batch_intersects(c, survivors, edges=True))
+        contained = batch_contains(near, new).any(axis=0)
+
+        # contains[i, j] is True when child i contains child j, when they
+        # are equal only the first one counts.
+        contains = batch_contains(new, new)
+        np.fill_diagonal(contains, False)
+        contains &= ~np.tril(contains.T)
+        contained |= contains.any(axis=0)
+
+        if contained.any():
+            keep = np.ones(len(bounds), dtype=bool)
+            keep[first_new:] = ~contained
+            self._max_cubs = _select_rows(bounds, keep)
+
+    def _useful_rows(self, bounds):
+        """Mask of the rows big enough for some remaining cuboid"""
+        width, height, depth = self._min_dims
+        return np.asarray(
+            (bounds[:, 3] - bounds[:, 0] >= width) &
+            (bounds[:, 4] - bounds[:, 1] >= height) &
+            (bounds[:, 5] - bounds[:, 2] >= depth), dtype=bool)
+
+    def _prune_free_space(self):
+        """Remove the maximal cuboids too small for the remaining cuboids"""
+        self._max_cubs = _select_rows(
+            self._max_cubs, self._useful_rows(self._max_cubs))
+
+    def _promote(self, values):
+        """Promote the max_cubs array dtype when needed to store values"""
+        dtype = _column_dtype(values, self._max_cubs.dtype)
+        if dtype != self._max_cubs.dtype:
+            self._max_cubs = self._max_cubs.astype(dtype, order='F')
+
+    def placement(self, width, height, depth, orientations=None):
+        """Is the cuboid well fit ? The anwser here.
+
+        See MaxCubs.placement
+
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
+
+        Returns:
+            Placement: Cuboid fitness and position, see add_cub
+            None: Cuboid can't be placed
+        """
+        assert(width > 0 and height > 0 and depth > 0)
+
+        self._promote((width, height, depth))
+        row, dims = self._select_position(width, height, depth, orientations)
+        if row is None:
+            return None
+
+        bounds = self._max_cubs[row:row+1]
+        fitness = self._cub_fitness(
+            bounds, bounds[:, 3:] - bounds[:, :3], *dims)
+        return self._placement(
+            width, height, depth, orientations, fitness.tolist()[0],
+            (row, dims))
+
+    def add_cub(self, width, height, depth, rid=None, orientations=None,
+                placement=None):
+        """Add cuboid of widthxheightxdepth dimensions.
+
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            rid: Optional cuboid user id
+            orientations (int): Cuboid orientation mask, None for any
+            placement (Placement): Optional placement() result, the cuboid
+                is placed there without searching if still valid.
+
+        Returns:
+            Cuboid: Cuboid with placement coordinates
+            None: If the cuboid couldn't be placed.
+        """
+        assert(width > 0 and height > 0 and depth > 0)
+
+        self._promote((width, height, depth))
+        position = self._placed_position(
+            placement, width, height, depth, orientations)
+        if position is not None:
+            row, dims = position
+        else:
+            row, dims = self._select_position(
+                width, height, depth, orientations)
+            if row is None:
+                return None
+
+        x, y, z = self._max_cubs[row, :3].tolist()
+        cub = Cuboid(x, y, z, *dims)
+
+        # Subdivide all the max cuboids intersecting with the selected
+        # cuboid, and remove the new ones contained by another.
+        self._split(cub)
+
+        # Store and return cuboid position.
+        cub.rid = rid
+        self._store_cub(cub)
+        return cub
+
+    def reset(self):
+        super(MaxCubsVec, self).reset()
+        values = (0, 0, 0, self.width, self.height, self.depth)
+        self._max_cubs = np.array(
+            [values], dtype=_column_dtype(values, np.dtype(np.int64)),
+            order='F')
+
+
+class MaxCubsVecBl(MaxCubsVec):
+    """Bottom Left, select the position where the top of the cuboid is lower
+
+    As MaxCubsBl only the selection changes, the reported fitness is the
+    one of MaxCubsVec.
+    """
+    def _position_fitness(self, bounds, sizes, width, height, depth):
+        return bounds[:, 1] + height
+
+
+class MaxCubsVecBssf(MaxCubsVec):
+    """Best Sort Side Fit minimize short leftover side"""
+    def _cub_fitness(self, bounds, sizes, width, height, depth):
+        return np.minimum(np.minimum(sizes[:, 0] - width,
+                                     sizes[:, 1] - height),
+                          sizes[:, 2] - depth)
+
+
+class MaxCubsVecBaf(MaxCubsVec):
+    """Best Area Fit pick maximal cuboid with smallest area
+    where the cuboid can be placed
+    """
+    def _cub_fitness(self, bounds, sizes, width, height, depth):
+        # Python integers when the volumes can be out of the int64 range
+        dtype = _exact_dtype(sizes.T, lambda w, h, d: w * h * d)
+        placed = (np.asarray(width, dtype=dtype) *
+                  np.asarray(height, dtype=dtype) *
+                  np.asarray(depth, dtype=dtype))
+        return sizes.astype(dtype, copy=False).prod(axis=1) - placed
+
+
+class MaxCubsVecBlsf(MaxCubsVec):
+    """Best Long Side Fit minimize long leftover side"""
+    def _cub_fitness(self, bounds, sizes, width, height, depth):
+        return np.maximum(np.maximum(sizes[:, 0] - width,
+                                     sizes[:, 1] - height),
+                          sizes[:, 2] - depth)
@@ -1,26 +1,134 @@
 # -*- coding: utf-8 -*-
 
+import collections
+import heapq
 from cubspack.geometry import Cuboid
+from cubspack.geometry import CuboidArray
+from cubspack.geometry import sweep_collisions
+from cubspack.spatial import LooseOctree
+import numpy as np
+
+
+# Validation verdict for a bin, colliding index pairs and the indexes of the
+# cuboids placed outside the bin volume.
+BinReport = collections.namedtuple('BinReport', ['collisions', 'outside'])
+
+# Result of the search for the best position of a cuboid in a bin, returned
+# by PackingAlgorithm.placement. fitness is the value fitness() returns,
+# position what the bin needs to place the cuboid without searching again
+# (free space, orientation...), and owner and version identify the bin
+# state it is valid for.
+Placement = collections.namedtuple(
+    'Placement', ['fitness', 'width', 'height', 'depth', 'orientations',
+                  'position', 'owner', 'version'])
+
+# Axis aligned orientations of a cuboid, each one the index of the cuboid
+# dimension (width, height, depth) placed along the bin x, y and z axes. The
+# first two are the normal orientation and the width/height swap.
+ORIENTATIONS = ((0, 1, 2), (1, 0, 2), (0, 2, 1), (2, 1, 0), (1, 2, 0),
+                (2, 0, 1))
+
+# Orientation masks, bit i allows ORIENTATIONS[i]. They are accepted as the
+# bin rot argument, and per cuboid by add_cub and placement.
+ROT_NONE = 0b000001
+ROT_WH = 0b000011
+ROT_UPRIGHT = 0b001001  # This side up, the height stays along the y axis
+ROT_ALL = 0b111111
+
+
+# Eviction policies for the bounded free space mode (see PackingAlgorithm
+# max_free). Each one scores a free space from the space and the bin version
+# it was last useful at (created or big enough for a cuboid searched), the
+# lowest scores are evicted first, the oldest free space on ties.
+def EVICT_SMALLEST(space, used):
+    """Evict the free space with the smallest volume first"""
+    return space.volume()
+
+
+def EVICT_LRU(space, used):
+    """Evict the free space least recently useful first"""
+    return (used, space.volume())
+
+
+def EVICT_THINNEST(space, used):
+    """Evict the free space with the smallest side first"""
+    return min(space.width, space.height, space.depth)
+
+
+def orientation_mask(rot):
+    """Orientation mask for a rot argument
+
+    Arguments:
+        rot (bool, int): True for the width/height swap (ROT_WH), False for
+            no rotation or an orientation mask
+
+    Returns:
+        int: Orientation mask
+    """
+    if rot is True:
+        return ROT_WH
+    if not rot:
+        return ROT_NONE
+    return rot
+
+
+def _outside_volume(bounds, width, height, depth):
+    """Mask of the cuboids not fully inside the volume"""
+    return ~np.asarray(
+        (bounds[:, 0] >= 0) & (bounds[:, 1] >= 0) & (bounds[:, 2] >= 0) &
+        (bounds[:, 3] <= width) & (bounds[:, 4] <= height) &
+        (bounds[:, 5] <= depth), dtype=bool)
+
+
+def packing_report(bounds, width, height, depth):
+    """Validate the placement of the cuboids inside a bin
+
+    Module level so it can be shipped to worker processes.
+
+    Arguments:
+        bounds (numpy.ndarray): Placed cuboids bounds
+        width (int, float): Bin width
+        height (int, float): Bin height
+        depth (int, float): Bin depth
+
+    Returns:
+        BinReport: All the collisions and cuboids outside the volume
+    """
+    outside = _outside_volume(bounds, width, height, depth)
+    return BinReport(sweep_collisions(bounds),
+                     np.flatnonzero(outside).tolist())
 
 
 class PackingAlgorithm(object):
     """PackingAlgorithm base class"""
 
-    def __init__(self, width, height, depth, rot=True, *args, **kwargs):
+    def __init__(self, width, height, depth, rot=True, max_free=None,
+                 evict=EVICT_SMALLEST, *args, **kwargs):
         """Initialize packing algorithm
 
         Arguments:
             width (int, float): Packing volume width
             height (int, float): Packing volume height
             depth (int, float): Packing volume depth
-            rot (bool): Cuboid rotation enabled or disabled
+            rot (bool, int): Cuboid rotation enabled or disabled, or the
+                mask of the orientations allowed (see ROT_ALL)
+            max_free (int|None): Most free spaces tracked after each
+                placement, the ones over it are evicted and never used.
+                None for no limit. Only MaxCubs and Guillotine bins track
+                their free spaces this way.
+            evict (function): Eviction policy, see EVICT_SMALLEST
         """
         self.width = width
         self.height = height
         self.depth = depth
         self.rot = rot
-        self.cuboids = []
+        self._rot_mask = orientation_mask(rot)
+        self._max_free = max_free
+        self._evict_policy = evict
+        self.cuboids = CuboidArray()
         self._surface = Cuboid(0, 0, 0, width, height, depth)
+        # Incremented on every change, invalidates the Placements returned
+        self._version = 0
         self.reset()
 
     def __len__(self):
@@ -29,58 +137,168 @@ class PackingAlgorithm(object):
     def __iter__(self):
         return iter(self.cuboids)
 
-    def _fits_volume(self, width, height, depth):
+    def _orientations(self, width, height, depth, orientations=None):
+        """Placed dimensions of a cuboid in each orientation allowed
+
+        The orientations allowed are the ones in both the bin mask and the
+        cuboid one, in ORIENTATIONS order. Those giving the same dimensions
+        as a previous one (cubes, square faces) are skipped.
+
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
+
+        Returns:
+            list: (width, height, depth) tuples, the normal one first
+        """
+        mask = self._rot_mask
+        if orientations is not None:
+            mask &= orientations
+
+        dims = (width, height, depth)
+        placed = []
+        for i, (x, y, z) in enumerate(ORIENTATIONS):
+            if mask >> i & 1:
+                o = (dims[x], dims[y], dims[z])
+                if o not in placed:
+                    placed.append(o)
+        return placed
+
+    def _fits_volume(self, width, height, depth, orientations=None):
         """Test volume is big enough to place a cuboid
 
         Arguments:
             width (int, float): Cuboid width
             height (int, float): Cuboid height
             depth (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
 
         Returns:
             boolean: True if it could be placed, False otherwise
         """
         assert(width > 0 and height > 0 and depth > 0)
-        w, h, d = width, height, depth
-
-        if self.rot and w > self.width or h > self.height:
-            w, h = h, w
-
-        # The rest here is for future development where it is possible
-        # To put the package in position that is not upward.
-        # For now, the cuboid have a direction in which it should be.
-
-        # o_width, o_height, o_depth = width, height, depth
-        # if self.rot:
-        #     if w > self.width or h > self.height or d > self.depth:
-        #         w, h, d = o_width, o_depth, o_height
-        #     if w > self.width or h > self.height or d > self.depth:
-        #         w, h, d = o_height, o_width, o_depth
-        #     if w > self.width or h > self.height or d > self.depth:
-        #         w, h, d = o_height, o_depth, o_width
-        #     if w > self.width or h > self.height or d > self.depth:
-        #         w, h, d = o_depth, o_height, o_width
-        #     if w > self.width or h > self.height or d > self.depth:
-        #         w, h, d = o_depth, o_width, o_height
-
-        if w > self.width or h > self.height or d > self.depth:
-            return False
-        else:
-            return True
+        for w, h, d in self._orientations(width, height, depth, orientations):
+            if w <= self.width and h <= self.height and d <= self.depth:
+                return True
+        return False
 
     def __getitem__(self, key):
         """Return cuboid in selected position."""
         return self.cuboids[key]
 
+    def _store_cub(self, cub):
+        """Store a placed cuboid
+
+        Arguments:
+            cub (Cuboid): Cuboid with placement coordinates
+        """
+        if self._spatial is not None:
+            self._spatial.insert(len(self.cuboids), cub)
+        self.cuboids.append(cub)
+        self._version += 1
+        self._limit_free_space()
+
+    @property
+    def spatial_index(self):
+        """Spatial index over the placed cuboids, keyed by their position.
+
+        Built on first use and kept up to date by add_cub afterwards.
+
+        Returns:
+            LooseOctree: Index
+        """
+        if self._spatial is None:
+            self._spatial = LooseOctree(self.width, self.height, self.depth)
+            for i, cub in enumerate(self.cuboids):
+                self._spatial.insert(i, cub)
+        return self._spatial
+
+    def overlapping(self, cub):
+        """Placed cuboids intersecting cub
+
+        Arguments:
+            cub (Cuboid): Query cuboid
+
+        Returns:
+            list: Cuboids sorted by placement order
+        """
+        index = self.spatial_index
+        return [index.get(k) for k in sorted(index.overlapping(cub))]
+
+    def touching(self, cub):
+        """Placed cuboids intersecting cub or touching it by a face or edge
+
+        Arguments:
+            cub (Cuboid): Query cuboid
+
+        Returns:
+            list: Cuboids sorted by placement order
+        """
+        index = self.spatial_index
+        return [index.get(k) for k in sorted(index.touching(cub))]
+
+    def supporting(self, cub):
+        """Placed cuboids directly below cub
+
+        Arguments:
+            cub (Cuboid): Query cuboid
+
+        Returns:
+            list: Cuboids sorted by placement order
+        """
+        index = self.spatial_index
+        return [index.get(k) for k in sorted(index.below(cub))]
+
     def used_volume(self):
         """Total volume of cuboids placed
 
         Returns:
             int, float: Volume
         """
-        return sum(c.volume() for c in self)
+        return self.cuboids.volume()
+
+    def placement(self, width, height, depth, orientations=None):
+        """Search the best position for a cuboid
+
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
 
-    def fitness(self, width, height, depth, rot=False):
+        Returns:
+            Placement: Position found and its fitness, it can be passed to
+                add_cub to place the cuboid there while the bin is unchanged.
+            None: Cuboid can't be placed
+        """
+        raise NotImplementedError
+
+    def _placement(self, width, height, depth, orientations, fitness,
+                   position):
+        """Build a Placement valid for the current bin state"""
+        return Placement(fitness, width, height, depth, orientations,
+                         position, self, self._version)
+
+    def _placed_position(self, placement, width, height, depth,
+                         orientations=None):
+        """Position stored in placement, if still valid for this cuboid
+
+        Returns:
+            position: The Placement position
+            None: placement is None, or was for another cuboid or bin, or
+                the bin has changed since.
+        """
+        if placement is None or placement.owner is not self or \
+                placement.version != self._version or \
+                (placement.width, placement.height, placement.depth,
+                 placement.orientations) != \
+                (width, height, depth, orientations):
+            return None
+        return placement.position
+
+    def fitness(self, width, height, depth, orientations=None):
         """Metric used to rate how much space is wasted.
 
         Metric used to rate how much space is wasted if a cuboid is placed.
@@ -92,15 +310,19 @@ class PackingAlgorithm(object):
             width (int, float): Cuboid width
             height (int, float): Cuboid height
             depth (int, float): Cuboid depth
-            rot (bool): Enable cuboid rotation
+            orientations (int): Cuboid orientation mask, None for any
 
         Returns:
             int, float: Cuboid fitness
             None: Cuboid can't be placed
         """
-        raise NotImplementedError
+        placement = self.placement(width, height, depth, orientations)
+        if placement is None:
+            return None
+        return placement.fitness
 
-    def add_cub(self, width, height, depth, rid=None):
+    def add_cub(self, width, height, depth, rid=None, orientations=None,
+                placement=None):
         """Add cuboid of widthxheightxdepth dimensions.
 
         Arguments:
@@ -108,6 +330,12 @@ class PackingAlgorithm(object):
             height (int, float): Cuboid height
             depth (int, float): Cuboid depth
             rid: Optional cuboid user id
+            orientations (int): Cuboid orientation mask (see ROT_ALL), only
+                the orientations also allowed by the bin are tried. None
+                for any.
+            placement (Placement): Optional result of placement() for the
+                same cuboid, used instead of searching again when the bin
+                hasn't changed since.
 
         Returns:
             Cuboid: Cuboid with placement coordinates
@@ -121,36 +349,132 @@ class PackingAlgorithm(object):
         Returns:
             List: Format [(rid, x, y, z, width, height, depth), ...]
         """
-        cuboid_list = []
-        for c in self:
-            cuboid_list.append(
-                (c.x, c.y, c.z, c.width, c.height, c.depth, c.rid))
-
-        return cuboid_list
+        return self.cuboids.tolist()
 
-    def validate_packing(self):
+    def validate_packing(self, collisions=False):
         """Check for collisions between cuboids.
 
         Also check all are placed inside surface.
+
+        Arguments:
+            collisions (bool): Instead of raising on the first collision
+                return all the colliding pairs.
+
+        Returns:
+            list: [(i, j), ...] index pairs of colliding cuboids, only when
+                collisions is True.
         """
-        volume = Cuboid(0, 0, 0, self.width, self.height, self.width)
+        bounds = self.cuboids.bounds()
 
-        for c in self:
-            if not volume.contains(c):
-                raise Exception("Cuboid placed outside volume.")
+        if _outside_volume(bounds, self.width, self.height, self.depth).any():
+            raise Exception("Cuboid placed outside volume.")
 
-        cuboids = [c for c in self]
-        if len(cuboids) <= 1:
-            return
+        pairs = sweep_collisions(bounds, first=not collisions)
+        if collisions:
+            return pairs
+
+        if pairs:
+            raise Exception("Cuboid collision detected")
 
-        for c1 in range(0, len(cuboids)-2):
-            for c2 in range(c1+1, len(cuboids)-1):
-                if cuboids[c1].intersects(cuboids[c2]):
-                    raise Exception("Cuboid collision detected")
+    def packing_report(self):
+        """Validate the packing without raising
+
+        Returns:
+            BinReport: All the collisions and cuboids outside the volume
+        """
+        return packing_report(
+            self.cuboids.bounds(), self.width, self.height, self.depth)
 
     def is_empty(self):
         # Returns true if there is no cuboids placed.
         return not bool(len(self))
 
+    def set_min_dims(self, width, height, depth):
+        """Smallest dimensions of the cuboids still to be packed
+
+        Called by the packer as the cuboids are packed, so the free space
+        too small for any of the remaining ones can be discarded. Each value
+        is the minimum over the cuboids in their normal orientation, the
+        orientations allowed by the bin are taken into account here (the
+        ones of each cuboid can only be fewer).
+
+        Arguments:
+            width (int, float): Min width
+            height (int, float): Min height
+            depth (int, float): Min depth
+        """
+        dims = (width, height, depth)
+        perms = [p for i, p in enumerate(ORIENTATIONS)
+                 if self._rot_mask >> i & 1]
+        min_dims = tuple(min(dims[p[axis]] for p in perms)
+                         for axis in range(3))
+        if min_dims != self._min_dims:
+            self._min_dims = min_dims
+            self._prune_free_space()
+            self._version += 1
+
+    def _useful_space(self, space):
+        """Test free space is big enough for some of the remaining cuboids
+
+        Arguments:
+            space (Cuboid): Free space
+
+        Returns:
+            bool: False if none of them fits
+        """
+        width, height, depth = self._min_dims
+        return space.width >= width and space.height >= height and \
+            space.depth >= depth
+
+    def _prune_free_space(self):
+        """Discard the free space too small for the remaining cuboids
+
+        Subclasses override it, by default free space is kept.
+        """
+        pass
+
+    def _free_spaces(self):
+        """Free spaces tracked, as (key, space) pairs
+
+        Subclasses supporting max_free override it, by default there are
+        none.
+        """
+        return ()
+
+    def _evict_free_space(self, key, space):
+        """Stop tracking a free space returned by _free_spaces"""
+        raise NotImplementedError
+
+    def _touch_free_space(self, key):
+        """Record a free space as useful now, for EVICT_LRU"""
+        if self._max_free is not None:
+            self._last_used[key] = self._version
+
+    def _limit_free_space(self):
+        """Evict the free spaces over max_free, lowest policy score first"""
+        if self._max_free is None:
+            return
+
+        spaces = list(self._free_spaces())
+        excess = len(spaces) - self._max_free
+        if excess <= 0:
+            return
+
+        policy = self._evict_policy
+        scored = ((policy(space, self._last_used.get(key, -1)), key, space)
+                  for key, space in spaces)
+        for _, key, space in heapq.nsmallest(excess, scored,
+                                             key=lambda s: s[:2]):
+            self._evict_free_space(key, space)
+            self._last_used.pop(key, None)
+            self.evictions += 1
+
     def reset(self):
-        self.cuboids = []
+        self.cuboids = CuboidArray()
+        self._spatial = None
+        self._min_dims = (0, 0, 0)
+        # Free spaces evicted since the last reset, and the version each
+        # tracked free space was last useful at.
+        self.evictions = 0
+        self._last_used = {}
+        self._version += 1
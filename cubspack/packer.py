@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 
 from cubspack.maxcubs import MaxCubsBssf
+from cubspack.pack_algo import packing_report
 
 import collections
 import decimal
 import itertools
+import multiprocessing
 import operator
 
 
@@ -27,6 +29,43 @@ def float2dec(ft, decimal_digits):
         return decimal.Decimal.from_float(float(ft)).quantize(places)
 
 
+# Fixed-point helpers
+def to_fixed(value, decimal_digits, rounding=decimal.ROUND_CEILING):
+    """Scale a number by 10**decimal_digits into an int
+
+    Floats are converted through their shortest representation, so 0.1 is
+    scaled as if it were exactly 0.1.
+
+    Arguments:
+        value (float, int, Decimal): Number to convert
+        decimal_digits (int): Number of digits after decimal point to keep
+        rounding (str): decimal rounding mode used for the remaining digits
+
+    Returns:
+        int: Scaled number
+    """
+    if isinstance(value, float):
+        value = decimal.Decimal(repr(value))
+    else:
+        value = decimal.Decimal(value)
+
+    return int(value.scaleb(decimal_digits).to_integral_value(
+        rounding=rounding))
+
+
+def from_fixed(value, decimal_digits):
+    """Scale back a number converted with to_fixed
+
+    Arguments:
+        value (int): Scaled number
+        decimal_digits (int): Number of digits after decimal point
+
+    Returns:
+        Decimal: Number with decimal_digits digits after decimal point
+    """
+    return decimal.Decimal(int(value)).scaleb(-decimal_digits)
+
+
 # Sorting algos for cuboid lists
 # Sort by volume
 SORT_VOLUME = lambda cublist: sorted(
@@ -83,18 +122,18 @@ class BinFactory(object):
     def is_empty(self):
         return self._count < 1
 
-    def fitness(self, width, height, depth):
+    def fitness(self, width, height, depth, orientations=None):
         if not self._ref_bin:
             self._ref_bin = self._create_bin()
 
-        return self._ref_bin.fitness(width, height, depth)
+        return self._ref_bin.fitness(width, height, depth, orientations)
 
-    def fits_inside(self, width, height, depth):
+    def fits_inside(self, width, height, depth, orientations=None):
         # Determine if cuboid widthxheightxdepth will fit into empty bin
         if not self._ref_bin:
             self._ref_bin = self._create_bin()
 
-        return self._ref_bin._fits_volume(width, height, depth)
+        return self._ref_bin._fits_volume(width, height, depth, orientations)
 
     def new_bin(self):
         if self._count > 0:
@@ -123,17 +162,21 @@ class PackerBNFMixin(object):
     doesn't fit, close the current bin and go to the next.
     """
 
-    def add_cub(self, width, height, depth, rid=None):
+    def add_cub(self, width, height, depth, rid=None, orientations=None,
+                placement=None):
         while True:
             # if there are no open bins, try to open a new one
             if len(self._open_bins) == 0:
                 # can we find an unopened bin that will hold this cub?
-                new_bin = self._new_open_bin(width, height, depth, rid=rid)
+                new_bin = self._new_open_bin(width, height, depth, rid=rid,
+                                             orientations=orientations)
                 if new_bin is None:
                     return None
 
             # we have at least one open bin, so check if it can hold this cub
-            cub = self._open_bins[0].add_cub(width, height, depth, rid=rid)
+            cub = self._open_bins[0].add_cub(width, height, depth, rid=rid,
+                                             orientations=orientations,
+                                             placement=placement)
             if cub is not None:
                 return cub
 
@@ -148,22 +191,25 @@ class PackerBFFMixin(object):
     Pack cuboid in first bin it fits
     """
 
-    def add_cub(self, width, height, depth, rid=None):
+    def add_cub(self, width, height, depth, rid=None, orientations=None):
         # see if this cub will fit in any of the open bins
         for b in self._open_bins:
-            cub = b.add_cub(width, height, depth, rid=rid)
+            cub = b.add_cub(width, height, depth, rid=rid,
+                            orientations=orientations)
             if cub is not None:
                 return cub
 
         while True:
             # can we find an unopened bin that will hold this cub?
-            new_bin = self._new_open_bin(width, height, depth, rid=rid)
+            new_bin = self._new_open_bin(width, height, depth, rid=rid,
+                                         orientations=orientations)
             if new_bin is None:
                 return None
 
             # _new_open_bin may return a bin that's too small,
             # so we have to double-check
-            cub = new_bin.add_cub(width, height, depth, rid=rid)
+            cub = new_bin.add_cub(width, height, depth, rid=rid,
+                                  orientations=orientations)
             if cub is not None:
                 return cub
 
@@ -177,14 +223,17 @@ class PackerBBFMixin(object):
     # only create this getter once
     first_item = operator.itemgetter(0)
 
-    def add_cub(self, width, height, depth, rid=None):
+    def add_cub(self, width, height, depth, rid=None, orientations=None):
 
-        # Try packing into open bins
-        fit = ((b.fitness(width, height, depth),  b) for b in self._open_bins)
-        fit = (b for b in fit if b[0] is not None)
+        # Try packing into open bins, the bin with best fitness places the
+        # cuboid where its search found it.
+        fit = ((b.placement(width, height, depth, orientations), b) for b in
+               self._open_bins)
+        fit = ((p.fitness, p, b) for p, b in fit if p is not None)
         try:
-            _, best_bin = min(fit, key=self.first_item)
-            best_bin.add_cub(width, height, depth, rid)
+            _, placement, best_bin = min(fit, key=self.first_item)
+            best_bin.add_cub(width, height, depth, rid,
+                             orientations=orientations, placement=placement)
             return True
         except ValueError:
             pass
@@ -192,27 +241,38 @@ class PackerBBFMixin(object):
         # Try packing into one of the empty bins
         while True:
             # can we find an unopened bin that will hold this cub?
-            new_bin = self._new_open_bin(width, height, depth, rid=rid)
+            new_bin = self._new_open_bin(width, height, depth, rid=rid,
+                                         orientations=orientations)
             if new_bin is None:
                 return False
 
             # _new_open_bin may return a bin that's too small,
             # so we have to double-check
-            if new_bin.add_cub(width, height, depth, rid):
+            if new_bin.add_cub(width, height, depth, rid,
+                               orientations=orientations):
                 return True
 
 
 class PackerOnline(object):
     """Cuboids are packed as soon are they are added"""
 
-    def __init__(self, pack_algo=MaxCubsBssf, rotation=True):
+    def __init__(self, pack_algo=MaxCubsBssf, rotation=True,
+                 fixed_point=None):
         """Arguments:
 
             pack_algo (PackingAlgorithm): What packing algo to use
-            rotation (bool): Enable/Disable cuboid rotation
+            rotation (bool, int): Enable/Disable cuboid rotation, or the
+                mask of the orientations allowed (see ROT_ALL)
+            fixed_point (int|None): When set, the number of decimal digits
+                kept from all the dimensions. Cuboids are scaled up (rounding
+                up) and bins are scaled down (rounding down) by
+                10**fixed_point into ints, so the bins only do integer
+                arithmetic, and cub_list/bin_list scale the results back to
+                Decimals. The bins themselves keep the scaled integers.
         """
         self._rotation = rotation
         self._pack_algo = pack_algo
+        self._fixed_point = fixed_point
         self.reset()
 
     def __iter__(self):
@@ -239,7 +299,8 @@ class PackerOnline(object):
         else:
             return self._open_bins[key-len(self._closed_bins)]
 
-    def _new_open_bin(self, width=None, height=None, depth=None, rid=None):
+    def _new_open_bin(self, width=None, height=None, depth=None, rid=None,
+                      orientations=None):
         """Extract the next empty bin and append it to open bins
 
         Returns:
@@ -253,13 +314,15 @@ class PackerOnline(object):
 
             # Only return the new bin if the cub fits.
             # If width, height or depth is None, caller doesn't know the size.
-            if not binfac.fits_inside(width, height, depth):
+            if not binfac.fits_inside(width, height, depth, orientations):
                 continue
 
             # Create bin and add to open_bins
             new_bin = binfac.new_bin()
             if new_bin is None:
                 continue
+            if self._min_dims is not None:
+                new_bin.set_min_dims(*self._min_dims)
             self._open_bins.append(new_bin)
 
             # If the factory was depleted mark for deletion
@@ -274,7 +337,63 @@ class PackerOnline(object):
 
         return new_bin
 
+    def _set_min_dims(self, width, height, depth):
+        """Pass the smallest dimensions of the cuboids left to the bins
+
+        Open bins and the ones opened afterwards use them to discard free
+        space too small for any of the remaining cuboids. Closed bins won't
+        receive more cuboids so they are skipped.
+
+        Arguments:
+            width (int, float): Min width among the cuboids left
+            height (int, float): Min height among the cuboids left
+            depth (int, float): Min depth among the cuboids left
+        """
+        min_dims = (width, height, depth)
+        if min_dims == self._min_dims:
+            return
+
+        self._min_dims = min_dims
+        for b in self._open_bins:
+            b.set_min_dims(width, height, depth)
+
+    def _scale_cub(self, width, height, depth):
+        """Convert cuboid dimensions to fixed-point if enabled"""
+        if self._fixed_point is None:
+            return width, height, depth
+
+        return tuple(to_fixed(v, self._fixed_point, decimal.ROUND_CEILING)
+                     for v in (width, height, depth))
+
+    def _unscale(self, value):
+        """Convert back a fixed-point value if enabled"""
+        if self._fixed_point is None:
+            return value
+
+        return from_fixed(value, self._fixed_point)
+
+    def add_cub(self, width, height, depth, rid=None, orientations=None):
+        """Pack a cuboid
+
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            rid: Optional cuboid user id
+            orientations (int): Mask of the orientations allowed for this
+                cuboid (see ROT_ALL), combined with the packer rotation.
+                None for any.
+        """
+        width, height, depth = self._scale_cub(width, height, depth)
+        return super(PackerOnline, self).add_cub(
+            width, height, depth, rid, orientations=orientations)
+
     def add_bin(self, width, height, depth, count=1, **kwargs):
+        if self._fixed_point is not None:
+            width, height, depth = (
+                to_fixed(v, self._fixed_point, decimal.ROUND_FLOOR)
+                for v in (width, height, depth))
+
         # accept the same parameters as PackingAlgorithm objects
         kwargs['rot'] = self._rotation
         bin_factory = BinFactory(width, height, depth, count,
@@ -286,9 +405,10 @@ class PackerOnline(object):
         bin_count = 0
 
         for abin in self:
-            for cub in abin:
-                cuboids.append((bin_count, cub.x, cub.y, cub.z, cub.width,
-                                cub.height, cub.depth, cub.rid))
+            for cub in abin.cubs_list():
+                if self._fixed_point is not None:
+                    cub = tuple(self._unscale(v) for v in cub[:6]) + cub[6:]
+                cuboids.append((bin_count,) + cub)
             bin_count += 1
 
         return cuboids
@@ -298,11 +418,51 @@ class PackerOnline(object):
 
         Either they are closed or open but containing at least one cuboid
         """
-        return [(b.width, b.height, b.depth) for b in self]
+        return [(self._unscale(b.width), self._unscale(b.height),
+                 self._unscale(b.depth)) for b in self]
+
+    def packing_report(self, processes=1):
+        """Validate all the bins without raising.
+
+        Arguments:
+            processes (int|None): Number of worker processes the bins are
+                shipped to, None for one per CPU and 1 to validate them in
+                this process.
+
+        Returns:
+            list: BinReport (collisions, outside) for each bin in packer order
+        """
+        if processes == 1:
+            return [b.packing_report() for b in self]
+
+        work = [(b.cuboids.bounds(), b.width, b.height, b.depth)
+                for b in self]
+        if not work:
+            return []
+
+        pool = multiprocessing.Pool(processes)
+        try:
+            return pool.starmap(packing_report, work)
+        finally:
+            pool.close()
+            pool.join()
 
-    def validate_packing(self):
-        for b in self:
-            b.validate_packing()
+    def validate_packing(self, processes=1):
+        """Check for collisions and cuboids out of their bin.
+
+        Arguments:
+            processes (int|None): see packing_report
+        """
+        if processes == 1:
+            for b in self:
+                b.validate_packing()
+            return
+
+        for report in self.packing_report(processes):
+            if report.outside:
+                raise Exception("Cuboid placed outside volume.")
+            if report.collisions:
+                raise Exception("Cuboid collision detected")
 
     def reset(self):
         # Bins fully packed and closed.
@@ -316,13 +476,17 @@ class PackerOnline(object):
         self._empty_bins = collections.OrderedDict()
         self._bin_count = itertools.count()
 
+        # Smallest dimensions of the cuboids left to pack, when known
+        self._min_dims = None
+
 
 class Packer(PackerOnline):
     """Cuboids aren't packed untils pack() is called"""
 
     def __init__(self, pack_algo=MaxCubsBssf, sort_algo=SORT_NONE,
-                 rotation=True):
-        super(Packer, self).__init__(pack_algo=pack_algo, rotation=rotation)
+                 rotation=True, fixed_point=None):
+        super(Packer, self).__init__(pack_algo=pack_algo, rotation=rotation,
+                                     fixed_point=fixed_point)
 
         self._sort_algo = sort_algo
 
@@ -336,8 +500,8 @@ class Packer(PackerOnline):
     def add_bin(self, width, height, depth, count=1, **kwargs):
         self._avail_bins.append((width, height, depth, count, kwargs))
 
-    def add_cub(self, width, height, depth, rid=None):
-        self._avail_cub.append((width, height, depth, rid))
+    def add_cub(self, width, height, depth, rid=None, orientations=None):
+        self._avail_cub.append((width, height, depth, rid, orientations))
 
     def _is_everything_ready(self):
         return self._avail_cub and self._avail_bins
@@ -359,8 +523,18 @@ class Packer(PackerOnline):
         # If enabled sort cuboids
         self._sorted_cub = self._sort_algo(self._avail_cub)
 
+        # Running minimum dimensions of the cuboids left, in bin units
+        min_dims = []
+        dims = None
+        for r in reversed(self._sorted_cub):
+            scaled = self._scale_cub(*r[:3])
+            dims = scaled if dims is None else tuple(map(min, dims, scaled))
+            min_dims.append(dims)
+        min_dims.reverse()
+
         # Start packing
-        for r in self._sorted_cub:
+        for r, dims in zip(self._sorted_cub, min_dims):
+            self._set_min_dims(*dims)
             super(Packer, self).add_cub(*r)
 
 
@@ -408,9 +582,11 @@ class PackerGlobal(Packer, PackerBNFMixin):
     """GLOBAL: For each bin pack the cuboid with the best fitness."""
     first_item = operator.itemgetter(0)
 
-    def __init__(self, pack_algo=MaxCubsBssf, rotation=True):
+    def __init__(self, pack_algo=MaxCubsBssf, rotation=True,
+                 fixed_point=None):
         super(PackerGlobal, self).__init__(
-            pack_algo=pack_algo, sort_algo=SORT_NONE, rotation=rotation)
+            pack_algo=pack_algo, sort_algo=SORT_NONE, rotation=rotation,
+            fixed_point=fixed_point)
 
     def _find_best_fit(self, pbin):
         """Return best fitness cub from cubs packing _sorted_cub list
@@ -419,16 +595,23 @@ class PackerGlobal(Packer, PackerBNFMixin):
             pbin (PackingAlgorithm): Packing bin
 
         Returns:
-            key of the cuboid with best fitness
+            (key, placement): key of the cuboid with best fitness and the
+                Placement found for it, or (None, None)
         """
-        fit = ((pbin.fitness(c[0], c[1], c[2]), k) for k, c in
+        fit = ((pbin.placement(c[0], c[1], c[2], c[4]), k) for k, c in
                self._sorted_cub.items())
-        fit = (f for f in fit if f[0] is not None)
+        fit = ((p.fitness, k, p) for p, k in fit if p is not None)
         try:
-            _, cub = min(fit, key=self.first_item)
-            return cub
+            _, cub, placement = min(fit, key=self.first_item)
+            return cub, placement
         except ValueError:
-            return None
+            return None, None
+
+    def _remaining_min_dims(self):
+        """Smallest width, height and depth among the cuboids left"""
+        widths, heights, depths = zip(*(
+            c[:3] for c in self._sorted_cub.values()))
+        return min(widths), min(heights), min(depths)
 
     def _new_open_bin(self, remaining_cub):
         """Extract the next bin where at least one of the cuboids in rem
@@ -449,7 +632,7 @@ class PackerGlobal(Packer, PackerBNFMixin):
             # cuboids fit inside.
             a_cuboid_fits = False
             for _, cub in remaining_cub.items():
-                if binfac.fits_inside(cub[0], cub[1], cub[2]):
+                if binfac.fits_inside(cub[0], cub[1], cub[2], cub[4]):
                     a_cuboid_fits = True
                     break
 
@@ -461,6 +644,7 @@ class PackerGlobal(Packer, PackerBNFMixin):
             new_bin = binfac.new_bin()
             if new_bin is None:
                 continue
+            new_bin.set_min_dims(*self._remaining_min_dims())
             self._open_bins.append(new_bin)
 
             # If the factory was depleted mark for deletion
@@ -488,8 +672,10 @@ class PackerGlobal(Packer, PackerBNFMixin):
             super(Packer, self).add_bin(width, height, depth, count,
                                         **extra_kwargs)
 
-        # Store cuboids into dict for fast deletion
+        # Store cuboids into dict for fast deletion, they skip add_cub so
+        # are converted to fixed-point here.
         self._sorted_cub = collections.OrderedDict(
+            (k, self._scale_cub(*c[:3]) + c[3:]) for k, c in
             enumerate(self._sort_algo(self._avail_cub)))
 
         # For each bin, pack the cuboids with lowest fitness until it is filled
@@ -507,7 +693,7 @@ class PackerGlobal(Packer, PackerBNFMixin):
             while True:
 
                 # Find 'fittest' cuboid
-                best_cub_key = self._find_best_fit(pbin)
+                best_cub_key, placement = self._find_best_fit(pbin)
                 if best_cub_key is None:
                     closed_bin = self._open_bins.popleft()
                     self._closed_bins.append(closed_bin)
@@ -517,7 +703,9 @@ class PackerGlobal(Packer, PackerBNFMixin):
                 best_cub = self._sorted_cub[best_cub_key]
                 del self._sorted_cub[best_cub_key]
 
-                PackerBNFMixin.add_cub(self, *best_cub)
+                PackerBNFMixin.add_cub(self, *best_cub, placement=placement)
+                if self._sorted_cub:
+                    self._set_min_dims(*self._remaining_min_dims())
 
 
 # Packer factory
@@ -532,7 +720,8 @@ def newPacker(mode=PackingMode.Offline,
               bin_algo=PackingBin.BBF,
               pack_algo=MaxCubsBssf,
               sort_algo=SORT_VOLUME,
-              rotation=True):
+              rotation=True,
+              fixed_point=None):
     """Packer factory helper function
 
     Arguments:
@@ -541,7 +730,10 @@ def newPacker(mode=PackingMode.Offline,
             Offline: Cuboids aren't packed until pack() is called
         bin_algo (PackingBin): Bin selection heuristic
         pack_algo (PackingAlgorithm): Algorithm used
-        rotation (boolean): Enable or disable cuboid rotation.
+        rotation (boolean, int): Enable or disable cuboid rotation, or the
+            mask of the orientations allowed (see ROT_ALL).
+        fixed_point (int|None): Pack with integers scaled by 10**fixed_point
+            (see PackerOnline).
 
     Returns:
         Packer: Initialized packer instance.
@@ -579,6 +771,7 @@ def newPacker(mode=PackingMode.Offline,
 
     if sort_algo:
         return packer_class(pack_algo=pack_algo, sort_algo=sort_algo,
-                            rotation=rotation)
+                            rotation=rotation, fixed_point=fixed_point)
     else:
-        return packer_class(pack_algo=pack_algo, rotation=rotation)
+        return packer_class(pack_algo=pack_algo, rotation=rotation,
+                            fixed_point=fixed_point)
@@ -1,308 +1,663 @@
 # -*- coding: utf-8 -*-
 
+import bisect
 import collections
+import heapq
+import itertools
+import numbers
+
 from cubspack.geometry import Cuboid
-from cubspack.geometry import HSegment
-from cubspack.geometry import Point as P
 from cubspack.pack_algo import PackingAlgorithm
+from cubspack.pack_algo import Placement
 from cubspack.waste import WasteManager
-import heapq
-import operator
+
+
+def _tile_edges(size, count):
+    """Edges splitting [0, size] in count tiles, integers for integer sizes
+
+    Arguments:
+        size (int, float): Side of the bin floor
+        count (int): Number of tiles
+    """
+    if isinstance(size, numbers.Integral):
+        return [size * k // count for k in range(count + 1)]
+    return [0] + [size * k / count for k in range(1, count)] + [size]
+
+
+# A skyline corner, the cell at (x, z) height and size, right and front tell
+# if the cuboids are placed to the left of x and behind z, and the run_* and
+# next_* fields are SurfaceTile.run from the cell along each axis.
+Corner = collections.namedtuple(
+    'Corner', ['height', 'z', 'x', 'right', 'front', 'width', 'depth',
+               'run_x', 'next_x', 'run_z', 'next_z'])
+
+
+def _corner_key(corner):
+    """Corner order, lowest first then along z and x"""
+    return corner[:5]
+
+
+class SurfaceTile(object):
+    """Heightmap of the skyline over a rectangle of the bin floor
+
+    The x and z edges of the cuboids placed over the tile split it into
+    cells on a rectilinear grid, heights[i][j] is the height of the surface
+    over xs[i]..xs[i+1] and zs[j]..zs[j+1]. Neighbour rows and columns with
+    the same heights are merged, the grid only keeps the edges of the
+    surface. The values are kept as given, exact for any number type.
+    """
+
+    def __init__(self, left, right, outeye, ineye):
+        self.xs = [left, right]
+        self.zs = [outeye, ineye]
+        self.heights = [[0]]
+        self._sums = None
+
+    def _cells(self, left, right, outeye, ineye):
+        """Range of the cells under a rectangle, clipped to the tile"""
+        xs, zs = self.xs, self.zs
+        i0 = max(bisect.bisect_right(xs, left) - 1, 0)
+        i1 = min(bisect.bisect_left(xs, right), len(xs) - 1)
+        j0 = max(bisect.bisect_right(zs, outeye) - 1, 0)
+        j1 = min(bisect.bisect_left(zs, ineye), len(zs) - 1)
+        return i0, i1, j0, j1
+
+    def max_height(self, left, right, outeye, ineye):
+        """Highest cell under a rectangle"""
+        i0, i1, j0, j1 = self._cells(left, right, outeye, ineye)
+        return max([max(row[j0:j1]) for row in self.heights[i0:i1]])
+
+    def _prefix_sums(self):
+        """Sums of the full cells before each cell, and of the cells before
+        it along one axis in its row and column, kept until the tile changes
+        """
+        if self._sums is None:
+            xs, zs, heights = self.xs, self.zs, self.heights
+            full = [[0] * len(zs) for _ in xs]
+            rows = [[0] * len(zs) for _ in heights]
+            columns = [[0] * len(heights[0]) for _ in xs]
+            for a, row in enumerate(heights):
+                dx = xs[a+1] - xs[a]
+                for b, h in enumerate(row):
+                    dz = zs[b+1] - zs[b]
+                    rows[a][b+1] = rows[a][b] + h * dz
+                    columns[a+1][b] = columns[a][b] + h * dx
+                    full[a+1][b+1] = (full[a][b+1] + full[a+1][b] -
+                                      full[a][b] + h * dx * dz)
+            self._sums = (full, rows, columns)
+        return self._sums
+
+    def volume(self, left, right, outeye, ineye):
+        """Volume under the surface over a rectangle"""
+        xs, zs, heights = self.xs, self.zs, self.heights
+        full, rows, columns = self._prefix_sums()
+
+        # Cell holding each side and the distance to its start, the volume
+        # from the tile origin to a corner (x, z) is the full cells before
+        # it and the parts of its row, column and cell.
+        ends_x = []
+        for x in (max(left, xs[0]), min(right, xs[-1])):
+            i = min(bisect.bisect_right(xs, x), len(xs) - 1) - 1
+            ends_x.append((i, x - xs[i]))
+        ends_z = []
+        for z in (max(outeye, zs[0]), min(ineye, zs[-1])):
+            j = min(bisect.bisect_right(zs, z), len(zs) - 1) - 1
+            ends_z.append((j, z - zs[j]))
+
+        volume = 0
+        for sign_x, (i, fx) in zip((-1, 1), ends_x):
+            for sign_z, (j, fz) in zip((-1, 1), ends_z):
+                volume += sign_x * sign_z * (
+                    full[i][j] + fx * rows[i][j] + fz * columns[i][j] +
+                    fx * fz * heights[i][j])
+        return volume
+
+    def row_heights(self, i, zs):
+        """Heights of the cells of row i (along z) at both ends of each
+        zs cell, as (start, end) pairs
+        """
+        tile_zs, row = self.zs, self.heights[i]
+        return [(row[bisect.bisect_right(tile_zs, start) - 1],
+                 row[bisect.bisect_left(tile_zs, end) - 1])
+                for start, end in zip(zs, zs[1:])]
+
+    def column_heights(self, j, xs):
+        """Heights of the cells of column j (along x) at both ends of each
+        xs cell, as (start, end) pairs
+        """
+        tile_xs, heights = self.xs, self.heights
+        return [(heights[bisect.bisect_right(tile_xs, start) - 1][j],
+                 heights[bisect.bisect_left(tile_xs, end) - 1][j])
+                for start, end in zip(xs, xs[1:])]
+
+    def run(self, a, b, step_x, step_z):
+        """Cells from (a, b) not higher than it, along x or z
+
+        Arguments:
+            a, b (int): Cell index
+            step_x, step_z (int): Direction of the walk, one of them 0
+
+        Returns:
+            (length, next)
+            length (int, float): From the cell side the walk starts at to
+                the first higher cell, None if the walk leaves the tile.
+            next (int, float): Height of that cell
+        """
+        heights, height = self.heights, self.heights[a][b]
+        edges, start = (self.xs, a) if step_x else (self.zs, b)
+        step = step_x or step_z
+        while True:
+            a, b = a + step_x, b + step_z
+            if not (0 <= a < len(heights) and 0 <= b < len(heights[0])):
+                return None, None
+            if heights[a][b] > height:
+                end = a if step_x else b
+                if step > 0:
+                    return edges[end] - edges[start], heights[a][b]
+                return edges[start+1] - edges[end+1], heights[a][b]
+
+    def _split_x(self, x):
+        i = bisect.bisect_left(self.xs, x)
+        if self.xs[i] != x:
+            self.xs.insert(i, x)
+            self.heights.insert(i, list(self.heights[i-1]))
+        return i
+
+    def _split_z(self, z):
+        j = bisect.bisect_left(self.zs, z)
+        if self.zs[j] != z:
+            self.zs.insert(j, z)
+            for row in self.heights:
+                row.insert(j, row[j-1])
+        return j
+
+    def raise_to(self, cub):
+        """Raise the surface under cub to its top
+
+        Returns:
+            list: (x, y, z, width, height, depth) of the space left between
+                the surface and the cuboid bottom, one per cell.
+        """
+        xs, zs, heights = self.xs, self.zs, self.heights
+        i0 = self._split_x(max(cub.left, xs[0]))
+        i1 = self._split_x(min(cub.right, xs[-1]))
+        j0 = self._split_z(max(cub.outeye, zs[0]))
+        j1 = self._split_z(min(cub.ineye, zs[-1]))
+
+        waste = []
+        for i in range(i0, i1):
+            row = heights[i]
+            for j in range(j0, j1):
+                if row[j] < cub.bottom:
+                    waste.append((xs[i], row[j], zs[j], xs[i+1] - xs[i],
+                                  cub.bottom - row[j], zs[j+1] - zs[j]))
+            row[j0:j1] = [cub.top] * (j1 - j0)
+
+        self._sums = None
+
+        # Only the rows and columns at the cuboid sides or under it can be
+        # left the same as a neighbour.
+        for i in range(min(i1, len(xs) - 2), max(i0, 1) - 1, -1):
+            if heights[i] == heights[i-1]:
+                del heights[i]
+                del xs[i]
+        for j in range(min(j1, len(zs) - 2), max(j0, 1) - 1, -1):
+            if all(row[j] == row[j-1] for row in heights):
+                for row in heights:
+                    del row[j]
+                del zs[j]
+        return waste
 
 
 class Skyline(PackingAlgorithm):
     """Skyline algorithm
 
-    Class implementing Skyline algorithm as described by
-    Jukka Jylanki - A Thousand Ways to Pack the Bin (February 27, 2010)
+    The top surface of the cuboids placed is kept as a heightmap over the
+    bin floor (the x-z plane). A cuboid is placed on the surface, at the
+    height of the highest cell under its footprint.
 
-    _skyline:  stores all the segments at the top of the skyline.
-    _waste: Handles all wasted sections.
-    """
+    The floor is split into a fixed grid of SurfaceTile when the first
+    cuboid is placed, tile_sides times wider than it, so raising the surface
+    under a cuboid only changes the few tiles under its footprint and their
+    cells.
+
+    The positions tried are the corners of the skyline, the cells with a
+    wall or a higher cell on a side along x and on another along z, with the
+    cuboid resting against both, the way the 2D algorithm tries the ends of
+    its segments. They are walked from the lowest up and the walk stops
+    once _fitness_bound shows no higher corner can do better.
 
-    def __init__(self, width, height, depth, rot=True, *args, **kwargs):
-        """Definition
+    _waste: Handles all the space left under the cuboids placed, when waste
+        management is enabled.
 
-        _skyline is the list used to store all the skyline segments, each
-        one is a list with the format [x, y, z, width] where x is the x
-        coordinate of the left most point of the segment, y the y coordinate
-        of the segment, z the z coordinate of the segment and width the length
-        of the segment. The initial segment is allways [0, 0, 0, surface_width]
+    For a more detailed explanation of the 2D algorithm, see:
+    Jukka Jylanki - A Thousand Ways to Pack the Bin (February 27, 2010)
+    """
+
+    def __init__(self, width, height, depth, rot=True, tile_sides=2,
+                 max_tiles=32, *args, **kwargs):
+        """Argument list.
 
         Arguments:
             width (int, float):
             height (int, float):
             depth (int, float):
-            rot (bool): Enable or disable cuboid rotation
+            rot (bool, int): Cuboid rotation enabled or disabled, or the
+                mask of the orientations allowed (see ROT_ALL)
+            tile_sides (int, float): Floor tile side, in sides of the first
+                cuboid placed
+            max_tiles (int): Most tiles along each side of the floor
         """
+        self._tile_sides = tile_sides
+        self._max_tiles = max_tiles
         self._waste_management = False
         self._waste = WasteManager(rot=rot)
         super(Skyline, self).__init__(
-            width, height, depth, rot, merge=False, *args, **kwargs)
-
-    def _placement_points_generator(self, skyline, width):
-        """Returns a generator for the x coordinates of all the placement
-        points on the skyline for a given rectangle.
+            width, height, depth, rot, *args, **kwargs)
 
-        WARNING: In some cases could be duplicated points, but it is faster
-        to compute them twice than to remove them.
+    def _cub_fitness(self, support, x, z, width, height, depth):
+        """Get fitness value
 
         Arguments:
-            skyline (list): Skyline HSegment list
-            width (int, float): Rectangle width
+            support (int, float): Support height of the position
+            x (int, float): Position left side
+            z (int, float): Position outeye side
+            width (int, float): Placed cuboid width
+            height (int, float): Placed cuboid height
+            depth (int, float): Placed cuboid depth
 
         Returns:
-            generator
+            int, float, tuple: Fitness value, only compared with the others
+        """
+        raise NotImplementedError
+
+    def _fitness_bound(self, support, height, waste):
+        """Lowest fitness possible for a cuboid of the given height, with
+        at least the given support height and wasted volume
         """
-        skyline_r = skyline[-1].right
-        skyline_l = skyline[0].left
+        raise NotImplementedError
 
-        # Placements using skyline segment left point
-        ppointsl = (s.left for s in skyline if s.left+width <= skyline_r)
+    def _reported_fitness(self, fitness):
+        """Fitness value returned by placement for a _cub_fitness value"""
+        return fitness
 
-        # Placements using skyline segment right point
-        ppointsr = (s.right-width for s in skyline if s.right-width >= skyline_l)
+    def _tile_floor(self, cub):
+        """Split the floor into tiles tile_sides times wider than cub"""
+        side = self._tile_sides * max(cub.width, cub.depth)
+        self._tile_xs, self._tile_zs = [
+            _tile_edges(size, min(max(int(size / side), 1), self._max_tiles))
+            for size in (self.width, self.depth)]
+        self._tiles = [
+            [SurfaceTile(left, right, outeye, ineye)
+             for outeye, ineye in zip(self._tile_zs, self._tile_zs[1:])]
+            for left, right in zip(self._tile_xs, self._tile_xs[1:])]
+        self._corners = {}
+
+    def _tile_range(self, left, right, outeye, ineye):
+        """Tiles under a rectangle of the floor, (i0, i1, j0, j1) the
+        ranges of their indexes
+        """
+        return (bisect.bisect_right(self._tile_xs, left) - 1,
+                bisect.bisect_left(self._tile_xs, right),
+                bisect.bisect_right(self._tile_zs, outeye) - 1,
+                bisect.bisect_left(self._tile_zs, ineye))
+
+    def _support(self, left, right, outeye, ineye):
+        """Height of the highest cell under a rectangle"""
+        i0, i1, j0, j1 = self._tile_range(left, right, outeye, ineye)
+        return max([tile.max_height(left, right, outeye, ineye)
+                    for row in self._tiles[i0:i1] for tile in row[j0:j1]])
+
+    def _volume_below(self, left, right, outeye, ineye):
+        """Volume under the surface over a rectangle"""
+        i0, i1, j0, j1 = self._tile_range(left, right, outeye, ineye)
+        return sum([tile.volume(left, right, outeye, ineye)
+                    for row in self._tiles[i0:i1] for tile in row[j0:j1]])
+
+    def _wasted_volume(self, support, x, z, width, depth):
+        """Volume left between the surface and a cuboid placed at (x, z)"""
+        return (support * width * depth -
+                self._volume_below(x, x + width, z, z + depth))
+
+    def _tile_corners(self, i, j):
+        """Corners of the skyline in a tile, sorted
+
+        A corner is a cell with a wall or a higher cell on one side along x
+        and another one along z. The cuboids placed there rest against both,
+        on the cell corner between them.
 
-        # Merge positions
-        return heapq.merge(ppointsl, ppointsr)
+        Returns:
+            list: (height, z, x, right, front), the cell height and the
+                corner coordinates, right and front tell if the cuboid is
+                placed to the left of x and behind z instead.
 
-    def _generate_placements(self, width, height):
-        """Generate a list with
+        Kept until the tile or one of its four neighbours changes.
+        """
+        corners = self._corners.get((i, j))
+        if corners is not None:
+            return corners
+
+        tiles = self._tiles
+        tile = tiles[i][j]
+        xs, zs, heights = tile.xs, tile.zs, tile.heights
+        # The neighbour cells of each cell as (start, end) pairs, the
+        # heights across at its back or left end and at its front or right
+        # end. A cell on a tile side faces several cells of the neighbour
+        # tile, the corners at each end rest against a different one. None
+        # is a wall.
+        lefts = tiles[i-1][j].row_heights(-1, zs) if i else None
+        rights = (tiles[i+1][j].row_heights(0, zs)
+                  if i + 1 < len(tiles) else None)
+        backs = tiles[i][j-1].column_heights(-1, xs) if j else None
+        fronts = (tiles[i][j+1].column_heights(0, xs)
+                  if j + 1 < len(tiles[i]) else None)
+
+        corners = []
+        for a, row in enumerate(heights):
+            sides_x = (
+                [(v, v) for v in heights[a-1]] if a else lefts,
+                [(v, v) for v in heights[a+1]] if a + 1 < len(heights)
+                else rights)
+            for b, h in enumerate(row):
+                sides_z = (
+                    (row[b-1], row[b-1]) if b else
+                    (backs[a] if backs else None),
+                    (row[b+1], row[b+1]) if b + 1 < len(row) else
+                    (fronts[a] if fronts else None))
+                for front, side_z in enumerate(sides_z):
+                    for right, side_x in enumerate(sides_x):
+                        if side_z is not None and side_z[right] <= h:
+                            continue
+                        if side_x is not None and side_x[b][front] <= h:
+                            continue
+                        corners.append(Corner(
+                            h, zs[b + front], xs[a + right], bool(right),
+                            bool(front), xs[a+1] - xs[a], zs[b+1] - zs[b],
+                            *(tile.run(a, b, -1 if right else 1, 0) +
+                              tile.run(a, b, 0, -1 if front else 1))))
+        corners.sort(key=_corner_key)
+        self._corners[(i, j)] = corners
+        return corners
+
+    def _skyline_corners(self):
+        """Corners of the whole skyline, lowest first"""
+        return heapq.merge(*[self._tile_corners(i, j)
+                             for i in range(len(self._tiles))
+                             for j in range(len(self._tiles[i]))],
+                           key=_corner_key)
+
+    def _select_position(self, w, h, d, orientations=None):
+        """Find the position with the best fitness for a cuboid(w*h*d)
+
+        Ties are resolved preferring the lowest corner, then the one
+        closest to the bin back (lower z), then the leftmost one and then
+        the orientation first in ORIENTATIONS.
 
         Arguments:
-            skyline (list): SkylineHSegment list
-            width (number):
+            w (int, float): Cuboid width
+            h (int, float): Cuboid height
+            d (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
 
         Returns:
-            tuple (Rectangle, fitness):
-                Rectangle: Rectangle in valid position
-                left_skyline: Index for the skyline under the rectangle left edge.
-                right_skyline: Index for the skyline under the rectangle right edge.
-        """
-        skyline = self._skyline
-
-        points = collections.deque()
-
-        left_index = right_index = 0 # Left and right side skyline index
-        support_height = skyline[0].top
-        support_index = 0 
-    
-        placements = self._placement_points_generator(skyline, width)
-        for p in placements:
-
-            # If Rectangle's right side changed segment, find new support
-            if p+width > skyline[right_index].right:
-                for right_index in range(right_index+1, len(skyline)):
-                    if skyline[right_index].top >= support_height:
-                        support_index = right_index
-                        support_height = skyline[right_index].top
-                    if p+width <= skyline[right_index].right:
-                        break
-                
-            # If left side changed segment.
-            if p >= skyline[left_index].right:
-                left_index +=1
-           
-            # Find new support if the previous one was shifted out.
-            if support_index < left_index:
-                support_index = left_index
-                support_height = skyline[left_index].top
-                for i in range(left_index, right_index+1):
-                    if skyline[i].top >= support_height:
-                        support_index = i
-                        support_height = skyline[i].top
-
-            # Add point if there is enought room at the top
-            if support_height+height <= self.height:
-                points.append((Rectangle(p, support_height, width, height),\
-                    left_index, right_index))
-
-        return points
-
-    def _merge_skyline(self, skylineq, segment):
+            (cub, fitness)
+            cub (Cuboid): Placed Cuboid or None if was unable.
+            fitness (int, float, tuple): _cub_fitness of the position
         """
-        Arguments:
-            skylineq (collections.deque):
-            segment (HSegment):
-        """
-        if len(skylineq) == 0:
-            skylineq.append(segment)
-            return
+        dims = self._orientations(w, h, d, orientations)
+        if not dims:
+            return None, None
+        shortest = min(ch for _, ch, _ in dims)
+
+        # best is (fitness, order, cub), order the position of the candidate
+        # in the walk, to resolve the ties.
+        best = None
+        pits = []
+        order = 0
+        for corner in self._skyline_corners():
+            bottom, z, x, right, front = corner[:5]
+            if bottom + shortest > self.height:
+                break
+            if best is not None and \
+                    self._fitness_bound(bottom, shortest, 0) >= best[0]:
+                break
+            for cw, ch, cd in dims:
+                order += 1
+                left = x - cw if right else x
+                outeye = z - cd if front else z
+                if left < 0 or outeye < 0 or left + cw > self.width or \
+                        outeye + cd > self.depth:
+                    continue
+                # Longer than the cells along a side of the corner, the
+                # footprint covers the higher cell past them, and leaves
+                # wasted volume over the corner cell.
+                lowest = bottom
+                if corner.run_x is not None and cw > corner.run_x:
+                    lowest = max(lowest, corner.next_x)
+                if corner.run_z is not None and cd > corner.run_z:
+                    lowest = max(lowest, corner.next_z)
+                if lowest + ch > self.height:
+                    continue
+                waste = ((lowest - bottom) * min(cw, corner.width) *
+                         min(cd, corner.depth))
+                bound = self._fitness_bound(lowest, ch, waste)
+                candidate = (bound, order, left, outeye, cw, ch, cd)
+                if lowest > bottom:
+                    # Over a pit, scored last against the best position
+                    # found by then.
+                    pits.append(candidate)
+                elif best is None or bound < best[0]:
+                    best = self._better_position(best, *candidate[1:])
+
+        for candidate in pits:
+            if best is None or candidate[:2] < best[:2]:
+                best = self._better_position(best, *candidate[1:])
+
+        if best is None:
+            return None, None
+        return best[2], best[0]
 
-        if skylineq[-1].top == segment.top:
-            s = skylineq[-1]
-            skylineq[-1] = HSegment(s.start, s.length+segment.length)
-        else:
-            skylineq.append(segment)
+    def _better_position(self, best, order, x, z, width, height, depth):
+        """Score a position, and return it if better than best
 
-    def _add_skyline(self, rect):
-        """
         Arguments:
-            seg (Rectangle):
-        """
-        skylineq = collections.deque([]) # Skyline after adding new one
-        
-        for sky in self._skyline:
-            if sky.right <= rect.left or sky.left >= rect.right:
-                self._merge_skyline(skylineq, sky)
-                continue
-
-            if sky.left < rect.left and sky.right > rect.left:
-                # Skyline section partially under segment left
-                self._merge_skyline(skylineq, 
-                        HSegment(sky.start, rect.left-sky.left))
-                sky = HSegment(P(rect.left, sky.top), sky.right-rect.left)
-            
-            if sky.left < rect.right:
-                if sky.left == rect.left:
-                    self._merge_skyline(skylineq, 
-                        HSegment(P(rect.left, rect.top), rect.width))
-                # Skyline section partially under segment right
-                if sky.right > rect.right:
-                    self._merge_skyline(skylineq, 
-                        HSegment(P(rect.right, sky.top), sky.right-rect.right))
-                    sky = HSegment(sky.start, rect.right-sky.left)
-            
-            if sky.left >= rect.left and sky.right <= rect.right:
-                # Skyline section fully under segment, account for wasted space
-                if self._waste_management and sky.top < rect.bottom:
-                    self._waste.add_waste(sky.left, sky.top, 
-                        sky.length, rect.bottom - sky.top)
-            else:
-                # Segment
-                self._merge_skyline(skylineq, sky)
-
-        # Aaaaand ..... Done
-        self._skyline = list(skylineq)
-
-    def _rect_fitness(self, rect, left_index, right_index):
-        return rect.top
-
-    def _select_position(self, width, height):
-        """
-        Search for the placement with the bes fitness for the rectangle.
+            best (tuple): (fitness, order, cub) best position found, or None
+            order (int): Candidate order in the walk, ties go to the first
+            x (int, float): Position left side
+            z (int, float): Position outeye side
+            width, height, depth (int, float): Placed cuboid dims
 
         Returns:
-            tuple (Rectangle, fitness) - Rectangle placed in the fittest position
-            None - Rectangle couldn't be placed
+            tuple: (fitness, order, cub) of the best of both positions
         """
-        positions = self._generate_placements(width, height)
-        if self.rot and width != height:
-            positions += self._generate_placements(height, width)
-        if not positions:
-            return None, None
-        return min(((p[0], self._rect_fitness(*p))for p in positions), 
-                key=operator.itemgetter(1))
+        support = self._support(x, x + width, z, z + depth)
+        if support + height > self.height:
+            return best
+        fitness = self._cub_fitness(support, x, z, width, height, depth)
+        if best is not None and (fitness, order) >= best[:2]:
+            return best
+        return fitness, order, Cuboid(x, support, z, width, height, depth)
+
+    def _add_skyline(self, cub):
+        """Raise the surface under cub to its top
+
+        The space left under it is given to the waste manager when enabled.
+        """
+        if not self._tiled:
+            self._tile_floor(cub)
+            self._tiled = True
+
+        i0, i1, j0, j1 = self._tile_range(
+            cub.left, cub.right, cub.outeye, cub.ineye)
+        for i, j in itertools.product(range(i0, i1), range(j0, j1)):
+            tile = self._tiles[i][j]
+            waste = tile.raise_to(cub)
+            if self._waste_management:
+                for section in waste:
+                    self._waste.add_waste(*section)
+            # The corners of a neighbour tile only change with the cells
+            # along its side.
+            self._corners.pop((i, j), None)
+            if cub.left <= tile.xs[0]:
+                self._corners.pop((i - 1, j), None)
+            if cub.right >= tile.xs[-1]:
+                self._corners.pop((i + 1, j), None)
+            if cub.outeye <= tile.zs[0]:
+                self._corners.pop((i, j - 1), None)
+            if cub.ineye >= tile.zs[-1]:
+                self._corners.pop((i, j + 1), None)
+        self._found = {}
+
+    def placement(self, width, height, depth, orientations=None):
+        """Search the best position for a cuboid
+
+        If it fits in the wasted space the fitness is 0, free packing, and
+        the position is the waste manager Placement. Otherwise it is the
+        bounds of the cuboid placed on the surface.
 
-    def fitness(self, width, height):
-        """Search for the best fitness 
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            orientations (int): Cuboid orientation mask, None for any
+
+        Returns:
+            Placement: Cuboid fitness and position, see add_cub
+            None: Cuboid can't be placed
         """
-        assert(width > 0 and height >0)
-        if width > max(self.width, self.height) or\
-            height > max(self.height, self.width):
-            return None
+        assert(width > 0 and height > 0 and depth > 0)
 
-        # If there is room in wasted space, FREE PACKING!!
         if self._waste_management:
-            if self._waste.fitness(width, height) is not None:
-                return 0
+            waste = self._waste.placement(width, height, depth, orientations)
+            if waste is not None:
+                return self._placement(
+                    width, height, depth, orientations, 0, waste)
+
+        # Kept until the surface changes, the bins not selected are queried
+        # again with the same cuboids.
+        key = (width, height, depth, orientations)
+        if key not in self._found:
+            self._found[key] = self._select_position(
+                width, height, depth, orientations)
+        cub, fitness = self._found[key]
+        if cub is None:
+            return None
 
-        # Get best fitness segment, for normal rectangle, and for
-        # rotated rectangle if rotation is enabled.
-        rect, fitness = self._select_position(width, height)
-        return fitness
+        return self._placement(
+            width, height, depth, orientations,
+            self._reported_fitness(fitness),
+            (cub.x, cub.y, cub.z, cub.width, cub.height, cub.depth))
 
-    def add_rect(self, width, height, rid=None):
-        """
-        Add new rectangle
-        """
-        assert(width > 0 and height > 0)
-        if width > max(self.width, self.height) or\
-            height > max(self.height, self.width):
-            return None
+    def add_cub(self, width, height, depth, rid=None, orientations=None,
+                placement=None):
+        """Add cuboid of widthxheightxdepth dimensions.
 
-        rect = None
-        # If Waste managment is enabled, first try to place the rectangle there
-        if self._waste_management:
-            rect = self._waste.add_rect(width, height, rid)
+        Arguments:
+            width (int, float): Cuboid width
+            height (int, float): Cuboid height
+            depth (int, float): Cuboid depth
+            rid: Optional cuboid user id
+            orientations (int): Cuboid orientation mask, None for any
+            placement (Placement): Optional placement() result, the cuboid
+                is placed there without searching if still valid.
 
-        # Get best possible rectangle position
-        if not rect:
-            rect, _ = self._select_position(width, height)
-            if rect:
-                self._add_skyline(rect)
+        Returns:
+            Cuboid: Cuboid with placement coordinates
+            None: If the cuboid couldn't be placed.
+        """
+        assert(width > 0 and height > 0 and depth > 0)
+
+        position = self._placed_position(
+            placement, width, height, depth, orientations)
+        if position is None:
+            placement = self.placement(width, height, depth, orientations)
+            if placement is None:
+                return None
+            position = placement.position
+
+        if isinstance(position, Placement):
+            # Free packing in the waste, the surface doesn't change
+            cub = self._waste.add_cub(
+                width, height, depth, rid, orientations, placement=position)
+        else:
+            cub = Cuboid(*position)
+            self._add_skyline(cub)
 
-        if rect is None:
-            return None
-        
-        # Store rectangle, and recalculate skyline
-        rect.rid = rid
-        self.rectangles.append(rect)
-        return rect
+        # Store and return cuboid position.
+        cub.rid = rid
+        self._store_cub(cub)
+        return cub
 
     def reset(self):
         super(Skyline, self).reset()
-        self._skyline = [HSegment(P(0, 0), self.width)]
+        # A single tile until the first cuboid sets the tile size
+        self._tiled = False
+        self._tile_xs = [0, self.width]
+        self._tile_zs = [0, self.depth]
+        self._tiles = [[SurfaceTile(0, self.width, 0, self.depth)]]
+        self._corners = {}
+        self._found = {}
         self._waste.reset()
 
 
-
-
 class SkylineWMixin(Skyline):
     """Waste managment mixin"""
-    def __init__(self, width, height, *args, **kwargs):
-        super(SkylineWMixin, self).__init__(width, height, *args, **kwargs)
+    def __init__(self, width, height, depth, *args, **kwargs):
+        super(SkylineWMixin, self).__init__(
+            width, height, depth, *args, **kwargs)
         self._waste_management = True
 
 
 class SkylineMwf(Skyline):
-    """Implements Min Waste fit heuristic, minimizing the area wasted under the
-    rectangle.
+    """Implements Min Waste fit heuristic, minimizing the volume wasted
+    under the cuboid.
     """
-    def _rect_fitness(self, rect, left_index, right_index):
-        waste = 0
-        for seg in self._skyline[left_index:right_index+1]:
-            waste +=\
-                (min(rect.right, seg.right)-max(rect.left, seg.left)) *\
-                (rect.bottom-seg.top)
+    def _cub_fitness(self, support, x, z, width, height, depth):
+        return self._wasted_volume(support, x, z, width, depth)
 
+    def _fitness_bound(self, support, height, waste):
         return waste
 
-    def _rect_fitnes2s(self, rect, left_index, right_index):
-        waste = ((min(rect.right, seg.right)-max(rect.left, seg.left)) for seg in self._skyline[left_index:right_index+1])
-        return sum(waste)
 
 class SkylineMwfl(Skyline):
-    """Implements Min Waste fit with low profile heuritic, minimizing the area
-    wasted below the rectangle, at the same time it tries to keep the height
-    minimal.
-    """ 
-    def _rect_fitness(self, rect, left_index, right_index):
-        waste = 0
-        for seg in self._skyline[left_index:right_index+1]:
-            waste +=\
-                (min(rect.right, seg.right)-max(rect.left, seg.left)) *\
-                (rect.bottom-seg.top)
+    """Implements Min Waste fit with low profile heuritic, minimizing the
+    volume wasted below the cuboid, at the same time it tries to keep the
+    height minimal.
+
+    The positions are compared by wasted volume and then by top height,
+    the fitness reported folds both into waste*bin volume + top.
+    """
+    def _cub_fitness(self, support, x, z, width, height, depth):
+        waste = self._wasted_volume(support, x, z, width, depth)
+        return waste, support + height
 
-        return waste*self.width*self.height+rect.top
+    def _fitness_bound(self, support, height, waste):
+        return waste, support + height
+
+    def _reported_fitness(self, fitness):
+        waste, top = fitness
+        return waste * self.width * self.height * self.depth + top
 
 
 class SkylineBl(Skyline):
     """Implements Bottom Left heuristic, the best fit option is that which
-    results in which the top side of the rectangle lies at the bottom-most 
+    results in which the top side of the cuboid lies at the bottom-most
     position.
     """
-    def _rect_fitness(self, rect, left_index, right_index):
-        return rect.top
-
+    def _cub_fitness(self, support, x, z, width, height, depth):
+        return support + height
 
+    def _fitness_bound(self, support, height, waste):
+        return support + height
 
 
 class SkylineBlWm(SkylineBl, SkylineWMixin):
     pass
 
+
 class SkylineMwfWm(SkylineMwf, SkylineWMixin):
     pass
 
+
 class SkylineMwflWm(SkylineMwfl, SkylineWMixin):
     pass
@@ -0,0 +1,577 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import heapq
+import math
+
+
+class LooseOctree(object):
+    """Loose octree over the cuboids inside a volume
+
+    Each level divides the volume into 2**level cells per axis, only the
+    non-empty cells are stored (one dict per level). A cuboid is kept in the
+    cell containing its center at the deepest level where the cells are at
+    least as big as the cuboid, so it never goes further than half a cell
+    outside of it (loose cells). Queries only visit the cells whose loose
+    bounds touch the query box, which keeps them close to O(log n + k)
+    instead of scanning every cuboid.
+
+    Items are stored under a hashable key chosen by the caller, queries
+    return those keys.
+    """
+
+    def __init__(self, width, height, depth, max_level=10):
+        """Arguments:
+
+            width (int, float): Indexed volume width
+            height (int, float): Indexed volume height
+            depth (int, float): Indexed volume depth
+            max_level (int): Deepest level
+        """
+        self._size = (float(width) or 1.0, float(height) or 1.0,
+                      float(depth) or 1.0)
+        self._max_level = max_level
+        self._levels = [{} for _ in range(max_level + 1)]
+        # key -> (cuboid, level, cell)
+        self._items = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def _level(self, cub):
+        """Deepest level whose cells are not smaller than cub"""
+        level = self._max_level
+        for size, side in zip(self._size, (cub.width, cub.height, cub.depth)):
+            side = float(side)
+            if side > 0:
+                level = min(level, int(math.floor(math.log(size/side, 2))))
+        return max(level, 0)
+
+    def _cell(self, level, x, y, z):
+        """Cell containing a point at the given level"""
+        cells = 1 << level
+        return tuple(
+            min(max(int(math.floor(float(c) * cells / size)), 0), cells - 1)
+            for c, size in zip((x, y, z), self._size))
+
+    def _cell_range(self, level, bounds):
+        """Cells per axis whose loose bounds touch bounds (closed)"""
+        cells = 1 << level
+        ranges = []
+        for lo, hi, size in zip(bounds[:3], bounds[3:], self._size):
+            lo = float(lo) * cells / size
+            hi = float(hi) * cells / size
+            ranges.append((max(int(math.floor(lo - 0.5)) - 1, 0),
+                           min(int(math.floor(hi + 0.5)) + 1, cells - 1)))
+        return ranges
+
+    def insert(self, key, cub):
+        """Add a cuboid to the index
+
+        Arguments:
+            key (hashable): Item key, returned by queries
+            cub (Cuboid): Item cuboid
+        """
+        if key in self._items:
+            self.remove(key)
+
+        level = self._level(cub)
+        cell = self._cell(level, (cub.x + cub.right) / 2,
+                          (cub.y + cub.top) / 2, (cub.z + cub.ineye) / 2)
+        self._levels[level].setdefault(cell, {})[key] = cub
+        self._items[key] = (cub, level, cell)
+
+    def remove(self, key):
+        """Remove a cuboid from the index
+
+        Arguments:
+            key (hashable): Item key
+        """
+        _, level, cell = self._items.pop(key)
+        cells = self._levels[level]
+        del cells[cell][key]
+        if not cells[cell]:
+            del cells[cell]
+
+    def get(self, key):
+        """Cuboid stored under key"""
+        return self._items[key][0]
+
+    def _candidates(self, bounds):
+        """Items in the loose cells touching bounds
+
+        Arguments:
+            bounds (tuple): (left, bottom, outeye, right, top, ineye)
+
+        Returns:
+            generator: (key, cuboid) tuples
+        """
+        for level, cells in enumerate(self._levels):
+            if not cells:
+                continue
+
+            (x0, x1), (y0, y1), (z0, z1) = self._cell_range(level, bounds)
+            if (x1-x0+1) * (y1-y0+1) * (z1-z0+1) > len(cells):
+                # Fewer cells in use than in range, filter them instead
+                for (i, j, k), items in cells.items():
+                    if x0 <= i <= x1 and y0 <= j <= y1 and z0 <= k <= z1:
+                        for item in items.items():
+                            yield item
+                continue
+
+            for i in range(x0, x1 + 1):
+                for j in range(y0, y1 + 1):
+                    for k in range(z0, z1 + 1):
+                        items = cells.get((i, j, k))
+                        if items:
+                            for item in items.items():
+                                yield item
+
+    def overlapping(self, cub):
+        """Keys of the cuboids intersecting cub (see Cuboid.intersects)"""
+        bounds = (cub.x, cub.y, cub.z, cub.right, cub.top, cub.ineye)
+        return [k for k, c in self._candidates(bounds) if c.intersects(cub)]
+
+    def touching(self, cub):
+        """Keys of the cuboids intersecting or touching cub by a face or edge
+        (see Cuboid.intersects with edges=True)
+        """
+        bounds = (cub.x, cub.y, cub.z, cub.right, cub.top, cub.ineye)
+        return [k for k, c in self._candidates(bounds)
+                if c.intersects(cub, edges=True)]
+
+    def containing(self, cub):
+        """Keys of the cuboids containing cub"""
+        bounds = (cub.x, cub.y, cub.z, cub.right, cub.top, cub.ineye)
+        return [k for k, c in self._candidates(bounds) if c.contains(cub)]
+
+    def contained(self, cub):
+        """Keys of the cuboids contained by cub"""
+        bounds = (cub.x, cub.y, cub.z, cub.right, cub.top, cub.ineye)
+        return [k for k, c in self._candidates(bounds) if cub.contains(c)]
+
+    def below(self, cub):
+        """Keys of the cuboids directly below cub
+
+        Those whose top face is at cub bottom and share some area with it.
+        """
+        bounds = (cub.x, cub.y, cub.z, cub.right, cub.y, cub.ineye)
+        return [k for k, c in self._candidates(bounds)
+                if c.top == cub.y and c.x < cub.right and cub.x < c.right and
+                c.z < cub.ineye and cub.z < c.ineye]
+
+
+def _exponent(value):
+    """Binary exponent of a dimension, monotone with the value"""
+    return math.frexp(float(value))[1] if value > 0 else -1100
+
+
+class DominanceIndex(object):
+    """Index of cuboids by their dimensions
+
+    Finds the cuboids with width >= w, height >= h and depth >= d without
+    visiting most of the rest. Cuboids are bucketed by the binary exponent
+    of their three dimensions: buckets with some exponent smaller than the
+    query one hold no feasible cuboid and are skipped, buckets with all
+    exponents greater only hold feasible ones, and only the dimensions with
+    equal exponents need to be checked.
+
+    Items are stored under a hashable key chosen by the caller.
+    """
+
+    def __init__(self):
+        # exponents -> {key: cuboid}
+        self._buckets = {}
+        # key -> exponents
+        self._items = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def insert(self, key, cub):
+        """Add a cuboid to the index
+
+        Arguments:
+            key (hashable): Item key
+            cub (Cuboid): Item cuboid
+        """
+        if key in self._items:
+            self.remove(key)
+
+        exps = (_exponent(cub.width), _exponent(cub.height),
+                _exponent(cub.depth))
+        self._buckets.setdefault(exps, {})[key] = cub
+        self._items[key] = exps
+
+    def remove(self, key):
+        """Remove a cuboid from the index
+
+        Arguments:
+            key (hashable): Item key
+        """
+        exps = self._items.pop(key)
+        bucket = self._buckets[exps]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[exps]
+
+    def get(self, key):
+        """Cuboid stored under key"""
+        return self._buckets[self._items[key]][key]
+
+    def feasible(self, width, height, depth):
+        """Cuboids big enough to hold a width x height x depth cuboid
+
+        Arguments:
+            width (int, float): Min width
+            height (int, float): Min height
+            depth (int, float): Min depth
+
+        Returns:
+            generator: (key, cuboid) tuples
+        """
+        ew, eh, ed = _exponent(width), _exponent(height), _exponent(depth)
+
+        for (bw, bh, bd), bucket in self._buckets.items():
+            if bw < ew or bh < eh or bd < ed:
+                continue
+
+            if bw > ew and bh > eh and bd > ed:
+                for item in bucket.items():
+                    yield item
+                continue
+
+            for key, c in bucket.items():
+                if c.width >= width and c.height >= height and \
+                        c.depth >= depth:
+                    yield key, c
+
+
+class VolumeIndex(object):
+    """Index of cuboids by their volume
+
+    Cuboids are bucketed by the binary exponent of their dimensions as in
+    DominanceIndex, and each bucket is a list sorted by (volume, key). The
+    cuboids big enough for some dimensions are walked in increasing volume
+    order, merging the buckets that can hold them from a binary search for
+    the min volume. It has the DominanceIndex interface, feasible walks up
+    from the query volume.
+
+    Items are stored under a hashable, orderable key chosen by the caller.
+    """
+
+    def __init__(self):
+        # exponents -> [(volume, key)] sorted
+        self._buckets = {}
+        # key -> (exponents, volume, cuboid)
+        self._items = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def insert(self, key, cub):
+        """Add a cuboid to the index
+
+        Arguments:
+            key (hashable): Item key
+            cub (Cuboid): Item cuboid
+        """
+        if key in self._items:
+            self.remove(key)
+
+        exps = (_exponent(cub.width), _exponent(cub.height),
+                _exponent(cub.depth))
+        volume = cub.volume()
+        bisect.insort(self._buckets.setdefault(exps, []), (volume, key))
+        self._items[key] = (exps, volume, cub)
+
+    def remove(self, key):
+        """Remove a cuboid from the index
+
+        Arguments:
+            key (hashable): Item key
+        """
+        exps, volume, _ = self._items.pop(key)
+        bucket = self._buckets[exps]
+        del bucket[bisect.bisect_left(bucket, (volume, key))]
+        if not bucket:
+            del self._buckets[exps]
+
+    def get(self, key):
+        """Cuboid stored under key"""
+        return self._items[key][2]
+
+    def _walk(self, bucket, volume, width, height, depth, check):
+        """Items of a bucket with at least volume, checking the dimensions
+        only if check is set
+        """
+        items = self._items
+        for i in range(bisect.bisect_left(bucket, (volume,)), len(bucket)):
+            vol, key = bucket[i]
+            c = items[key][2]
+            if not check or (c.width >= width and c.height >= height and
+                             c.depth >= depth):
+                yield vol, key, c
+
+    def ascending(self, volume, width=0, height=0, depth=0):
+        """Cuboids with at least volume and dimensions, smallest volume and
+        key first
+
+        The index must not change while the generator is used.
+
+        Arguments:
+            volume (int, float): Min volume
+            width (int, float): Min width
+            height (int, float): Min height
+            depth (int, float): Min depth
+
+        Returns:
+            generator: (volume, key, cuboid) tuples
+        """
+        ew, eh, ed = _exponent(width), _exponent(height), _exponent(depth)
+
+        walks = []
+        for (bw, bh, bd), bucket in self._buckets.items():
+            if bw < ew or bh < eh or bd < ed:
+                continue
+            check = not (bw > ew and bh > eh and bd > ed)
+            walks.append(self._walk(bucket, volume, width, height, depth,
+                                    check))
+
+        if len(walks) == 1:
+            return walks[0]
+        return heapq.merge(*walks)
+
+    def feasible(self, width, height, depth):
+        """Cuboids big enough to hold a width x height x depth cuboid
+
+        Arguments:
+            width (int, float): Min width
+            height (int, float): Min height
+            depth (int, float): Min depth
+
+        Returns:
+            generator: (key, cuboid) tuples, by increasing volume
+        """
+        for _, key, c in self.ascending(width * height * depth, width,
+                                        height, depth):
+            yield key, c
+
+
+# The two axes perpendicular to each axis
+_OTHER_AXES = ((1, 2), (0, 2), (0, 1))
+
+
+class ColumnIndex(object):
+    """Index of cuboids for axis aligned ray queries
+
+    Along each axis the volume is divided into a grid of columns, cells of
+    the plane of the other two axes. A cuboid is listed in every column its
+    cross section overlaps, twice: sorted by its low and by its high
+    coordinate along the axis. A ray only visits the column of its origin,
+    bisecting to the origin and stopping at the first cuboid crossed, and
+    box queries only the few cuboids of the columns under the box whose
+    range along the axis can reach it.
+
+    The cells side follows the mean side of the cuboids stored, so each one
+    spans a few columns whatever the volume size, the columns are rebuilt
+    when it drifts by a factor of two.
+
+    Items are stored under a hashable key chosen by the caller, and can't be
+    removed.
+    """
+
+    def __init__(self, width, height, depth, max_cells=64):
+        """Arguments:
+
+            width (int, float): Indexed volume width
+            height (int, float): Indexed volume height
+            depth (int, float): Indexed volume depth
+            max_cells (int): Maximum columns per side of each grid
+        """
+        self._size = (float(width) or 1.0, float(height) or 1.0,
+                      float(depth) or 1.0)
+        self._max_cells = max_cells
+        # key -> (cuboid, low corner, high corner)
+        self._items = {}
+        # Longest cuboid side, and sum of the sides, along each axis
+        self._longest = [0, 0, 0]
+        self._sides = [0, 0, 0]
+        self._build((1, 1, 1))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def _build(self, cells):
+        """Rebuild the columns with a number of cells along each axis"""
+        self._cells = cells
+        # Cells per unit along each axis
+        self._scale = tuple(c / size for c, size in zip(cells, self._size))
+        # Per axis, column -> (lows, low keys, highs, high keys)
+        self._columns = ({}, {}, {})
+        for key, (_, low, high) in self._items.items():
+            self._add(key, low, high)
+
+    def _target_cells(self):
+        """Number of cells along each axis about the mean cuboid side"""
+        cells = []
+        for size, sides in zip(self._size, self._sides):
+            if sides:
+                n = int(size * len(self._items) / float(sides))
+            else:
+                n = self._max_cells
+            cells.append(min(max(n, 1), self._max_cells))
+        return tuple(cells)
+
+    def _cell(self, value, axis):
+        """Grid cell of a coordinate along axis"""
+        # Truncating is flooring but for negatives, clamped to 0 anyway
+        cell = int(float(value) * self._scale[axis])
+        return min(max(cell, 0), self._cells[axis] - 1)
+
+    def _column_range(self, low, high, axis):
+        """Columns along axis under the cross section from low to high"""
+        a, b = _OTHER_AXES[axis]
+        cells_b = range(self._cell(low[b], b), self._cell(high[b], b) + 1)
+        return [(i, j)
+                for i in range(self._cell(low[a], a),
+                               self._cell(high[a], a) + 1)
+                for j in cells_b]
+
+    def _add(self, key, low, high):
+        """List an item in the columns under it along each axis"""
+        for axis in range(3):
+            columns = self._columns[axis]
+            for column in self._column_range(low, high, axis):
+                lows, low_keys, highs, high_keys = columns.setdefault(
+                    column, ([], [], [], []))
+                i = bisect.bisect_right(lows, low[axis])
+                lows.insert(i, low[axis])
+                low_keys.insert(i, key)
+                i = bisect.bisect_right(highs, high[axis])
+                highs.insert(i, high[axis])
+                high_keys.insert(i, key)
+
+    def insert(self, key, cub):
+        """Add a cuboid to the index
+
+        Arguments:
+            key (hashable): Item key, not in the index
+            cub (Cuboid): Item cuboid
+        """
+        low = (cub.x, cub.y, cub.z)
+        high = (cub.right, cub.top, cub.ineye)
+        self._items[key] = (cub, low, high)
+        for axis in range(3):
+            self._longest[axis] = max(self._longest[axis],
+                                      high[axis] - low[axis])
+            self._sides[axis] += high[axis] - low[axis]
+
+        cells = self._target_cells()
+        if any(c >= 2*old or 2*c <= old
+               for c, old in zip(cells, self._cells)):
+            self._build(cells)
+        else:
+            self._add(key, low, high)
+
+    def get(self, key):
+        """Cuboid stored under key"""
+        return self._items[key][0]
+
+    def ray(self, point, axis, forward=True):
+        """First cuboid face crossed by an axis aligned ray
+
+        The ray starts at point and goes along axis, towards greater
+        coordinates when forward is True. Only the cuboids whose cross
+        section contains the point (closed at the low side, open at the high
+        one) and are fully ahead of it are crossed.
+
+        Arguments:
+            point (tuple): (x, y, z) ray origin
+            axis (int): 0 for x, 1 for y and 2 for z
+            forward (bool): Ray direction
+
+        Returns:
+            int, float: Coordinate of the face hit along axis
+            None: No cuboid is hit
+        """
+        a, b = _OTHER_AXES[axis]
+        column = self._columns[axis].get(
+            (self._cell(point[a], a), self._cell(point[b], b)))
+        if column is None:
+            return None
+
+        lows, low_keys, highs, high_keys = column
+        if forward:
+            faces, keys = lows, low_keys
+            start = bisect.bisect_left(lows, point[axis])
+            order = range(start, len(lows))
+        else:
+            faces, keys = highs, high_keys
+            start = bisect.bisect_right(highs, point[axis])
+            order = range(start - 1, -1, -1)
+
+        pa, pb = point[a], point[b]
+        items = self._items
+        for i in order:
+            _, low, high = items[keys[i]]
+            if low[a] <= pa < high[a] and low[b] <= pb < high[b]:
+                return faces[i]
+        return None
+
+    def at(self, point):
+        """Keys of the cuboids containing point
+
+        Cuboids are closed at their low faces and open at the high ones.
+
+        Arguments:
+            point (tuple): (x, y, z)
+        """
+        column = self._columns[0].get(
+            (self._cell(point[1], 1), self._cell(point[2], 2)))
+        if column is None:
+            return []
+
+        lows, low_keys = column[:2]
+        keys = []
+        for i in range(bisect.bisect_right(lows, point[0]) - 1, -1, -1):
+            if lows[i] + self._longest[0] <= point[0]:
+                break
+            _, low, high = self._items[low_keys[i]]
+            if all(low[a] <= point[a] < high[a] for a in range(3)):
+                keys.append(low_keys[i])
+        return keys
+
+    def overlapping(self, cub):
+        """Keys of the cuboids intersecting cub (see Cuboid.intersects)"""
+        low = (cub.x, cub.y, cub.z)
+        high = (cub.right, cub.top, cub.ineye)
+
+        keys = set()
+        for column in self._column_range(low, high, 0):
+            column = self._columns[0].get(column)
+            if column is None:
+                continue
+            lows, low_keys = column[:2]
+            for i in range(bisect.bisect_left(lows, high[0]) - 1, -1, -1):
+                if lows[i] + self._longest[0] <= low[0]:
+                    break
+                key = low_keys[i]
+                if key not in keys and self._items[key][0].intersects(cub):
+                    keys.add(key)
+        return list(keys)
@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 
 from cubspack.geometry import Cuboid
-from cubspack.guillotine import GuillotineBafMinas
+from cubspack.guillotine import GuillotineBvfMinas
 
 
-class WasteManager(GuillotineBafMinas):
+class WasteManager(GuillotineBvfMinas):
+    """Free sections wasted by another packing algorithm, to be reused
+
+    The waste sections are joined on insertion with the ones sharing a
+    whole face, and indexed by volume in size buckets (see VolumeIndex), a
+    placement walks up from the cuboid volume to the first section holding
+    it instead of scoring every section.
+    """
 
     def __init__(self, rot=True, merge=True, *args, **kwargs):
         super(WasteManager, self).__init__(
@@ -22,4 +29,4 @@ class WasteManager(GuillotineBafMinas):
 
     def reset(self):
         super(WasteManager, self).reset()
-        self._sections = []
+        self._reset_sections()
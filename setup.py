@@ -43,7 +43,7 @@ setup(
 
     # package
     packages=['cubspack'],
-    install_requires=['nose', 'unittest2'],
+    install_requires=['nose', 'numpy', 'unittest2'],
     zip_safe=False,
 
     # Tests
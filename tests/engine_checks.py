@@ -0,0 +1,98 @@
+import decimal
+import random
+
+from cubspack.geometry import Cuboid
+from cubspack.pack_algo import ROT_ALL
+from cubspack.pack_algo import ROT_UPRIGHT
+import cubspack.packer as packer
+
+
+def random_cubs(num, max_side=12):
+    return [(random.randint(1, max_side), random.randint(1, max_side),
+             random.randint(1, max_side)) for _ in range(num)]
+
+
+class EngineChecks(object):
+    """Checks every packing engine passes, mixed into its TestCase
+
+    The TestCase sets module and prefix, the engine classes being
+    getattr(module, prefix + variant) for each of the variants.
+    """
+
+    module = None
+    prefix = ''
+    variants = ('',)
+    seed = 0
+    # Fraction of the 30x30x30 bin a random load must fill
+    fill = 0.4
+
+    def algo(self, variant):
+        return getattr(self.module, self.prefix + variant)
+
+    def validate_cubs(self):
+        """Random load for test_validate"""
+        return random_cubs(150)
+
+    def test_validate(self):
+        random.seed(self.seed)
+        for name in self.variants:
+            for rot in (True, False, ROT_ALL):
+                b = self.algo(name)(30, 30, 30, rot=rot)
+                for w, h, d in self.validate_cubs():
+                    fitness = b.fitness(w, h, d)
+                    c = b.add_cub(w, h, d)
+                    self.assertEqual(fitness is None, c is None)
+                b.validate_packing()
+                self.assertGreater(b.used_volume(), 30*30*30*self.fill)
+
+    def test_orientations(self):
+        b = self.algo(self.variants[-1])(2, 2, 10, rot=ROT_ALL)
+        self.assertIsNone(b.add_cub(2, 10, 2, orientations=ROT_UPRIGHT))
+        c = b.add_cub(10, 2, 2, orientations=ROT_UPRIGHT)
+        self.assertEqual((c.width, c.height, c.depth), (2, 2, 10))
+
+    def test_placement(self):
+        b = self.algo(self.variants[-1])(10, 10, 10)
+        b.add_cub(3, 4, 5)
+        p = b.placement(2, 2, 2)
+        self.assertEqual(p.fitness, b.fitness(2, 2, 2))
+        c = b.add_cub(2, 2, 2, placement=p)
+        self.assertEqual(c, Cuboid(*p.position))
+
+        # Stale after another cuboid is added
+        p = b.placement(2, 2, 2)
+        b.add_cub(1, 1, 1)
+        self.assertIsNone(b._placed_position(p, 2, 2, 2))
+
+    def test_decimal(self):
+        D = decimal.Decimal
+        b = self.algo(self.variants[-1])(D('10.5'), D('3.3'), D('2'),
+                                         rot=False)
+        for _ in range(4):
+            self.assertIsNotNone(b.add_cub(D('2.625'), D('3.3'), D('2')))
+        self.assertIsNone(b.add_cub(D('0.1'), D('0.1'), D('0.1')))
+        self.assertEqual(b[3].x, D('7.875'))
+        b.validate_packing()
+
+    def test_packer_modes(self):
+        random.seed(self.seed)
+        cubs = [(4, 3, 5)] * 60 + random_cubs(20)
+        for mode in (packer.PackingMode.Online, packer.PackingMode.Offline):
+            for bin_algo in (packer.PackingBin.BNF, packer.PackingBin.BFF,
+                             packer.PackingBin.BBF, packer.PackingBin.Global):
+                if mode == packer.PackingMode.Online and \
+                        bin_algo == packer.PackingBin.Global:
+                    continue
+                p = packer.newPacker(
+                    mode=mode, bin_algo=bin_algo,
+                    pack_algo=self.algo(self.variants[-1]))
+                p.add_bin(20, 20, 20, count=10)
+                for i, c in enumerate(cubs):
+                    p.add_cub(*c, rid=i)
+                if mode == packer.PackingMode.Offline:
+                    p.pack()
+
+                self.assertEqual(sorted(c[7] for c in p.cub_list()),
+                                 list(range(len(cubs))))
+                for b in p:
+                    b.validate_packing()
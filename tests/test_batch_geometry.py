@@ -0,0 +1,71 @@
+from unittest import TestCase
+import decimal
+import random
+
+from cubspack.geometry import batch_contains
+from cubspack.geometry import batch_intersection
+from cubspack.geometry import batch_intersects
+from cubspack.geometry import Cuboid
+from cubspack.geometry import cuboid_bounds
+from cubspack.geometry import CuboidArray
+
+
+def random_cuboids(num, max_coord=4, max_side=3):
+    return [Cuboid(random.randint(0, max_coord), random.randint(0, max_coord),
+                   random.randint(0, max_coord), random.randint(0, max_side),
+                   random.randint(0, max_side), random.randint(0, max_side))
+            for _ in range(num)]
+
+
+class TestBatchKernels(TestCase):
+
+    def setUp(self):
+        random.seed(42)
+        # Small coordinates so edges and corners touch frequently
+        self.a = random_cuboids(60)
+        self.b = random_cuboids(70)
+
+    def test_bounds(self):
+        c = Cuboid(1, 2, 3, 4, 5, 6)
+        self.assertEqual(cuboid_bounds(c).tolist(), [1, 2, 3, 5, 7, 9])
+        self.assertEqual(cuboid_bounds([c, c]).shape, (2, 6))
+        self.assertEqual(cuboid_bounds([]).shape, (0, 6))
+        self.assertEqual(CuboidArray([c]).bounds().tolist(),
+                         [[1, 2, 3, 5, 7, 9]])
+
+    def test_intersects(self):
+        for edges in (False, True):
+            matrix = batch_intersects(self.a, self.b, edges=edges)
+            self.assertEqual(matrix.shape, (len(self.a), len(self.b)))
+            for i, c1 in enumerate(self.a):
+                row = batch_intersects(c1, self.b, edges=edges)
+                expected = [c1.intersects(c2, edges=edges) for c2 in self.b]
+                self.assertEqual(row.tolist(), expected)
+                self.assertEqual(matrix[i].tolist(), expected)
+
+    def test_contains(self):
+        matrix = batch_contains(self.a, self.b)
+        for i, c1 in enumerate(self.a):
+            expected = [c1.contains(c2) for c2 in self.b]
+            self.assertEqual(batch_contains(c1, self.b).tolist(), expected)
+            self.assertEqual(matrix[i].tolist(), expected)
+
+    def test_intersection(self):
+        for edges in (False, True):
+            mask, boxes = batch_intersection(self.a, self.b, edges=edges)
+            for i, c1 in enumerate(self.a):
+                for j, c2 in enumerate(self.b):
+                    inter = c1.intersection(c2, edges=edges)
+                    self.assertEqual(mask[i, j], inter is not None)
+                    if inter is not None:
+                        self.assertEqual(boxes[i, j].tolist(),
+                                         cuboid_bounds(inter).tolist())
+
+    def test_decimal(self):
+        d = decimal.Decimal
+        c1 = Cuboid(d('0.1'), d('0.1'), d('0.1'), d('0.2'), d('0.2'), d('0.2'))
+        c2 = Cuboid(d('0.3'), d('0.1'), d('0.1'), d('0.2'), d('0.2'), d('0.2'))
+        self.assertEqual(batch_intersects(c1, [c2]).tolist(), [False])
+        self.assertEqual(batch_intersects(c1, [c2], edges=True).tolist(),
+                         [True])
+        self.assertEqual(batch_contains(c1, [c1, c2]).tolist(), [True, False])
@@ -0,0 +1,133 @@
+from unittest import TestCase
+import random
+
+from cubspack.geometry import Cuboid
+import cubspack.blocks as blocks
+
+from tests.engine_checks import EngineChecks
+from tests.engine_checks import random_cubs
+
+
+VARIANTS = ('', 'Bl', 'Bssf', 'Baf', 'Blsf')
+
+
+class TestBlock(TestCase):
+
+    def test_cells(self):
+        b = blocks.Block(1, 2, 3, 2, 3, 4, 2, 2, 3)
+        self.assertEqual(len(b), 12)
+        self.assertEqual(b.bounds(), Cuboid(1, 2, 3, 4, 6, 12))
+        cells = []
+        while not b.full():
+            cells.append(b.cell())
+            b.used += 1
+        # Along x, then z, then the next layer up
+        self.assertEqual(cells[:3], [Cuboid(1, 2, 3, 2, 3, 4),
+                                     Cuboid(3, 2, 3, 2, 3, 4),
+                                     Cuboid(1, 2, 7, 2, 3, 4)])
+        self.assertEqual(cells[6], Cuboid(1, 5, 3, 2, 3, 4))
+        self.assertEqual(len(set(cells)), 12)
+
+    def test_free(self):
+        b = blocks.Block(0, 0, 0, 1, 1, 1, 3, 3, 3)
+        self.assertEqual(b.free(), [Cuboid(0, 0, 0, 3, 3, 3)])
+        b.used = 4
+        self.assertEqual(b.free(), [Cuboid(1, 0, 1, 2, 1, 1),
+                                    Cuboid(0, 0, 2, 3, 1, 1),
+                                    Cuboid(0, 1, 0, 3, 2, 3)])
+        b.used = 9
+        self.assertEqual(b.free(), [Cuboid(0, 1, 0, 3, 2, 3)])
+        b.used = 26
+        self.assertEqual(b.free(), [Cuboid(2, 2, 2, 1, 1, 1)])
+
+        # The free cuboids cover exactly the empty cells
+        for used in range(27):
+            b.used = used
+            self.assertEqual(sum(c.volume() for c in b.free()), 27 - used)
+
+
+class TestBlocks(EngineChecks, TestCase):
+
+    module = blocks
+    prefix = 'Blocks'
+    variants = VARIANTS
+    seed = 59
+
+    def validate_cubs(self):
+        # Repeated cuboids, to fill the blocks opened
+        cubs = random_cubs(100, max_side=10)
+        return cubs + random.sample(cubs * 3, 200)
+
+    def test_block(self):
+        b = blocks.BlocksBl(10, 10, 10, rot=False)
+        self.assertEqual(b.add_cub(4, 3, 5), Cuboid(0, 0, 0, 4, 3, 5))
+        # The whole 2x3x2 block is taken from the free space
+        self.assertEqual(sorted(b._max_cubs.values()),
+                         sorted([Cuboid(8, 0, 0, 2, 10, 10),
+                                 Cuboid(0, 9, 0, 10, 1, 10)]))
+        self.assertEqual(b.add_cub(4, 3, 5), Cuboid(4, 0, 0, 4, 3, 5))
+        self.assertEqual(b.add_cub(4, 3, 5), Cuboid(0, 0, 5, 4, 3, 5))
+        for _ in range(9):
+            self.assertIsNotNone(b.add_cub(4, 3, 5))
+        self.assertEqual(b._blocks, {})
+        self.assertEqual(len(b._max_cubs), 2)
+
+    def test_release(self):
+        b = blocks.BlocksBssf(10, 3, 5, rot=False)
+        b.add_cub(4, 3, 5)
+        self.assertEqual(len(b._max_cubs), 1)
+
+        # Doesn't fit in the free space left, the empty cell is released
+        self.assertEqual(b.add_cub(5, 3, 5), Cuboid(4, 0, 0, 5, 3, 5))
+        self.assertEqual(b._blocks, {})
+        self.assertIsNone(b.add_cub(2, 3, 5))
+        b.validate_packing()
+
+    def test_query_release(self):
+        b = blocks.BlocksBssf(10, 3, 5, rot=False)
+        b.add_cub(4, 3, 5)
+        max_cubs = list(b._max_cubs.values())
+        version = b._version
+
+        # Queries fitting only in the empty cell don't release the block
+        self.assertIsNotNone(b.fitness(5, 3, 5))
+        self.assertIsNone(b.fitness(7, 3, 5))
+        self.assertEqual(list(b._blocks), [(4, 3, 5)])
+        self.assertEqual(list(b._max_cubs.values()), max_cubs)
+        self.assertEqual(b._version, version)
+
+        p = b.placement(5, 3, 5)
+        self.assertEqual(b.add_cub(5, 3, 5, placement=p),
+                         Cuboid(4, 0, 0, 5, 3, 5))
+        self.assertEqual(b._blocks, {})
+        b.validate_packing()
+
+    def test_fill(self):
+        for name in VARIANTS:
+            b = getattr(blocks, 'Blocks' + name)(10, 10, 10, rot=False)
+            for _ in range(125):
+                self.assertIsNotNone(b.add_cub(2, 2, 2))
+            self.assertIsNone(b.add_cub(1, 1, 1))
+            self.assertEqual(b.used_volume(), 1000)
+            b.validate_packing()
+
+    def test_block_placement(self):
+        b = blocks.BlocksBaf(10, 10, 10)
+        b.add_cub(3, 4, 5)
+        # The next cell of the open block is a perfect fit
+        p = b.placement(3, 4, 5)
+        self.assertEqual(p.fitness, 0)
+        c = b.add_cub(3, 4, 5, placement=p)
+        self.assertEqual(c, Cuboid(*p.position))
+        self.assertEqual(b._blocks[(3, 4, 5)].used, 2)
+
+    def test_reset(self):
+        b = blocks.BlocksBl(10, 10, 10)
+        b.add_cub(5, 5, 5)
+        b.reset()
+        self.assertEqual(len(b), 0)
+        self.assertEqual(b._blocks, {})
+        self.assertEqual(list(b._max_cubs.values()),
+                         [Cuboid(0, 0, 0, 10, 10, 10)])
+        self.assertEqual(b.add_cub(5, 5, 5), Cuboid(0, 0, 0, 5, 5, 5))
+
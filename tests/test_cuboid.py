@@ -0,0 +1,65 @@
+from unittest import TestCase
+import pickle
+
+from cubspack.geometry import Cuboid
+
+
+class TestCuboidBounds(TestCase):
+
+    def assertBounds(self, c, x, y, z, width, height, depth):
+        self.assertEqual((c.x, c.y, c.z), (x, y, z))
+        self.assertEqual((c.width, c.height, c.depth), (width, height, depth))
+        self.assertEqual((c.left, c.bottom, c.outeye), (x, y, z))
+        self.assertEqual((c.right, c.top, c.ineye),
+                         (x + width, y + height, z + depth))
+
+    def test_init(self):
+        self.assertBounds(Cuboid(1, 2, 3, 4, 5, 6), 1, 2, 3, 4, 5, 6)
+
+    def test_move(self):
+        c = Cuboid(1, 2, 3, 4, 5, 6)
+        c.move(10, 20, 30)
+        self.assertBounds(c, 10, 20, 30, 4, 5, 6)
+
+    def test_join(self):
+        # Up/Down
+        c = Cuboid(0, 0, 0, 2, 2, 2)
+        self.assertTrue(c.join(Cuboid(0, 2, 0, 2, 3, 2)))
+        self.assertBounds(c, 0, 0, 0, 2, 5, 2)
+
+        # Right/Left
+        c = Cuboid(2, 0, 0, 2, 2, 2)
+        self.assertTrue(c.join(Cuboid(0, 0, 0, 2, 2, 2)))
+        self.assertBounds(c, 0, 0, 0, 4, 2, 2)
+
+        # In depth
+        c = Cuboid(0, 0, 0, 2, 2, 2)
+        self.assertTrue(c.join(Cuboid(0, 0, 2, 2, 2, 4)))
+        self.assertBounds(c, 0, 0, 0, 2, 2, 6)
+
+        # Contained
+        c = Cuboid(1, 1, 1, 1, 1, 1)
+        self.assertTrue(c.join(Cuboid(0, 0, 0, 3, 3, 3)))
+        self.assertBounds(c, 0, 0, 0, 3, 3, 3)
+
+        c = Cuboid(0, 0, 0, 2, 2, 2)
+        self.assertFalse(c.join(Cuboid(3, 0, 0, 2, 2, 2)))
+        self.assertBounds(c, 0, 0, 0, 2, 2, 2)
+
+    def test_intersects(self):
+        c = Cuboid(0, 0, 0, 2, 2, 2)
+        self.assertTrue(c.intersects(Cuboid(1, 1, 1, 2, 2, 2)))
+        # Face
+        self.assertFalse(c.intersects(Cuboid(2, 0, 0, 2, 2, 2)))
+        self.assertTrue(c.intersects(Cuboid(2, 0, 0, 2, 2, 2), edges=True))
+        # Edge
+        self.assertTrue(c.intersects(Cuboid(2, 2, 0, 2, 2, 2), edges=True))
+        # Corner
+        self.assertFalse(c.intersects(Cuboid(2, 2, 2, 2, 2, 2), edges=True))
+
+    def test_pickle(self):
+        c = Cuboid(1, 2, 3, 4, 5, 6, rid='a')
+        c2 = pickle.loads(pickle.dumps(c))
+        self.assertEqual(c, c2)
+        self.assertEqual(c2.rid, 'a')
+        self.assertBounds(c2, 1, 2, 3, 4, 5, 6)
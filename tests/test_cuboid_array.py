@@ -0,0 +1,80 @@
+from unittest import TestCase
+import decimal
+
+import numpy as np
+
+from cubspack.geometry import Cuboid
+from cubspack.geometry import CuboidArray
+import cubspack.guillotine as guillotine
+import cubspack.maxcubs as maxcubs
+
+
+class TestCuboidArray(TestCase):
+
+    def test_append_and_access(self):
+        a = CuboidArray()
+        a.append(Cuboid(1, 2, 3, 4, 5, 6, rid="a"))
+        a.append(Cuboid(0, 0, 0, 1, 1, 1))
+        self.assertEqual(len(a), 2)
+        self.assertEqual(a[0], Cuboid(1, 2, 3, 4, 5, 6))
+        self.assertEqual(a[0].rid, "a")
+        self.assertEqual(a[-1], Cuboid(0, 0, 0, 1, 1, 1))
+        self.assertIsNone(a[1].rid)
+        self.assertEqual(list(a), [a[0], a[1]])
+        self.assertEqual(a[0:1], [a[0]])
+        with self.assertRaises(IndexError):
+            a[2]
+
+    def test_growth(self):
+        a = CuboidArray(capacity=1)
+        for i in range(100):
+            a.append(Cuboid(i, 0, 0, 1, 1, 1, i))
+        self.assertEqual(len(a), 100)
+        self.assertEqual([c.x for c in a], list(range(100)))
+        self.assertEqual(a.rids, list(range(100)))
+
+    def test_dtype_promotion(self):
+        a = CuboidArray()
+        a.append(Cuboid(0, 0, 0, 2, 2, 2))
+        self.assertEqual(a.data.dtype.kind, 'i')
+        a.append(Cuboid(0, 0, 0, 0.5, 1, 1))
+        self.assertEqual(a.data.dtype.kind, 'f')
+        self.assertEqual(a.volume(), 8.5)
+
+        d = decimal.Decimal('0.1')
+        a.append(Cuboid(0, 0, 0, d, d, d))
+        self.assertEqual(a.data.dtype.kind, 'O')
+        self.assertIsInstance(a[2].width, decimal.Decimal)
+        self.assertEqual(a[2].width, d)
+
+    def test_volume(self):
+        a = CuboidArray()
+        self.assertEqual(a.volume(), 0)
+        a.append(Cuboid(0, 0, 0, 2, 3, 4))
+        a.append(Cuboid(2, 0, 0, 1, 1, 1))
+        self.assertEqual(a.volume(), 25)
+        self.assertIsInstance(a.volume(), int)
+
+    def test_overflow(self):
+        # int64 products and sums out of range use Python integers
+        a = CuboidArray([Cuboid(0, 0, 0, 10**7, 10**7, 10**7),
+                         Cuboid(2**62, 0, 0, 2**62, 1, 1)])
+        self.assertEqual(a.data.dtype, np.int64)
+        self.assertEqual(a.volume(), 10**21 + 2**62)
+        self.assertEqual(a.bounds()[1].tolist(), [2**62, 0, 0, 2**63, 1, 1])
+
+    def test_tolist(self):
+        a = CuboidArray([Cuboid(1, 2, 3, 4, 5, 6, 7)])
+        self.assertEqual(a.tolist(), [(1, 2, 3, 4, 5, 6, 7)])
+
+    def test_algorithms(self):
+        for algo in (maxcubs.MaxCubsBssf, guillotine.GuillotineBssfSas):
+            p = algo(10, 10, 10)
+            p.add_cub(5, 5, 5, rid=1)
+            p.add_cub(5, 5, 5, rid=2)
+            self.assertIsInstance(p.cuboids, CuboidArray)
+            self.assertEqual(len(p), 2)
+            self.assertEqual(p.used_volume(), 250)
+            self.assertEqual([c[6] for c in p.cubs_list()], [1, 2])
+            p.reset()
+            self.assertEqual(len(p), 0)
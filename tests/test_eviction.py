@@ -0,0 +1,130 @@
+from unittest import TestCase
+import random
+
+from cubspack.geometry import Cuboid
+import cubspack.blocks as blocks
+import cubspack.guillotine as guillotine
+import cubspack.layers as layers
+import cubspack.maxcubs as maxcubs
+from cubspack.pack_algo import EVICT_LRU
+from cubspack.pack_algo import EVICT_SMALLEST
+from cubspack.pack_algo import EVICT_THINNEST
+import cubspack.packer as packer
+
+from tests.engine_checks import random_cubs
+
+
+POLICIES = (EVICT_SMALLEST, EVICT_LRU, EVICT_THINNEST)
+
+
+class TestPolicies(TestCase):
+
+    def test_scores(self):
+        c = Cuboid(0, 0, 0, 2, 3, 4)
+        self.assertEqual(EVICT_SMALLEST(c, 7), 24)
+        self.assertEqual(EVICT_LRU(c, 7), (7, 24))
+        self.assertEqual(EVICT_THINNEST(c, 7), 2)
+
+
+class TestEviction(TestCase):
+
+    def test_unbounded(self):
+        b = maxcubs.MaxCubsBl(10, 10, 10, rot=False)
+        b.add_cub(5, 5, 5)
+        self.assertEqual(len(b._max_cubs), 3)
+        self.assertEqual(b.evictions, 0)
+        self.assertEqual(b._last_used, {})
+
+    def test_maxcubs(self):
+        b = maxcubs.MaxCubsBl(10, 10, 10, rot=False, max_free=2)
+        b.add_cub(5, 5, 5)
+        # Three splits of the same volume, the oldest one goes
+        self.assertEqual(b.evictions, 1)
+        self.assertEqual(sorted(b._max_cubs.values()),
+                         sorted([Cuboid(0, 5, 0, 10, 5, 10),
+                                 Cuboid(0, 0, 5, 10, 10, 5)]))
+        self.assertEqual(len(b._fit_index), 2)
+        self.assertEqual(sorted(b._last_used), sorted(b._max_cubs))
+
+        # The evicted space is never used
+        self.assertEqual(b.add_cub(5, 5, 5), Cuboid(0, 0, 5, 5, 5, 5))
+        b.validate_packing()
+
+    def test_thinnest(self):
+        b = maxcubs.MaxCubsBl(10, 10, 10, rot=False, max_free=1,
+                              evict=EVICT_THINNEST)
+        b.add_cub(8, 6, 10)
+        # 2 units wide against 4 units high
+        self.assertEqual(b.evictions, 1)
+        self.assertEqual(list(b._max_cubs.values()),
+                         [Cuboid(0, 6, 0, 10, 4, 10)])
+
+    def test_lru(self):
+        b = maxcubs.MaxCubsBl(10, 10, 10, rot=False, max_free=2,
+                              evict=EVICT_LRU)
+        b.add_cub(10, 10, 4)
+        b.add_cub(10, 4, 2)
+        self.assertEqual(sorted(b._max_cubs.values()),
+                         sorted([Cuboid(0, 4, 4, 10, 6, 6),
+                                 Cuboid(0, 0, 6, 10, 10, 4)]))
+
+        # Only the smaller one was big enough for the last search
+        self.assertIsNotNone(b.fitness(10, 5, 5))
+        b._max_free = 1
+        b._limit_free_space()
+        self.assertEqual(list(b._max_cubs.values()),
+                         [Cuboid(0, 4, 4, 10, 6, 6)])
+        self.assertEqual(b.evictions, 1)
+
+    def test_guillotine(self):
+        g = guillotine.GuillotineBssfSas(10, 10, 10, rot=False, max_free=1)
+        g.add_cub(5, 5, 5)
+        self.assertEqual(g.evictions, 2)
+        self.assertEqual(len(g._sections), 1)
+        self.assertEqual(len(g._fit_index), 1)
+        self.assertEqual(len(g._section_keys), 1)
+        self.assertEqual(sum(len(s) for s in g._faces.values()), 6)
+
+    def test_reset(self):
+        b = maxcubs.MaxCubsBssf(10, 10, 10, max_free=1)
+        b.add_cub(5, 5, 5)
+        b.reset()
+        self.assertEqual(b.evictions, 0)
+        self.assertEqual(list(b._last_used), list(b._max_cubs))
+
+    def test_bound(self):
+        random.seed(67)
+        cubs = random_cubs(300)
+        algos = (maxcubs.MaxCubsBssf, maxcubs.MaxCubsBl,
+                 guillotine.GuillotineBssfSas, guillotine.GuillotineBvfLas,
+                 layers.LayersBaf, blocks.BlocksBlsf)
+        for algo in algos:
+            for policy in POLICIES:
+                b = algo(40, 40, 40, max_free=30, evict=policy)
+                for w, h, d in cubs:
+                    fitness = b.fitness(w, h, d)
+                    c = b.add_cub(w, h, d)
+                    self.assertEqual(fitness is None, c is None)
+                    self.assertLessEqual(len(list(b._free_spaces())), 30)
+                b.validate_packing()
+                self.assertGreater(b.evictions, 0)
+                self.assertGreater(len(b), 0)
+
+
+class TestPackerEviction(TestCase):
+
+    def test_bin_options(self):
+        random.seed(71)
+        cubs = random_cubs(100)
+        for mode in (packer.PackingMode.Online, packer.PackingMode.Offline):
+            p = packer.newPacker(mode=mode, bin_algo=packer.PackingBin.BFF,
+                                 pack_algo=maxcubs.MaxCubsBssf)
+            p.add_bin(20, 20, 20, count=20, max_free=10, evict=EVICT_LRU)
+            for i, c in enumerate(cubs):
+                p.add_cub(*c, rid=i)
+            if mode == packer.PackingMode.Offline:
+                p.pack()
+
+            self.assertEqual(len(p.cub_list()), len(cubs))
+            self.assertTrue(any(b.evictions for b in p))
+            p.validate_packing()
@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+from cubspack.geometry import Cuboid
+import cubspack.extreme_points as extreme_points
+from cubspack.pack_algo import ROT_ALL
+
+from tests.engine_checks import EngineChecks
+
+
+VARIANTS = ('', 'Bl', 'Bssf', 'Rs')
+
+
+class TestExtremePoints(EngineChecks, TestCase):
+
+    module = extreme_points
+    prefix = 'ExtremePoints'
+    variants = VARIANTS
+    seed = 41
+    fill = 0.5
+
+    def test_corners(self):
+        b = extreme_points.ExtremePointsBl(10, 10, 10, rot=False)
+        self.assertEqual(b.add_cub(5, 5, 5), Cuboid(0, 0, 0, 5, 5, 5))
+        self.assertEqual(b._points.tolist(),
+                         [[5, 0, 0, 5, 10, 10, 10, 10, 10],
+                          [0, 5, 0, 10, 5, 10, 10, 10, 10],
+                          [0, 0, 5, 10, 10, 5, 10, 10, 10]])
+
+        # The new corner is projected onto the first cuboid face, and the
+        # point it covers is removed.
+        self.assertEqual(b.add_cub(5, 2, 5), Cuboid(5, 0, 0, 5, 2, 5))
+        self.assertEqual(sorted(map(tuple, b._points[:, :6].tolist())),
+                         [(0, 0, 5, 10, 10, 5), (0, 5, 0, 10, 5, 10),
+                          (5, 0, 5, 5, 10, 5), (5, 2, 0, 5, 8, 10)])
+
+    def test_residual_cut(self):
+        b = extreme_points.ExtremePointsBl(10, 10, 10, rot=False)
+        b.add_cub(4, 2, 10)
+        self.assertIn([0, 2, 0, 10, 8, 10], b._points[:, :6].tolist())
+
+        # The ray along x from (0, 2, 0) is now stopped by the second cuboid
+        self.assertEqual(b.add_cub(2, 6, 2), Cuboid(4, 0, 0, 2, 6, 2))
+        self.assertIn([0, 2, 0, 4, 8, 10], b._points[:, :6].tolist())
+
+    def test_obstacle(self):
+        b = extreme_points.ExtremePoints(10, 10, 10, rot=False)
+        b._placed.insert('x', Cuboid(2, 2, 2, 3, 3, 3))
+
+        # The rays from the origin miss it, the overlap check doesn't
+        self.assertEqual(b._select_position(4, 4, 4), (None, None))
+        self.assertEqual(b._points[0, 6:].tolist(), [2, 2, 2])
+        self.assertEqual(b._select_position(3, 3, 3), (None, None))
+        self.assertEqual(b._select_position(2, 10, 10)[1],
+                         Cuboid(0, 0, 0, 2, 10, 10))
+
+    def test_fill(self):
+        # Four 2x3x4 boxes fill the bin
+        for name in VARIANTS:
+            b = getattr(extreme_points, 'ExtremePoints' + name)(
+                4, 4, 6, rot=ROT_ALL)
+            for _ in range(4):
+                self.assertIsNotNone(b.add_cub(4, 2, 3))
+            self.assertEqual(b.used_volume(), 96)
+            self.assertEqual(len(b._points), 0)
+
+    def test_min_dims(self):
+        b = extreme_points.ExtremePointsBssf(10, 10, 10, rot=False)
+        b.add_cub(8, 10, 10)
+        self.assertEqual(b._points[:, :3].tolist(), [[8, 0, 0]])
+        b.set_min_dims(3, 1, 1)
+        self.assertEqual(len(b._points), 0)
+
+    def test_reset(self):
+        b = extreme_points.ExtremePointsBl(10, 10, 10)
+        b.add_cub(5, 5, 5)
+        b.reset()
+        self.assertEqual(len(b), 0)
+        self.assertEqual(len(b._placed), 0)
+        self.assertEqual(b._points.tolist(),
+                         [[0, 0, 0, 10, 10, 10, 10, 10, 10]])
+        self.assertEqual(b.add_cub(5, 5, 5), Cuboid(0, 0, 0, 5, 5, 5))
+
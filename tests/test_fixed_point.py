@@ -0,0 +1,75 @@
+from unittest import TestCase
+import decimal
+import random
+
+from cubspack.packer import from_fixed
+from cubspack.packer import newPacker
+from cubspack.packer import PackingBin
+from cubspack.packer import PackingMode
+from cubspack.packer import to_fixed
+
+
+class TestFixedPointHelpers(TestCase):
+
+    def test_to_fixed(self):
+        self.assertEqual(to_fixed(0.1, 1), 1)
+        self.assertEqual(to_fixed(3.1416, 3), 3142)
+        self.assertEqual(to_fixed(3.1416, 3, decimal.ROUND_FLOOR), 3141)
+        self.assertEqual(to_fixed(decimal.Decimal('2.5'), 0), 3)
+        self.assertEqual(to_fixed(7, 2), 700)
+        self.assertIsInstance(to_fixed(0.5, 3), int)
+
+    def test_from_fixed(self):
+        self.assertEqual(from_fixed(3142, 3), decimal.Decimal('3.142'))
+        self.assertEqual(from_fixed(to_fixed(12.25, 2), 2),
+                         decimal.Decimal('12.25'))
+
+
+class TestFixedPointPacker(TestCase):
+
+    def setUp(self):
+        random.seed(7)
+        self.cubs = [(round(random.uniform(1, 5), 2),
+                      round(random.uniform(1, 5), 2),
+                      round(random.uniform(1, 5), 2)) for _ in range(60)]
+
+    def _pack(self, mode, bin_algo):
+        p = newPacker(mode, bin_algo, fixed_point=2)
+        p.add_bin(10.5, 10.5, 10.5, count=10)
+        for i, c in enumerate(self.cubs):
+            p.add_cub(*c, rid=i)
+        if mode == PackingMode.Offline:
+            p.pack()
+        return p
+
+    def test_integer_bins(self):
+        p = self._pack(PackingMode.Offline, PackingBin.BBF)
+        for b in p:
+            self.assertEqual((b.width, b.height, b.depth), (1050, 1050, 1050))
+            for c in b.cubs_list():
+                for v in c[:6]:
+                    self.assertIsInstance(v, int)
+        self.assertEqual(p.bin_list()[0], (decimal.Decimal('10.50'),) * 3)
+        p.validate_packing()
+
+    def test_results_scaled_back(self):
+        for mode, bin_algo in ((PackingMode.Offline, PackingBin.BBF),
+                               (PackingMode.Offline, PackingBin.BNF),
+                               (PackingMode.Offline, PackingBin.Global),
+                               (PackingMode.Online, PackingBin.BFF)):
+            p = self._pack(mode, bin_algo)
+            cubs = p.cub_list()
+            self.assertEqual(len(cubs), len(self.cubs))
+            for b, x, y, z, w, h, d, rid in cubs:
+                self.assertIsInstance(x, decimal.Decimal)
+                self.assertEqual(sorted((w, h, d)), sorted(
+                    decimal.Decimal(repr(v)) for v in self.cubs[rid]))
+                self.assertLessEqual(x + w, decimal.Decimal('10.5'))
+
+    def test_volume_range(self):
+        # Fixed-point volumes grow past the int64 range
+        p = newPacker(fixed_point=6)
+        p.add_bin(100, 100, 100)
+        p.add_cub(50, 50, 50)
+        p.pack()
+        self.assertEqual(p[0].used_volume(), (50 * 10**6)**3)
@@ -0,0 +1,182 @@
+from unittest import TestCase
+import random
+
+from cubspack.geometry import Cuboid
+import cubspack.guillotine as guillotine
+
+from tests.engine_checks import random_cubs
+
+
+def check_face_index(test, g):
+    """Every section is indexed by its six faces and nothing else is"""
+    indexed = sorted(id(s) for sections in g._faces.values()
+                     for s in sections.values())
+    test.assertEqual(indexed, sorted(id(s) for s in g._sections.values()
+                                     for _ in range(6)))
+    test.assertEqual(len(g._fit_index), len(g._sections))
+    test.assertEqual(len(g._section_keys), len(g._sections))
+    for key, s in g._sections.items():
+        test.assertEqual(g._section_keys[id(s)], key)
+        test.assertIs(g._fit_index.get(key), s)
+
+
+class TestSectionMerge(TestCase):
+
+    def test_merge(self):
+        g = guillotine.GuillotineBssfSas(10, 10, 10)
+        g._remove_section(g._sections[0])
+        g._add_section(Cuboid(0, 0, 0, 5, 5, 5))
+        g._add_section(Cuboid(5, 0, 0, 5, 5, 5))
+        self.assertEqual(list(g._sections.values()),
+                         [Cuboid(0, 0, 0, 10, 5, 5)])
+
+        # Cascade, the new section joins the one above and then the
+        # resulting one joins the one behind.
+        g._add_section(Cuboid(0, 0, 5, 10, 10, 5))
+        g._add_section(Cuboid(0, 5, 0, 10, 5, 5))
+        self.assertEqual(list(g._sections.values()),
+                         [Cuboid(0, 0, 0, 10, 10, 10)])
+        check_face_index(self, g)
+
+    def test_no_merge(self):
+        g = guillotine.GuillotineBssfSas(10, 10, 10, merge=False)
+        g._remove_section(g._sections[0])
+        g._add_section(Cuboid(0, 0, 0, 5, 5, 5))
+        g._add_section(Cuboid(5, 0, 0, 5, 5, 5))
+        self.assertEqual(len(g._sections), 2)
+
+    def test_partial_face(self):
+        # Touching sections with different extents can't be joined
+        g = guillotine.GuillotineBssfSas(10, 10, 10)
+        g._remove_section(g._sections[0])
+        g._add_section(Cuboid(0, 0, 0, 5, 5, 5))
+        g._add_section(Cuboid(5, 0, 0, 5, 5, 4))
+        self.assertEqual(len(g._sections), 2)
+
+    def test_packing(self):
+        random.seed(11)
+        g = guillotine.GuillotineBssfSas(50, 50, 50)
+        for _ in range(200):
+            g.add_cub(random.randint(1, 9), random.randint(1, 9),
+                      random.randint(1, 9))
+        g.validate_packing()
+        check_face_index(self, g)
+
+
+class TestSectionSelection(TestCase):
+
+    def sections(self, g, *sections):
+        g._remove_section(g._sections[0])
+        for s in sections:
+            g._add_section(s)
+
+    def count_fitness(self, g):
+        calls = []
+        fitness = g._section_fitness
+
+        def counted(*args):
+            calls.append(args)
+            return fitness(*args)
+        g._section_fitness = counted
+        return calls
+
+    def test_best(self):
+        g = guillotine.GuillotineBssfSas(20, 20, 20, merge=False)
+        self.sections(g, Cuboid(0, 0, 0, 5, 5, 5), Cuboid(10, 0, 0, 4, 4, 4),
+                      Cuboid(0, 10, 0, 2, 2, 2))
+        calls = self.count_fitness(g)
+        section, dims, fitness = g._select_fittest_section(3, 2, 3)
+        self.assertEqual(section, Cuboid(10, 0, 0, 4, 4, 4))
+        self.assertEqual(fitness, 1)
+        self.assertEqual(dims, (3, 2, 3))
+
+        # Every fitting section and orientation scored once, none again
+        # for the placement.
+        del calls[:]
+        p = g.placement(3, 2, 3)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(p.fitness, 1)
+
+    def test_volume_order(self):
+        g = guillotine.GuillotineBvfSas(20, 20, 20, merge=False)
+        self.sections(g, Cuboid(0, 0, 0, 5, 5, 5), Cuboid(10, 0, 0, 2, 8, 8),
+                      Cuboid(0, 10, 0, 4, 4, 4), Cuboid(10, 10, 0, 4, 4, 4))
+        calls = self.count_fitness(g)
+        # The 2x8x8 section is smaller than the last two but too narrow, and
+        # of the two 4x4x4 the oldest is taken.
+        section, dims, fitness = g._select_fittest_section(3, 3, 3)
+        self.assertEqual(section, Cuboid(0, 10, 0, 4, 4, 4))
+        self.assertEqual(fitness, 37)
+        self.assertEqual(len(calls), 1)
+
+        # The orientation first in ORIENTATIONS wins over the oldest one
+        g._add_section(Cuboid(0, 0, 10, 3, 4, 3))
+        g._add_section(Cuboid(5, 5, 10, 4, 3, 3))
+        self.assertEqual(g._select_fittest_section(4, 3, 3)[:2],
+                         (Cuboid(5, 5, 10, 4, 3, 3), (4, 3, 3)))
+
+    def test_volume_packing(self):
+        # Same selection as the full scan
+        random.seed(13)
+        for algo in (guillotine.GuillotineBvfSas,
+                     guillotine.GuillotineBvfMinas):
+            g = algo(40, 40, 40)
+            for _ in range(300):
+                w, h, d = [random.randint(1, 9) for _ in range(3)]
+                dims = g._orientations(w, h, d)
+                scan = [(g._section_fitness(s, *o), i, k)
+                        for k, s in g._fit_index.feasible(1, 1, 1)
+                        for i, o in enumerate(dims)
+                        if g._section_fitness(s, *o) is not None]
+                section, placed, fitness = g._select_fittest_section(w, h, d)
+                if not scan:
+                    self.assertIsNone(section)
+                    continue
+                best, i, key = min(scan)
+                self.assertEqual((fitness, placed), (best, dims[i]))
+                self.assertIs(section, g._fit_index.get(key))
+                g.add_cub(w, h, d)
+            g.validate_packing()
+            check_face_index(self, g)
+
+    def test_perfect_fit(self):
+        g = guillotine.GuillotineBvfSas(20, 20, 20, rot=False, merge=False)
+        self.sections(g, *[Cuboid(4*i, 0, 0, 3, 3, 3) for i in range(5)])
+        calls = self.count_fitness(g)
+        section, _, fitness = g._select_fittest_section(3, 3, 3)
+        self.assertEqual(fitness, 0)
+        self.assertEqual(len(calls), 1)
+        self.assertIs(calls[0][0], section)
+
+    def test_perfect_fit_scan(self):
+        # The side fits also stop the scan at the first perfect fit
+        g = guillotine.GuillotineBssfSas(20, 20, 20, rot=False, merge=False)
+        self.sections(g, Cuboid(0, 10, 0, 5, 5, 5),
+                      *[Cuboid(4*i, 0, 0, 3, 3, 3) for i in range(5)])
+        calls = self.count_fitness(g)
+        section, _, fitness = g._select_fittest_section(3, 3, 3)
+        self.assertEqual(fitness, 0)
+        self.assertLessEqual(len(calls), 2)
+        self.assertIs(calls[-1][0], section)
+
+    def test_none(self):
+        g = guillotine.GuillotineBssfSas(10, 10, 10)
+        self.assertEqual(g._select_fittest_section(11, 11, 11),
+                         (None, None, None))
+        self.assertEqual(g._select_fittest_section(1, 1, 1, 0),
+                         (None, None, None))
+
+
+class TestSplitRules(TestCase):
+
+    def test_maxas(self):
+        random.seed(17)
+        for fit in ('Bssf', 'Blsf', 'Bvf'):
+            for merge in (True, False):
+                g = getattr(guillotine, 'Guillotine' + fit + 'Maxas')(
+                    30, 30, 30, merge=merge)
+                for w, h, d in random_cubs(100):
+                    g.add_cub(w, h, d)
+                g.validate_packing()
+                check_face_index(self, g)
+                self.assertGreater(g.used_volume(), 30*30*30*0.4)
@@ -0,0 +1,145 @@
+from unittest import TestCase
+import decimal
+import random
+
+import numpy as np
+
+from cubspack.geometry import Cuboid
+import cubspack.guillotine as guillotine
+import cubspack.guillotine_vec as guillotine_vec
+import cubspack.packer as packer
+
+from tests.engine_checks import random_cubs
+from tests.test_guillotine_sections import check_face_index
+
+
+SPLITS = ('Sas', 'Las', 'Slas', 'Llas', 'Maxas', 'Minas')
+
+
+def pack(algo, cubs, size=30, **kwargs):
+    b = algo(size, size, size, **kwargs)
+    placed = []
+    for w, h, d in cubs:
+        fitness = b.fitness(w, h, d)
+        c = b.add_cub(w, h, d)
+        placed.append((fitness, c))
+    return b, placed
+
+
+class TestSectionArray(TestCase):
+
+    def test_rows(self):
+        a = guillotine_vec.SectionArray(capacity=2)
+        cubs = [Cuboid(i, 0, 0, 1, 2, 3) for i in range(3)]
+        for key, c in enumerate(cubs):
+            a.insert(key, c)
+        self.assertEqual(len(a), 3)
+        self.assertIs(a.get(2), cubs[2])
+
+        # The row of a removed section is reused
+        a.remove(1)
+        self.assertNotIn(1, a)
+        a.insert(3, Cuboid(0, 5, 0, 4, 4, 4))
+        bounds, keys, live = a.arrays()
+        self.assertEqual(keys.tolist(), [0, 3, 2])
+        self.assertEqual(bounds[1].tolist(), [0, 5, 0, 4, 9, 4])
+        self.assertTrue(live.all())
+
+        self.assertEqual(sorted(k for k, _ in a.feasible(1, 2, 3)),
+                         [0, 2, 3])
+        self.assertEqual([k for k, _ in a.feasible(2, 2, 2)], [3])
+
+
+class TestGuillotineVec(TestCase):
+
+    def test_same_placements(self):
+        # Best volume fit has no early exit, the placements are the same
+        random.seed(71)
+        for split in SPLITS:
+            for merge in (True, False):
+                cubs = random_cubs(100)
+                _, placed = pack(getattr(guillotine, 'GuillotineBvf' + split),
+                                 cubs, merge=merge)
+                bv, placed_vec = pack(
+                    getattr(guillotine_vec, 'GuillotineVecBvf' + split),
+                    cubs, merge=merge)
+                self.assertEqual(placed, placed_vec)
+                bv.validate_packing()
+                check_face_index(self, bv)
+
+    def test_selection(self):
+        # Same selection as a full scan of the sections
+        random.seed(73)
+        for fit in ('Bssf', 'Blsf', 'Bvf'):
+            for split in SPLITS:
+                g = getattr(guillotine_vec, 'GuillotineVec' + fit + split)(
+                    30, 30, 30)
+                for w, h, d in random_cubs(100):
+                    dims = g._orientations(w, h, d)
+                    scan = [(g._section_fitness(s, *o), i, k)
+                            for k, s in g._sections.items()
+                            for i, o in enumerate(dims)
+                            if g._section_fitness(s, *o) is not None]
+                    section, placed, fitness = g._select_fittest_section(
+                        w, h, d)
+                    if not scan:
+                        self.assertIsNone(section)
+                        continue
+                    best, i, key = min(scan)
+                    self.assertEqual((fitness, placed), (best, dims[i]))
+                    self.assertIs(section, g._sections[key])
+                    g.add_cub(w, h, d)
+                g.validate_packing()
+                check_face_index(self, g)
+
+    def test_pruning(self):
+        g = guillotine_vec.GuillotineVecBssfSas(10, 10, 10, rot=False)
+        g.add_cub(8, 10, 10)
+        g.set_min_dims(3, 1, 1)
+        self.assertEqual(len(g._sections), 1)
+        self.assertEqual(len(g._fit_index), 0)
+        self.assertIsNone(g.add_cub(2, 2, 2))
+
+    def test_decimal(self):
+        random.seed(75)
+        cubs = [tuple(decimal.Decimal(v) / 2 for v in c)
+                for c in random_cubs(60)]
+        _, placed = pack(guillotine.GuillotineBvfMinas, cubs, size=20)
+        bv, placed_vec = pack(guillotine_vec.GuillotineVecBvfMinas, cubs,
+                              size=20)
+        self.assertEqual(placed, placed_vec)
+        self.assertEqual(bv._fit_index.arrays()[0].dtype, object)
+
+    def test_large_bin(self):
+        # Volumes past the int64 range, the bounds stay int64
+        random.seed(76)
+        cubs = [tuple(10**5 * v for v in c) for c in random_cubs(60)]
+        for split in SPLITS:
+            _, placed = pack(getattr(guillotine, 'GuillotineBvf' + split),
+                             cubs, size=3 * 10**6)
+            bv, placed_vec = pack(
+                getattr(guillotine_vec, 'GuillotineVecBvf' + split), cubs,
+                size=3 * 10**6)
+            self.assertEqual(placed, placed_vec)
+            self.assertEqual(bv._fit_index.arrays()[0].dtype, np.int64)
+            self.assertGreater(placed_vec[0][0], 2**63)
+
+        b = guillotine_vec.GuillotineVecBvfSas(10**7, 10**7, 10**7)
+        b.add_cub(10**6, 10**6, 10**6)
+        self.assertEqual(b.fitness(2 * 10**6, 10**6, 10**6),
+                         88 * 10**18)
+
+    def test_packer(self):
+        random.seed(77)
+        cubs = random_cubs(150)
+        results = []
+        for algo in (guillotine.GuillotineBvfSas,
+                     guillotine_vec.GuillotineVecBvfSas):
+            p = packer.newPacker(pack_algo=algo)
+            p.add_bin(30, 30, 30, count=4)
+            for c in cubs:
+                p.add_cub(*c)
+            p.pack()
+            p.validate_packing()
+            results.append(p.cub_list())
+        self.assertEqual(results[0], results[1])
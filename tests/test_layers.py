@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+from cubspack.geometry import Cuboid
+import cubspack.layers as layers
+
+from tests.engine_checks import EngineChecks
+from tests.engine_checks import random_cubs
+
+
+VARIANTS = ('', 'Bl', 'Bssf', 'Baf', 'Blsf')
+
+
+class TestLayers(EngineChecks, TestCase):
+
+    module = layers
+    prefix = 'Layers'
+    variants = VARIANTS
+    seed = 47
+
+    def validate_cubs(self):
+        return random_cubs(200, max_side=10)
+
+    def test_rows(self):
+        b = layers.LayersBl(10, 10, 10, rot=False)
+        cubs = [b.add_cub(2, 2, 2) for _ in range(6)]
+        self.assertEqual(cubs[:2], [Cuboid(0, 0, 0, 2, 2, 2),
+                                    Cuboid(2, 0, 0, 2, 2, 2)])
+        # The row is full, the next one starts behind it
+        self.assertEqual(cubs[5], Cuboid(0, 0, 2, 2, 2, 2))
+
+        # Whole rows are taken from the free space
+        self.assertEqual(sorted(b._max_cubs.values()),
+                         sorted([Cuboid(0, 2, 0, 10, 8, 10),
+                                 Cuboid(0, 0, 4, 10, 10, 6)]))
+        layer = b._layers[2]
+        self.assertEqual(layer.row, Cuboid(0, 0, 2, 10, 2, 2))
+        self.assertEqual(layer.cursor, 2)
+        self.assertEqual(layer.limit, 10)
+
+    def test_fill(self):
+        for name in VARIANTS:
+            b = getattr(layers, 'Layers' + name)(10, 10, 10, rot=False)
+            for _ in range(125):
+                self.assertIsNotNone(b.add_cub(2, 2, 2))
+            self.assertIsNone(b.add_cub(1, 1, 1))
+            self.assertEqual(b.used_volume(), 1000)
+            self.assertEqual(len(b._max_cubs), 0)
+            b.validate_packing()
+
+    def test_close_row(self):
+        b = layers.LayersBl(10, 10, 10, rot=False)
+        b.add_cub(4, 2, 2)
+        b.add_cub(4, 2, 2)
+        # A new row, the end of the previous one is given back
+        self.assertEqual(b.add_cub(4, 2, 2), Cuboid(0, 0, 2, 4, 2, 2))
+        self.assertIn(Cuboid(8, 0, 0, 2, 2, 2), b._max_cubs.values())
+
+    def test_row_fallback(self):
+        b = layers.LayersBssf(10, 2, 2, rot=False)
+        b.add_cub(3, 2, 2)
+        self.assertEqual(len(b._max_cubs), 0)
+
+        # Shorter cuboids go at the end of the row when nothing else is free
+        self.assertEqual(b.add_cub(3, 1, 1), Cuboid(3, 0, 0, 3, 1, 1))
+        self.assertEqual(b.add_cub(4, 2, 2), Cuboid(6, 0, 0, 4, 2, 2))
+        self.assertIsNone(b.add_cub(1, 1, 1))
+        b.validate_packing()
+
+    def test_row_placement(self):
+        b = layers.LayersBaf(10, 10, 10)
+        b.add_cub(3, 4, 5)
+        p = b.placement(3, 4, 5)
+        c = b.add_cub(3, 4, 5, placement=p)
+        self.assertEqual(c, Cuboid(*p.position))
+        # Placed at the row cursor, which moves past it
+        self.assertEqual(b._layers[c.height].cursor, c.right)
+
+    def test_reset(self):
+        b = layers.LayersBl(10, 10, 10)
+        b.add_cub(5, 5, 5)
+        b.reset()
+        self.assertEqual(len(b), 0)
+        self.assertEqual(b._layers, {})
+        self.assertEqual(list(b._max_cubs.values()),
+                         [Cuboid(0, 0, 0, 10, 10, 10)])
+        self.assertEqual(b.add_cub(5, 5, 5), Cuboid(0, 0, 0, 5, 5, 5))
+
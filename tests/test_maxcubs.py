@@ -0,0 +1,101 @@
+from unittest import TestCase
+import random
+
+from cubspack.geometry import Cuboid
+import cubspack.maxcubs as maxcubs
+
+
+def check_max_cubs(test, b):
+    """Maximal cuboids are indexed, free and not contained by each other"""
+    max_cubs = b._max_cubs
+    test.assertEqual(sorted(b._max_index), sorted(max_cubs))
+    test.assertEqual(len(b._fit_index), len(max_cubs))
+    for key, m in max_cubs.items():
+        test.assertIs(b._max_index.get(key), m)
+        test.assertIs(b._fit_index.get(key), m)
+        test.assertTrue(b._surface.contains(m))
+        for c in b:
+            test.assertFalse(m.intersects(c))
+        for key2, m2 in max_cubs.items():
+            if key != key2:
+                test.assertFalse(m.contains(m2))
+
+
+class TestMaxCubs(TestCase):
+
+    def test_max_cubs(self):
+        random.seed(21)
+        for algo in (maxcubs.MaxCubsBl, maxcubs.MaxCubsBssf,
+                     maxcubs.MaxCubsBaf, maxcubs.MaxCubsBlsf):
+            b = algo(30, 30, 30)
+            for _ in range(60):
+                b.add_cub(random.randint(2, 8), random.randint(2, 8),
+                          random.randint(2, 8))
+            b.validate_packing()
+            check_max_cubs(self, b)
+
+    def test_split(self):
+        b = maxcubs.MaxCubsBl(10, 10, 10)
+        b.add_cub(5, 5, 5)
+        self.assertEqual(sorted(b._max_cubs.values(), key=repr), sorted(
+            [Cuboid(5, 0, 0, 5, 10, 10), Cuboid(0, 5, 0, 10, 5, 10),
+             Cuboid(0, 0, 5, 10, 10, 5)], key=repr))
+
+    def test_generate_splits(self):
+        # One maximal cuboid on each side of the placed cuboid, as wide as
+        # the maximal cuboid split along the other two axes.
+        b = maxcubs.MaxCubs(10, 10, 10)
+        splits = b._generate_splits(Cuboid(0, 0, 0, 10, 10, 10),
+                                    Cuboid(2, 3, 4, 5, 5, 5))
+        self.assertEqual(sorted(splits, key=repr), sorted(
+            [Cuboid(0, 0, 0, 2, 10, 10), Cuboid(7, 0, 0, 3, 10, 10),
+             Cuboid(0, 0, 0, 10, 3, 10), Cuboid(0, 8, 0, 10, 2, 10),
+             Cuboid(0, 0, 0, 10, 10, 4), Cuboid(0, 0, 9, 10, 10, 1)],
+            key=repr))
+
+    def test_split_free_space(self):
+        # The free space behind a cuboid isn't clipped to its footprint
+        b = maxcubs.MaxCubsBl(10, 10, 10, rot=False)
+        b.add_cub(5, 5, 5)
+        self.assertEqual(b.add_cub(10, 10, 5), Cuboid(0, 0, 5, 10, 10, 5))
+        b.validate_packing()
+
+    def test_fitness(self):
+        # Best area fit picks the smallest maximal cuboid
+        b = maxcubs.MaxCubsBaf(10, 10, 10, rot=False)
+        b.add_cub(6, 10, 10)
+        b.add_cub(3, 3, 10)
+        c = b.add_cub(3, 3, 3)
+        self.assertEqual((c.x, c.y), (6, 3))
+        self.assertEqual(b.fitness(1, 7, 10), 100 - 70)
+
+    def test_ties(self):
+        # Same fitness, the normal orientation and then the oldest maximal
+        # cuboid are preferred.
+        b = maxcubs.MaxCubsBssf(10, 10, 10)
+        c = b.add_cub(5, 10, 10)
+        self.assertEqual((c.x, c.width, c.height), (0, 5, 10))
+        c = b.add_cub(2, 3, 10)
+        self.assertEqual((c.x, c.y, c.width, c.height), (5, 0, 2, 3))
+
+    def test_incremental_pruning(self):
+        # Debug mode checks every placement against the full pass
+        random.seed(22)
+        for algo in (maxcubs.MaxCubsBl, maxcubs.MaxCubsBaf):
+            b = algo(40, 40, 40, debug=True)
+            for _ in range(120):
+                b.add_cub(random.randint(1, 10), random.randint(1, 10),
+                          random.randint(1, 10))
+            self.assertEqual(b._contained_max_cubs(), [])
+            check_max_cubs(self, b)
+
+    def test_equal_splits(self):
+        # Of several equal splits only the oldest one is kept
+        b = maxcubs.MaxCubs(10, 10, 10)
+        m = Cuboid(0, 0, 0, 10, 10, 10)
+        new_keys = [b._add_max_cub(Cuboid(0, 0, 0, 10, 10, 10))
+                    for _ in range(2)]
+        new_keys.append(b._add_max_cub(Cuboid(0, 0, 0, 5, 5, 5)))
+        b._remove_duplicates(new_keys, Cuboid(5, 5, 5, 1, 1, 1))
+        self.assertEqual(list(b._max_cubs.values()), [m])
+        self.assertEqual(list(b._max_cubs), [0])
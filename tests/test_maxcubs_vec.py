@@ -0,0 +1,85 @@
+from unittest import TestCase
+import decimal
+import random
+
+import numpy as np
+
+from cubspack.geometry import Cuboid
+import cubspack.maxcubs as maxcubs
+import cubspack.maxcubs_vec as maxcubs_vec
+import cubspack.packer as packer
+
+from tests.engine_checks import random_cubs
+
+
+VARIANTS = ('', 'Bl', 'Bssf', 'Baf', 'Blsf')
+
+
+def pack(algo, cubs, size=30, rot=True):
+    b = algo(size, size, size, rot=rot)
+    placed = []
+    for w, h, d in cubs:
+        fitness = b.fitness(w, h, d)
+        c = b.add_cub(w, h, d)
+        placed.append((fitness, c))
+    return b, placed
+
+
+class TestMaxCubsVec(TestCase):
+
+    def test_same_placements(self):
+        random.seed(31)
+        for name in VARIANTS:
+            for rot in (True, False):
+                cubs = random_cubs(100)
+                b, placed = pack(getattr(maxcubs, 'MaxCubs' + name), cubs,
+                                 rot=rot)
+                bv, placed_vec = pack(
+                    getattr(maxcubs_vec, 'MaxCubsVec' + name), cubs, rot=rot)
+                self.assertEqual(placed, placed_vec)
+                self.assertEqual(sorted(b._max_cubs.values(), key=repr),
+                                 sorted((Cuboid(x, y, z, r-x, t-y, i-z)
+                                         for x, y, z, r, t, i in
+                                         bv._max_cubs.tolist()), key=repr))
+                bv.validate_packing()
+
+    def test_split(self):
+        b = maxcubs_vec.MaxCubsVecBl(10, 10, 10)
+        b.add_cub(5, 5, 5)
+        self.assertEqual(b._max_cubs.tolist(), [
+            [5, 0, 0, 10, 10, 10], [0, 5, 0, 10, 10, 10],
+            [0, 0, 5, 10, 10, 10]])
+
+    def test_decimal(self):
+        random.seed(32)
+        cubs = [tuple(decimal.Decimal(v) / 2 for v in c)
+                for c in random_cubs(60)]
+        _, placed = pack(maxcubs.MaxCubsBaf, cubs, size=20)
+        bv, placed_vec = pack(maxcubs_vec.MaxCubsVecBaf, cubs, size=20)
+        self.assertEqual(placed, placed_vec)
+        self.assertEqual(bv._max_cubs.dtype, object)
+
+    def test_large_bin(self):
+        # Volumes past the int64 range, the bounds stay int64
+        random.seed(34)
+        cubs = [tuple(10**5 * v for v in c) for c in random_cubs(40)]
+        _, placed = pack(maxcubs.MaxCubsBaf, cubs, size=3 * 10**6)
+        bv, placed_vec = pack(maxcubs_vec.MaxCubsVecBaf, cubs,
+                              size=3 * 10**6)
+        self.assertEqual(placed, placed_vec)
+        self.assertEqual(bv._max_cubs.dtype, np.int64)
+        self.assertGreater(placed_vec[1][0], 2**63)
+
+    def test_packer(self):
+        random.seed(33)
+        cubs = random_cubs(150)
+        results = []
+        for algo in (maxcubs.MaxCubsBssf, maxcubs_vec.MaxCubsVecBssf):
+            p = packer.newPacker(pack_algo=algo)
+            p.add_bin(30, 30, 30, count=4)
+            for c in cubs:
+                p.add_cub(*c)
+            p.pack()
+            p.validate_packing()
+            results.append(p.cub_list())
+        self.assertEqual(results[0], results[1])
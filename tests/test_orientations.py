@@ -0,0 +1,139 @@
+from unittest import TestCase
+import random
+
+import cubspack.guillotine as guillotine
+import cubspack.maxcubs as maxcubs
+import cubspack.maxcubs_vec as maxcubs_vec
+from cubspack.pack_algo import ROT_ALL
+from cubspack.pack_algo import ROT_NONE
+from cubspack.pack_algo import ROT_UPRIGHT
+from cubspack.pack_algo import ROT_WH
+import cubspack.packer as packer
+
+
+class TestOrientations(TestCase):
+
+    algos = (maxcubs.MaxCubsBssf, maxcubs.MaxCubsBl,
+             maxcubs_vec.MaxCubsVecBssf, maxcubs_vec.MaxCubsVecBl,
+             guillotine.GuillotineBssfSas, guillotine.GuillotineBvfMinas)
+
+    def test_masks(self):
+        b = maxcubs.MaxCubsBssf(10, 10, 10, rot=ROT_ALL)
+        self.assertEqual(len(b._orientations(1, 2, 3)), 6)
+        self.assertEqual(b._orientations(1, 2, 3)[:2], [(1, 2, 3), (2, 1, 3)])
+        self.assertEqual(b._orientations(1, 2, 3, ROT_UPRIGHT),
+                         [(1, 2, 3), (3, 2, 1)])
+        self.assertEqual(b._orientations(1, 2, 3, ROT_NONE), [(1, 2, 3)])
+
+        # Bin and cuboid masks are combined
+        b = maxcubs.MaxCubsBssf(10, 10, 10, rot=True)
+        self.assertEqual(b._orientations(1, 2, 3, ROT_ALL),
+                         [(1, 2, 3), (2, 1, 3)])
+        self.assertEqual(b._orientations(1, 2, 3, ROT_UPRIGHT), [(1, 2, 3)])
+        b = maxcubs.MaxCubsBssf(10, 10, 10, rot=False)
+        self.assertEqual(b._orientations(1, 2, 3), [(1, 2, 3)])
+
+    def test_symmetric(self):
+        b = maxcubs.MaxCubsBssf(10, 10, 10, rot=ROT_ALL)
+        self.assertEqual(b._orientations(2, 2, 2), [(2, 2, 2)])
+        self.assertEqual(b._orientations(2, 2, 3),
+                         [(2, 2, 3), (2, 3, 2), (3, 2, 2)])
+        b = maxcubs.MaxCubsBssf(10, 10, 10, rot=ROT_WH)
+        self.assertEqual(b._orientations(2, 2, 3), [(2, 2, 3)])
+
+    def test_fits_volume(self):
+        b = maxcubs.MaxCubsBssf(10, 2, 2, rot=ROT_ALL)
+        self.assertTrue(b._fits_volume(2, 2, 10))
+        self.assertTrue(b._fits_volume(2, 10, 2))
+        self.assertFalse(b._fits_volume(2, 10, 2, ROT_UPRIGHT))
+        self.assertFalse(b._fits_volume(3, 10, 2))
+
+        b = maxcubs.MaxCubsBssf(10, 2, 2, rot=True)
+        self.assertTrue(b._fits_volume(2, 10, 2))
+        self.assertFalse(b._fits_volume(2, 2, 10))
+
+        # Without rotation the height isn't swapped either
+        b = maxcubs.MaxCubsBssf(10, 2, 2, rot=False)
+        self.assertFalse(b._fits_volume(2, 10, 2))
+
+    def test_placement(self):
+        for algo in self.algos:
+            # Standing slab only fits lying along the depth
+            b = algo(2, 2, 10, rot=ROT_ALL)
+            c = b.add_cub(10, 2, 2, rid=1)
+            self.assertEqual((c.width, c.height, c.depth), (2, 2, 10))
+
+            # This side up
+            b = algo(2, 2, 10, rot=ROT_ALL)
+            self.assertIsNone(b.add_cub(2, 10, 2, orientations=ROT_UPRIGHT))
+            c = b.add_cub(10, 2, 2, orientations=ROT_UPRIGHT)
+            self.assertEqual((c.width, c.height, c.depth), (2, 2, 10))
+
+            b = algo(2, 2, 10, rot=True)
+            self.assertIsNone(b.add_cub(10, 2, 2))
+            self.assertIsNone(b.placement(10, 2, 2))
+
+    def test_fill(self):
+        # 2x3x4 boxes fill the bin only when all orientations are allowed
+        for algo in self.algos:
+            b = algo(4, 4, 6, rot=ROT_ALL)
+            for _ in range(4):
+                self.assertIsNotNone(b.add_cub(4, 2, 3))
+            b.validate_packing()
+            self.assertEqual(b.used_volume(), 96)
+
+    def test_placement_token(self):
+        for algo in self.algos:
+            b = algo(10, 10, 10, rot=ROT_ALL)
+            p = b.placement(1, 2, 3, ROT_UPRIGHT)
+            self.assertEqual(b._placed_position(p, 1, 2, 3), None)
+            self.assertIsNotNone(
+                b._placed_position(p, 1, 2, 3, ROT_UPRIGHT))
+
+    def test_min_dims(self):
+        b = maxcubs.MaxCubsBssf(10, 10, 10, rot=ROT_ALL)
+        b.set_min_dims(3, 1, 2)
+        self.assertEqual(b._min_dims, (1, 1, 1))
+
+        b = maxcubs.MaxCubsBssf(10, 10, 10, rot=ROT_UPRIGHT)
+        b.set_min_dims(3, 1, 2)
+        self.assertEqual(b._min_dims, (2, 1, 2))
+
+        b = maxcubs.MaxCubsBssf(10, 10, 10, rot=False)
+        b.set_min_dims(3, 1, 2)
+        self.assertEqual(b._min_dims, (3, 1, 2))
+
+    def test_vec_same_placements(self):
+        random.seed(3)
+        cubs = [(random.randint(1, 12), random.randint(1, 12),
+                 random.randint(1, 12), random.choice((None, ROT_UPRIGHT)))
+                for _ in range(150)]
+        for name in ('Bl', 'Bssf', 'Baf', 'Blsf'):
+            a = getattr(maxcubs, 'MaxCubs' + name)(30, 30, 30, rot=ROT_ALL)
+            b = getattr(maxcubs_vec, 'MaxCubsVec' + name)(
+                30, 30, 30, rot=ROT_ALL)
+            for w, h, d, o in cubs:
+                self.assertEqual(a.fitness(w, h, d, o), b.fitness(w, h, d, o))
+                ca = a.add_cub(w, h, d, orientations=o)
+                cb = b.add_cub(w, h, d, orientations=o)
+                self.assertEqual(ca, cb)
+
+    def test_packer(self):
+        for mode, bin_algo in ((packer.PackingMode.Offline,
+                                packer.PackingBin.BBF),
+                               (packer.PackingMode.Offline,
+                                packer.PackingBin.Global),
+                               (packer.PackingMode.Online,
+                                packer.PackingBin.BFF)):
+            p = packer.newPacker(mode=mode, bin_algo=bin_algo,
+                                 rotation=ROT_ALL)
+            p.add_bin(2, 2, 10)
+            p.add_bin(10, 2, 2)
+            p.add_cub(2, 10, 2, rid=1, orientations=ROT_UPRIGHT)
+            p.add_cub(10, 2, 2, rid=2, orientations=ROT_UPRIGHT)
+            if mode == packer.PackingMode.Offline:
+                p.pack()
+
+            cubs = p.cub_list()
+            self.assertEqual([c[7] for c in cubs], [2])
+            self.assertEqual(cubs[0][4:7], (2, 2, 10))
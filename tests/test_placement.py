@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+import cubspack.guillotine as guillotine
+import cubspack.maxcubs as maxcubs
+import cubspack.maxcubs_vec as maxcubs_vec
+
+
+class TestPlacement(TestCase):
+
+    algos = ((maxcubs.MaxCubsBaf, '_select_position'),
+             (maxcubs_vec.MaxCubsVecBaf, '_select_position'),
+             (guillotine.GuillotineBssfSas, '_select_fittest_section'))
+
+    def count_searches(self, b, method):
+        """Count the calls to the position search method of bin b"""
+        calls = []
+        search = getattr(b, method)
+
+        def counted(*args):
+            calls.append(args)
+            return search(*args)
+        setattr(b, method, counted)
+        return calls
+
+    def test_fitness(self):
+        for algo, _ in self.algos:
+            b = algo(10, 10, 10)
+            b.add_cub(4, 10, 10)
+            p = b.placement(3, 3, 3)
+            self.assertEqual(p.fitness, b.fitness(3, 3, 3))
+            self.assertEqual((p.width, p.height, p.depth), (3, 3, 3))
+            self.assertIsNone(b.placement(11, 1, 1))
+            self.assertIsNone(b.fitness(11, 1, 1))
+
+    def test_commit(self):
+        for algo, method in self.algos:
+            b = algo(10, 10, 10)
+            p = b.placement(3, 3, 3)
+            calls = self.count_searches(b, method)
+            c = b.add_cub(3, 3, 3, rid=1, placement=p)
+            self.assertEqual(calls, [])
+            self.assertEqual((c.x, c.y, c.z, c.rid), (0, 0, 0, 1))
+
+    def test_stale(self):
+        for algo, method in self.algos:
+            b = algo(10, 10, 10)
+            other = algo(10, 10, 10)
+            p = b.placement(3, 3, 3)
+            b.add_cub(3, 3, 3)
+            calls = self.count_searches(b, method)
+
+            # Bin changed since, searched again
+            c = b.add_cub(3, 3, 3, placement=p)
+            self.assertEqual(len(calls), 1)
+            self.assertNotEqual((c.x, c.y, c.z), (0, 0, 0))
+
+            # Other cuboid or bin
+            b.add_cub(2, 2, 2, placement=b.placement(3, 3, 3))
+            self.assertEqual(len(calls), 3)
+            other.add_cub(3, 3, 3, placement=b.placement(3, 3, 3))
+            self.assertEqual(len(calls), 4)
+
+            # Pruning also invalidates it
+            p = b.placement(3, 3, 3)
+            b.set_min_dims(2, 2, 2)
+            b.add_cub(3, 3, 3, placement=p)
+            self.assertEqual(len(calls), 6)
+            b.validate_packing()
+
+    def test_guillotine_assert(self):
+        g = guillotine.GuillotineBssfSas(10, 10, 10)
+        with self.assertRaises(AssertionError):
+            g.fitness(1, 1, 0)
@@ -0,0 +1,103 @@
+from unittest import TestCase
+import random
+
+from cubspack.geometry import Cuboid
+import cubspack.guillotine as guillotine
+import cubspack.maxcubs as maxcubs
+import cubspack.maxcubs_vec as maxcubs_vec
+import cubspack.pack_algo as pack_algo
+import cubspack.packer as packer
+
+
+class TestBinPruning(TestCase):
+
+    def test_maxcubs(self):
+        b = maxcubs.MaxCubsBssf(10, 10, 10)
+        b.add_cub(8, 10, 10)
+        b.add_cub(2, 10, 3)
+        self.assertEqual(len(b._max_cubs), 1)
+
+        # The remaining 2 units of width are too narrow, rotated too
+        b.set_min_dims(3, 3, 1)
+        self.assertEqual(len(b._max_cubs), 0)
+        self.assertEqual(len(b._fit_index), 0)
+
+    def test_maxcubs_splits(self):
+        b = maxcubs.MaxCubsBl(10, 10, 10, rot=False)
+        b.set_min_dims(3, 3, 3)
+        b.add_cub(8, 8, 8)
+        # Only the 2 units thick splits were left
+        self.assertEqual(len(b._max_cubs), 0)
+        self.assertIsNone(b.add_cub(2, 2, 2))
+
+    def test_maxcubs_vec(self):
+        b = maxcubs_vec.MaxCubsVecBssf(10, 10, 10)
+        b.add_cub(8, 10, 10)
+        b.set_min_dims(3, 3, 1)
+        self.assertEqual(len(b._max_cubs), 0)
+
+    def test_guillotine(self):
+        g = guillotine.GuillotineBssfSas(10, 10, 10, rot=False)
+        g.add_cub(8, 10, 10)
+        g.set_min_dims(3, 1, 1)
+        # Parked, the section is kept but is no longer a candidate
+        self.assertEqual(list(g._sections.values()),
+                         [Cuboid(8, 0, 0, 2, 10, 10)])
+        self.assertEqual(len(g._fit_index), 0)
+        self.assertIsNone(g.fitness(2, 2, 2))
+
+        # It is merged with a neighbour into a useful section
+        g._add_section(Cuboid(5, 0, 0, 3, 10, 10))
+        self.assertEqual(list(g._sections.values()),
+                         [Cuboid(5, 0, 0, 5, 10, 10)])
+        self.assertEqual(len(g._fit_index), 1)
+
+
+class TestPackerPruning(TestCase):
+
+    def pack(self, algo, bin_algo, cubs, prune=True):
+        p = packer.newPacker(bin_algo=bin_algo, pack_algo=algo)
+        p.add_bin(30, 30, 30, count=10)
+        for c in cubs:
+            p.add_cub(*c)
+
+        set_min_dims = pack_algo.PackingAlgorithm.set_min_dims
+        if not prune:
+            pack_algo.PackingAlgorithm.set_min_dims = lambda *args: None
+        try:
+            p.pack()
+        finally:
+            pack_algo.PackingAlgorithm.set_min_dims = set_min_dims
+
+        p.validate_packing()
+        return p.cub_list()
+
+    def test_same_placements(self):
+        random.seed(41)
+        cubs = [(random.randint(4, 14), random.randint(4, 14),
+                 random.randint(4, 14)) for _ in range(100)]
+        for algo in (maxcubs.MaxCubsBaf, guillotine.GuillotineBvfSas):
+            for bin_algo in (packer.PackingBin.BFF, packer.PackingBin.BBF,
+                             packer.PackingBin.Global):
+                self.assertEqual(self.pack(algo, bin_algo, cubs),
+                                 self.pack(algo, bin_algo, cubs, False))
+
+    def test_min_dims(self):
+        p = packer.newPacker(bin_algo=packer.PackingBin.BFF,
+                             sort_algo=packer.SORT_NONE)
+        p.add_bin(30, 30, 30)
+        for c in ((5, 9, 9), (9, 6, 9), (9, 9, 7)):
+            p.add_cub(*c)
+        p.pack()
+        self.assertEqual(p._min_dims, (9, 9, 7))
+        self.assertEqual(p[0]._min_dims, (9, 9, 7))
+
+    def test_global_new_bins(self):
+        # Bins opened by the global packer start with the min dims of the
+        # cuboids left, even when they didn't change since the last bin.
+        p = packer.newPacker(bin_algo=packer.PackingBin.Global)
+        p.add_bin(10, 10, 10, count=3)
+        for c in ((10, 10, 10), (10, 10, 10), (7, 7, 7)):
+            p.add_cub(*c)
+        p.pack()
+        self.assertEqual([b._min_dims for b in p], [(7, 7, 7)] * 3)
@@ -0,0 +1,185 @@
+from fractions import Fraction
+from unittest import TestCase
+import random
+
+from cubspack.geometry import Cuboid
+import cubspack.skyline as skyline
+
+from tests.engine_checks import EngineChecks
+from tests.engine_checks import random_cubs
+
+
+VARIANTS = ('Bl', 'BlWm', 'Mwf', 'MwfWm', 'Mwfl', 'MwflWm')
+
+
+class TestSkyline(EngineChecks, TestCase):
+
+    module = skyline
+    prefix = 'Skyline'
+    variants = VARIANTS
+    seed = 89
+    fill = 0.5
+
+    def test_surface(self):
+        b = skyline.SkylineBl(10, 10, 10, rot=False)
+        self.assertEqual(b.add_cub(5, 5, 5), Cuboid(0, 0, 0, 5, 5, 5))
+        tile, = b._tiles[0]
+        self.assertEqual(tile.xs, [0, 5, 10])
+        self.assertEqual(tile.heights, [[5, 0], [0, 0]])
+        # Against the first cuboid or the walls, on the four sides
+        self.assertEqual([c[:5] for c in b._skyline_corners()], [
+            (0, 0, 5, False, False), (0, 0, 10, True, False),
+            (0, 5, 0, False, False), (0, 10, 0, False, True),
+            (0, 10, 10, True, True), (5, 0, 0, False, False)])
+
+        # Lowest z first, then lowest x
+        self.assertEqual(b.add_cub(5, 5, 5), Cuboid(5, 0, 0, 5, 5, 5))
+        # The cells left with the same heights are merged
+        self.assertEqual(tile.xs, [0, 10])
+        self.assertEqual(tile.zs, [0, 5, 10])
+        self.assertEqual(tile.heights, [[5, 0]])
+
+    def test_tiles(self):
+        # The floor tiles change neither the corners nor the placements
+        random.seed(101)
+        for name in ('Bl', 'Mwf', 'Mwfl'):
+            algo = getattr(skyline, 'Skyline' + name)
+            cubs = random_cubs(150)
+            single = algo(40, 40, 40, max_tiles=1)
+            tiled = algo(40, 40, 40, tile_sides=1)
+            for w, h, d in cubs:
+                self.assertEqual(single.add_cub(w, h, d),
+                                 tiled.add_cub(w, h, d))
+                self.assertEqual([c[:5] for c in single._skyline_corners()],
+                                 [c[:5] for c in tiled._skyline_corners()])
+            self.assertGreater(len(tiled._tiles), 1)
+            tiled.validate_packing()
+
+    def test_bounds(self):
+        # The bounds only skip positions that can't win, same selection as
+        # scoring every corner and orientation.
+        random.seed(103)
+        for name in ('Bl', 'Mwf', 'Mwfl'):
+            b = getattr(skyline, 'Skyline' + name)(40, 40, 40)
+            for w, h, d in random_cubs(100):
+                scan = []
+                for k, corner in enumerate(b._skyline_corners()):
+                    _, z, x, right, front = corner[:5]
+                    dims = b._orientations(w, h, d)
+                    for i, (cw, ch, cd) in enumerate(dims):
+                        left = x - cw if right else x
+                        outeye = z - cd if front else z
+                        if min(left, outeye) < 0 or \
+                                max(left + cw, outeye + cd) > 40:
+                            continue
+                        support = b._support(
+                            left, left + cw, outeye, outeye + cd)
+                        if support + ch <= 40:
+                            scan.append((
+                                b._cub_fitness(
+                                    support, left, outeye, cw, ch, cd),
+                                k, i, Cuboid(left, support, outeye, cw, ch,
+                                             cd)))
+                cub, fitness = b._select_position(w, h, d)
+                if not scan:
+                    self.assertIsNone(cub)
+                    continue
+                best = min(scan)
+                self.assertEqual((fitness, cub), (best[0], best[3]))
+                b.add_cub(w, h, d)
+
+    def test_support(self):
+        b = skyline.SkylineBl(10, 10, 10, rot=False)
+        b.add_cub(5, 5, 10)
+        # Placed on the highest cell under it
+        self.assertEqual(b.add_cub(10, 2, 10), Cuboid(0, 5, 0, 10, 2, 10))
+        self.assertIsNone(b.add_cub(10, 4, 10))
+        self.assertEqual(b.add_cub(10, 3, 10), Cuboid(0, 7, 0, 10, 3, 10))
+        self.assertIsNone(b.add_cub(1, 1, 1))
+        b.validate_packing()
+
+    def test_waste_management(self):
+        b = skyline.SkylineBlWm(10, 10, 10, rot=False)
+        b.add_cub(3, 3, 3)
+        self.assertEqual(b.add_cub(10, 7, 10), Cuboid(0, 3, 0, 10, 7, 10))
+
+        # Only fits in the space left under the second cuboid
+        self.assertEqual(b.fitness(3, 3, 7), 0)
+        self.assertEqual(b.add_cub(3, 3, 7), Cuboid(0, 0, 3, 3, 3, 7))
+        self.assertEqual(len(b), 3)
+        self.assertIsNone(b.add_cub(3, 4, 3))
+        b.validate_packing()
+
+        b = skyline.SkylineBl(10, 10, 10, rot=False)
+        b.add_cub(3, 3, 3)
+        b.add_cub(10, 7, 10)
+        self.assertIsNone(b.fitness(3, 3, 7))
+
+    def test_wasted_volume(self):
+        # Same as summing the cells under the cuboid
+        random.seed(97)
+        b = skyline.SkylineMwf(30, 60, 30, tile_sides=1)
+        for w, h, d in random_cubs(40):
+            b.add_cub(w, h, d)
+        cells = [(tile.xs[i], tile.xs[i+1], tile.zs[j], tile.zs[j+1], height)
+                 for row in b._tiles for tile in row
+                 for i, heights in enumerate(tile.heights)
+                 for j, height in enumerate(heights)]
+        for _ in range(50):
+            w, d = random.randint(1, 12), random.randint(1, 12)
+            x, z = random.randint(0, 30 - w), random.randint(0, 30 - d)
+            support = 60
+            below = 0
+            for left, right, outeye, ineye, height in cells:
+                dx = min(right, x + w) - max(left, x)
+                dz = min(ineye, z + d) - max(outeye, z)
+                if dx > 0 and dz > 0:
+                    below += dx * dz * height
+            self.assertEqual(b._wasted_volume(support, x, z, w, d),
+                             support * w * d - below)
+
+    def test_exact_fitness(self):
+        # Past int64, the volumes and the fitness stay exact
+        side = 10**7
+        half = side // 2
+        waste = half * side * side - 2 * half**3
+        for name, fitness in (('Bl', half + 1), ('Mwf', waste),
+                              ('Mwfl', waste * side**3 + half + 1)):
+            b = getattr(skyline, 'Skyline' + name)(side, side, side,
+                                                   rot=False)
+            b.add_cub(half, half, half)
+            b.add_cub(half, half, side - half)
+            self.assertEqual(b.fitness(side, 1, side), fitness)
+            self.assertEqual(b.add_cub(side, 1, side),
+                             Cuboid(0, half, 0, side, 1, side))
+
+    def test_waste_first(self):
+        # Less waste wins over a lower top even when the bin volume is too
+        # small to fold them into one value.
+        b = skyline.SkylineMwfl(1, 1, 1, rot=False)
+        b.add_cub(Fraction(1, 2), Fraction(3, 4), 1)
+        b.add_cub(Fraction(1, 4), Fraction(1, 4), 1)
+        p = b.placement(Fraction(1, 2), Fraction(1, 10), 1)
+        self.assertEqual(p.position[:3], (0, Fraction(3, 4), 0))
+        self.assertEqual(p.fitness, Fraction(17, 20))
+        b.add_cub(Fraction(1, 2), Fraction(1, 10), 1, placement=p)
+        b.validate_packing()
+
+    def test_found(self):
+        b = skyline.SkylineBl(10, 10, 10)
+        p = b.placement(2, 3, 4)
+        self.assertIn((2, 3, 4, None), b._found)
+        self.assertEqual(b.placement(2, 3, 4).position, p.position)
+        b.add_cub(2, 3, 4, placement=p)
+        self.assertEqual(b._found, {})
+
+    def test_reset(self):
+        b = skyline.SkylineBlWm(10, 10, 10, rot=False)
+        b.add_cub(3, 3, 3)
+        b.add_cub(10, 7, 10)
+        b.reset()
+        self.assertEqual(len(b), 0)
+        self.assertEqual([[t.heights for t in row] for row in b._tiles],
+                         [[[[0]]]])
+        self.assertEqual(len(b._waste._sections), 0)
+        self.assertEqual(b.add_cub(5, 5, 5), Cuboid(0, 0, 0, 5, 5, 5))
@@ -0,0 +1,229 @@
+from unittest import TestCase
+import random
+
+from cubspack.geometry import Cuboid
+import cubspack.maxcubs as maxcubs
+from cubspack.spatial import ColumnIndex
+from cubspack.spatial import DominanceIndex
+from cubspack.spatial import LooseOctree
+from cubspack.spatial import VolumeIndex
+
+
+def random_cuboid(max_coord=100, max_side=30):
+    return Cuboid(random.randint(0, max_coord), random.randint(0, max_coord),
+                  random.randint(0, max_coord), random.randint(0, max_side),
+                  random.randint(0, max_side), random.randint(0, max_side))
+
+
+class TestLooseOctree(TestCase):
+
+    def setUp(self):
+        random.seed(9)
+        self.cuboids = [random_cuboid() for _ in range(300)]
+        # Some big ones and some tiny ones
+        self.cuboids += [random_cuboid(max_side=130) for _ in range(10)]
+        self.cuboids += [random_cuboid(max_side=1) for _ in range(50)]
+        self.index = LooseOctree(130, 130, 130, max_level=6)
+        for i, c in enumerate(self.cuboids):
+            self.index.insert(i, c)
+
+    def test_queries(self):
+        for _ in range(200):
+            q = random_cuboid()
+            self.assertEqual(
+                sorted(self.index.overlapping(q)),
+                [i for i, c in enumerate(self.cuboids) if c.intersects(q)])
+            self.assertEqual(
+                sorted(self.index.touching(q)),
+                [i for i, c in enumerate(self.cuboids)
+                 if c.intersects(q, edges=True)])
+            self.assertEqual(
+                sorted(self.index.containing(q)),
+                [i for i, c in enumerate(self.cuboids) if c.contains(q)])
+            self.assertEqual(
+                sorted(self.index.contained(q)),
+                [i for i, c in enumerate(self.cuboids) if q.contains(c)])
+
+    def test_below(self):
+        index = LooseOctree(10, 10, 10)
+        index.insert('floor', Cuboid(0, 0, 0, 10, 2, 10))
+        index.insert('a', Cuboid(0, 2, 0, 5, 3, 5))
+        index.insert('b', Cuboid(5, 2, 0, 5, 1, 5))
+        index.insert('c', Cuboid(0, 2, 5, 5, 3, 5))
+        self.assertEqual(sorted(index.below(Cuboid(2, 5, 2, 6, 1, 6))),
+                         ['a', 'c'])
+        self.assertEqual(index.below(Cuboid(0, 2, 0, 1, 1, 1)), ['floor'])
+        # Touching only along an edge doesn't support
+        self.assertEqual(index.below(Cuboid(10, 3, 0, 1, 1, 1)), [])
+
+    def test_remove(self):
+        for i in range(0, len(self.cuboids), 2):
+            self.index.remove(i)
+        self.assertEqual(len(self.index), len(self.cuboids) // 2)
+        for _ in range(50):
+            q = random_cuboid()
+            self.assertEqual(
+                sorted(self.index.overlapping(q)),
+                [i for i, c in enumerate(self.cuboids)
+                 if i % 2 and c.intersects(q)])
+
+    def test_reinsert(self):
+        self.index.insert(0, Cuboid(0, 0, 0, 1, 1, 1))
+        self.assertEqual(len(self.index), len(self.cuboids))
+        self.assertEqual(self.index.get(0), Cuboid(0, 0, 0, 1, 1, 1))
+
+
+class TestDominanceIndex(TestCase):
+
+    def setUp(self):
+        random.seed(10)
+        self.cuboids = [random_cuboid(max_side=70) for _ in range(300)]
+        self.cuboids += [random_cuboid(max_side=1) for _ in range(20)]
+        self.index = DominanceIndex()
+        for i, c in enumerate(self.cuboids):
+            self.index.insert(i, c)
+
+    def feasible(self, w, h, d, skip=()):
+        return [i for i, c in enumerate(self.cuboids) if i not in skip and
+                c.width >= w and c.height >= h and c.depth >= d]
+
+    def test_feasible(self):
+        for _ in range(200):
+            w, h, d = [random.randint(1, 64) for _ in range(3)]
+            self.assertEqual(
+                sorted(k for k, _ in self.index.feasible(w, h, d)),
+                self.feasible(w, h, d))
+        # Exact powers of two and float dimensions
+        for w, h, d in ((32, 32, 32), (16, 1, 64), (0.5, 31.9, 32.1)):
+            self.assertEqual(
+                sorted(k for k, _ in self.index.feasible(w, h, d)),
+                self.feasible(w, h, d))
+
+    def test_remove(self):
+        removed = set(range(0, len(self.cuboids), 3))
+        for i in removed:
+            self.index.remove(i)
+        self.assertEqual(len(self.index), len(self.cuboids) - len(removed))
+        self.assertEqual(sorted(k for k, _ in self.index.feasible(8, 8, 8)),
+                         self.feasible(8, 8, 8, removed))
+        self.index.insert(1, Cuboid(0, 0, 0, 1, 1, 1))
+        self.assertEqual(self.index.get(1).width, 1)
+        self.assertNotIn(1, [k for k, _ in self.index.feasible(2, 1, 1)])
+
+
+class TestVolumeIndex(TestCase):
+
+    def setUp(self):
+        random.seed(12)
+        self.cuboids = [random_cuboid(max_side=30) for _ in range(200)]
+        self.index = VolumeIndex()
+        for i, c in enumerate(self.cuboids):
+            self.index.insert(i, c)
+
+    def test_ascending(self):
+        for volume in (0, 1, 500, 5000, 30**3 + 1):
+            expected = sorted((c.volume(), i) for i, c in
+                              enumerate(self.cuboids) if c.volume() >= volume)
+            self.assertEqual([(v, k) for v, k, _ in
+                              self.index.ascending(volume)], expected)
+
+    def test_feasible(self):
+        for _ in range(100):
+            w, h, d = [random.randint(1, 25) for _ in range(3)]
+            self.assertEqual(
+                sorted(k for k, _ in self.index.feasible(w, h, d)),
+                [i for i, c in enumerate(self.cuboids) if c.width >= w and
+                 c.height >= h and c.depth >= d])
+
+    def test_remove(self):
+        for i in range(0, len(self.cuboids), 2):
+            self.index.remove(i)
+        self.assertEqual(len(self.index), 100)
+        self.assertEqual([k % 2 for _, k, _ in self.index.ascending(0)],
+                         [1] * 100)
+        self.index.insert(1, Cuboid(0, 0, 0, 1, 1, 1))
+        self.assertIn((1, 1), [(v, k) for v, k, _ in
+                               self.index.ascending(0)])
+        self.assertEqual(self.index.get(1), Cuboid(0, 0, 0, 1, 1, 1))
+        self.assertEqual(len(self.index), 100)
+
+
+class TestColumnIndex(TestCase):
+
+    def setUp(self):
+        random.seed(11)
+        self.cuboids = [random_cuboid(max_side=20) for _ in range(200)]
+        self.cuboids += [random_cuboid(max_side=130) for _ in range(5)]
+        self.cuboids += [random_cuboid(max_side=2) for _ in range(50)]
+        self.index = ColumnIndex(130, 130, 130)
+        for i, c in enumerate(self.cuboids):
+            self.index.insert(i, c)
+
+    def ray(self, point, axis, forward=True):
+        faces = []
+        for c in self.cuboids:
+            low, high = (c.x, c.y, c.z), (c.right, c.top, c.ineye)
+            if all(low[a] <= point[a] < high[a]
+                   for a in range(3) if a != axis):
+                if forward and low[axis] >= point[axis]:
+                    faces.append(low[axis])
+                elif not forward and high[axis] <= point[axis]:
+                    faces.append(-high[axis])
+        if not faces:
+            return None
+        return min(faces) if forward else -min(faces)
+
+    def test_queries(self):
+        for _ in range(300):
+            point = tuple(random.randint(0, 130) for _ in range(3))
+            for axis in range(3):
+                self.assertEqual(self.index.ray(point, axis),
+                                 self.ray(point, axis))
+                self.assertEqual(self.index.ray(point, axis, forward=False),
+                                 self.ray(point, axis, forward=False))
+            self.assertEqual(
+                sorted(self.index.at(point)),
+                [i for i, c in enumerate(self.cuboids)
+                 if c.x <= point[0] < c.right and c.y <= point[1] < c.top and
+                 c.z <= point[2] < c.ineye])
+
+        for _ in range(200):
+            q = random_cuboid()
+            self.assertEqual(
+                sorted(self.index.overlapping(q)),
+                [i for i, c in enumerate(self.cuboids) if c.intersects(q)])
+
+    def test_grid(self):
+        # Cells about the mean cuboid side, rebuilt as it changes
+        index = ColumnIndex(100, 100, 100)
+        index.insert(0, Cuboid(0, 0, 0, 100, 50, 100))
+        self.assertEqual(index._cells, (1, 2, 1))
+        for i in range(1, 100):
+            index.insert(i, Cuboid(i % 10, 50, i // 10, 1, 1, 1))
+        self.assertEqual(index._target_cells(), (50, 64, 50))
+        for cells, target in zip(index._cells, (50, 64, 50)):
+            self.assertTrue(target / 2 < cells < target * 2)
+        self.assertEqual(index.ray((5, 20, 5), 1), 50)
+        self.assertEqual(index.ray((5, 99, 5), 1, forward=False), 51)
+        self.assertEqual(sorted(index.at((5, 10, 5))), [0])
+
+
+class TestBinQueries(TestCase):
+
+    def test_bin(self):
+        b = maxcubs.MaxCubsBssf(10, 10, 10)
+        b.add_cub(10, 2, 10)
+        # Index built after and then updated incrementally
+        self.assertEqual(len(b.spatial_index), 1)
+        b.add_cub(5, 3, 5)
+        b.add_cub(5, 3, 5)
+        self.assertEqual(len(b.spatial_index), 3)
+
+        q = Cuboid(2, 5, 2, 6, 1, 6)
+        self.assertEqual(b.supporting(q), [c for c in b
+                                           if c.top == 5 and c.intersects(
+                                               Cuboid(2, 4, 2, 6, 1, 6))])
+        self.assertEqual(b.overlapping(Cuboid(0, 0, 0, 1, 1, 1)), [b[0]])
+        self.assertEqual(b.touching(Cuboid(0, 2, 0, 1, 1, 1)), [b[0], b[1]])
+        b.reset()
+        self.assertEqual(len(b.spatial_index), 0)
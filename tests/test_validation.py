@@ -0,0 +1,121 @@
+from unittest import TestCase
+import decimal
+import itertools
+import random
+
+from cubspack.geometry import Cuboid
+from cubspack.geometry import sweep_collisions
+import cubspack.guillotine as guillotine
+import cubspack.maxcubs as maxcubs
+from cubspack.packer import newPacker
+
+
+def random_cuboids(num, max_coord=10, max_side=4):
+    return [Cuboid(random.randint(0, max_coord), random.randint(0, max_coord),
+                   random.randint(0, max_coord), random.randint(0, max_side),
+                   random.randint(0, max_side), random.randint(0, max_side))
+            for _ in range(num)]
+
+
+def brute_force(cuboids):
+    return [(i, j) for (i, c1), (j, c2) in
+            itertools.combinations(enumerate(cuboids), 2)
+            if c1.intersects(c2)]
+
+
+class TestSweepCollisions(TestCase):
+
+    def test_brute_force(self):
+        random.seed(3)
+        for _ in range(10):
+            cuboids = random_cuboids(150)
+            expected = brute_force(cuboids)
+            self.assertEqual(sweep_collisions(cuboids), expected)
+            # Small chunks
+            self.assertEqual(sweep_collisions(cuboids, chunk=7), expected)
+
+    def test_first(self):
+        random.seed(4)
+        cuboids = random_cuboids(100)
+        pairs = sweep_collisions(cuboids, first=True, chunk=1)
+        self.assertTrue(pairs)
+        self.assertTrue(set(pairs) <= set(brute_force(cuboids)))
+
+    def test_empty(self):
+        self.assertEqual(sweep_collisions([]), [])
+        self.assertEqual(sweep_collisions([Cuboid(0, 0, 0, 1, 1, 1)]), [])
+
+    def test_touching(self):
+        cuboids = [Cuboid(0, 0, 0, 1, 1, 1), Cuboid(1, 0, 0, 1, 1, 1),
+                   Cuboid(0, 1, 0, 1, 1, 1), Cuboid(1, 1, 1, 1, 1, 1)]
+        self.assertEqual(sweep_collisions(cuboids), [])
+
+    def test_decimal(self):
+        d = decimal.Decimal
+        cuboids = [Cuboid(d('0.5'), 0, 0, d('0.5'), 1, 1),
+                   Cuboid(0, 0, 0, d('0.6'), 1, 1)]
+        self.assertEqual(sweep_collisions(cuboids), [(0, 1)])
+
+
+class TestValidatePacking(TestCase):
+
+    def test_valid(self):
+        for algo in (maxcubs.MaxCubsBssf, guillotine.GuillotineBssfSas):
+            b = algo(10, 10, 10)
+            for _ in range(20):
+                b.add_cub(3, 3, 3)
+            self.assertEqual(b.validate_packing(collisions=True), [])
+            b.validate_packing()
+
+    def test_collision(self):
+        b = maxcubs.MaxCubsBssf(10, 10, 10)
+        b.add_cub(5, 5, 5)
+        b.add_cub(5, 5, 5)
+        b.cuboids.append(Cuboid(0, 0, 0, 2, 2, 2))
+        b.cuboids.append(Cuboid(1, 1, 1, 2, 2, 2))
+        with self.assertRaises(Exception):
+            b.validate_packing()
+        self.assertEqual(b.validate_packing(collisions=True),
+                         [(0, 2), (0, 3), (2, 3)])
+
+    def test_outside(self):
+        b = maxcubs.MaxCubsBssf(10, 10, 5)
+        b.cuboids.append(Cuboid(0, 0, 0, 5, 5, 6))
+        with self.assertRaises(Exception):
+            b.validate_packing()
+
+
+class TestPackerValidation(TestCase):
+
+    def setUp(self):
+        random.seed(5)
+        self.packer = newPacker()
+        self.packer.add_bin(20, 20, 20, count=10)
+        for _ in range(200):
+            self.packer.add_cub(random.randint(2, 8), random.randint(2, 8),
+                                random.randint(2, 8))
+        self.packer.pack()
+
+    def test_valid(self):
+        self.assertGreater(len(self.packer), 1)
+        for processes in (1, 2):
+            reports = self.packer.packing_report(processes=processes)
+            self.assertEqual(len(reports), len(self.packer))
+            for r in reports:
+                self.assertEqual(r.collisions, [])
+                self.assertEqual(r.outside, [])
+            self.packer.validate_packing(processes=processes)
+
+    def test_invalid(self):
+        self.packer[1].cuboids.append(Cuboid(0, 0, 0, 1, 1, 1))
+        self.packer[2].cuboids.append(Cuboid(15, 15, 15, 10, 1, 1))
+        for processes in (1, 2):
+            reports = self.packer.packing_report(processes=processes)
+            self.assertEqual(reports[0], ([], []))
+            self.assertEqual(reports[1].outside, [])
+            self.assertEqual(len(reports[1].collisions), 1)
+            self.assertEqual(reports[2].outside,
+                             [len(self.packer[2]) - 1])
+
+            with self.assertRaises(Exception):
+                self.packer.validate_packing(processes=processes)
@@ -0,0 +1,88 @@
+from unittest import TestCase
+import random
+
+from cubspack.geometry import Cuboid
+from cubspack.spatial import VolumeIndex
+import cubspack.waste as waste
+
+from tests.test_guillotine_sections import check_face_index
+
+
+class TestWasteManager(TestCase):
+
+    def test_add_waste(self):
+        w = waste.WasteManager()
+        w.add_waste(30, 40, 0, 50, 50, 10)
+        w.add_waste(5, 5, 0, 20, 20, 10)
+        w.add_waste(0, 100, 0, 100, 100, 10)
+        self.assertIsInstance(w._fit_index, VolumeIndex)
+
+        self.assertEqual(w.add_cub(20, 20, 10), Cuboid(5, 5, 0, 20, 20, 10))
+        self.assertEqual(w.add_cub(45, 40, 10),
+                         Cuboid(30, 40, 0, 45, 40, 10))
+        self.assertEqual(w.add_cub(90, 80, 10),
+                         Cuboid(0, 100, 0, 90, 80, 10))
+        self.assertIsNone(w.add_cub(100, 100, 100))
+        self.assertEqual(w.add_cub(10, 10, 10),
+                         Cuboid(30, 80, 0, 10, 10, 10))
+        self.assertEqual(len(w), 4)
+
+    def test_empty(self):
+        w = waste.WasteManager()
+        self.assertEqual(len(w._sections), 0)
+        self.assertIsNone(w.add_cub(1, 1, 1))
+        self.assertIsNone(w.fitness(1, 1, 1))
+
+    def test_merge(self):
+        w = waste.WasteManager()
+        w.add_waste(0, 0, 0, 50, 50, 5)
+        w.add_waste(50, 0, 0, 50, 50, 5)
+        w.add_waste(0, 0, 5, 100, 50, 5)
+        self.assertEqual(list(w._sections.values()),
+                         [Cuboid(0, 0, 0, 100, 50, 10)])
+        self.assertEqual(w.fitness(100, 50, 10), 0)
+
+        w = waste.WasteManager(merge=False)
+        w.add_waste(0, 0, 0, 50, 50, 5)
+        w.add_waste(50, 0, 0, 50, 50, 5)
+        self.assertEqual(len(w._sections), 2)
+        self.assertIsNone(w.add_cub(100, 50, 5))
+
+    def test_smallest(self):
+        # Many scattered wastes, the smallest one holding the cuboid is used
+        random.seed(81)
+        w = waste.WasteManager(rot=False)
+        sizes = [(random.randint(1, 9), random.randint(1, 9),
+                  random.randint(1, 9)) for _ in range(1000)]
+        for i, size in enumerate(sizes):
+            w.add_waste(20*i, 0, 0, *size)
+        check_face_index(self, w)
+
+        for _ in range(200):
+            dims = tuple(random.randint(1, 9) for _ in range(3))
+            fitting = dict(((s.x, s.y, s.z), s.volume())
+                           for s in w._sections.values()
+                           if s.width >= dims[0] and s.height >= dims[1] and
+                           s.depth >= dims[2])
+            c = w.add_cub(*dims)
+            if not fitting:
+                self.assertIsNone(c)
+                continue
+            self.assertEqual(fitting[(c.x, c.y, c.z)], min(fitting.values()))
+        check_face_index(self, w)
+
+    def test_rid(self):
+        w = waste.WasteManager(rot=True)
+        w.add_waste(50, 40, 0, 100, 40, 10)
+        c = w.add_cub(30, 80, 10, rid=23)
+        self.assertEqual(c, Cuboid(50, 40, 0, 80, 30, 10))
+        self.assertEqual(c.rid, 23)
+
+    def test_reset(self):
+        w = waste.WasteManager()
+        w.add_waste(0, 0, 0, 10, 10, 10)
+        w.add_cub(5, 5, 5)
+        w.reset()
+        self.assertEqual(len(w), 0)
+        self.assertEqual(len(w._sections), 0)
+        self.assertEqual(len(w._fit_index), 0)